@@ -9,6 +9,17 @@ from apps.handlers.admin.export import router as export_router
 from apps.handlers.admin.tickets import router as tickets_router
 from apps.handlers.admin.wishes import router as wishes_router
 from apps.handlers.admin.post import router as post_router
+from apps.handlers.admin.queries import router as queries_router
+from apps.handlers.admin.broadcasts import router as broadcasts_router
+from apps.handlers.admin.moderation import router as moderation_router
+from apps.handlers.admin.blocklist import router as blocklist_router
+from apps.handlers.admin.duplicates import router as duplicates_router
+from apps.handlers.admin.leaderboard import router as leaderboard_router
+from apps.handlers.admin.referrals import router as referrals_router
+from apps.handlers.admin.stats import router as stats_router
+from apps.handlers.admin.events import router as events_router
+from apps.handlers.admin.backup import router as backup_router
+from apps.handlers.admin.search import router as search_router
 
 # Main admin router that includes all sub-routers
 router = Router()
@@ -17,3 +28,14 @@ router.include_router(export_router)
 router.include_router(tickets_router)
 router.include_router(wishes_router)
 router.include_router(post_router)
+router.include_router(queries_router)
+router.include_router(broadcasts_router)
+router.include_router(moderation_router)
+router.include_router(blocklist_router)
+router.include_router(duplicates_router)
+router.include_router(leaderboard_router)
+router.include_router(referrals_router)
+router.include_router(stats_router)
+router.include_router(events_router)
+router.include_router(backup_router)
+router.include_router(search_router)
@@ -0,0 +1,49 @@
+"""Database backups - run an online backup now and send the archive."""
+from pathlib import Path
+
+from aiogram import Router, types, F
+from aiogram.filters import Command
+from aiogram.enums import ChatType
+
+from config.config import ADMIN_IDS
+from utils.backup import run_backup
+
+router = Router()
+
+# Bot API upload limit for documents
+UPLOAD_LIMIT = 50 * 1024 * 1024
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} МБ"
+
+
+@router.message(Command("backup"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_backup(message: types.Message):
+    """Back up the database now and send the archive."""
+    status = await message.answer("⏳ Делаю резервную копию...")
+    try:
+        summary = await run_backup()
+    except Exception as e:
+        await status.edit_text(f"❌ Не удалось сделать копию: {e}")
+        return
+
+    archive = Path(summary['path'])
+    report = (
+        f"💾 <b>Резервная копия</b> <code>{archive.name}</code>\n\n"
+        f"📦 {format_size(summary['size'])} → {format_size(summary['compressed_size'])} (gzip)\n"
+        f"⏱ {summary['seconds']:.1f} с, из них копирование {summary['copy_seconds']:.1f} с "
+        f"({summary['pages']} страниц за {summary['steps']} шагов)\n"
+        f"✍️ Максимальная задержка записи: {summary['max_stall_ms']:.1f} мс"
+    )
+    if summary['deleted']:
+        report += f"\n🗑 Удалено старых копий: {summary['deleted']}"
+    await status.delete()
+    if summary['compressed_size'] > UPLOAD_LIMIT:
+        await message.answer(
+            f"{report}\n\n⚠️ Файл больше 50 МБ и не может быть отправлен, он сохранён на сервере:\n"
+            f"<code>{archive}</code>",
+            parse_mode="HTML"
+        )
+        return
+    await message.answer_document(types.FSInputFile(archive), caption=report, parse_mode="HTML")
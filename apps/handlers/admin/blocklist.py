@@ -0,0 +1,193 @@
+"""Blocklist management and review of held wishes."""
+import html
+import json
+import logging
+import re
+
+from aiogram import Bot, Router, types, F
+from aiogram.filters import Command, CommandObject
+from aiogram.enums import ChatType
+
+from config.config import ADMIN_IDS
+from data.database import db
+from utils.blocklist import blocklist
+from utils.keyboards.inline import get_admin_held_wish_menu
+from utils.messages import M
+from utils.outbox import outbox
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+HELD_PAGE_SIZE = 10
+MAX_BLOCKLIST_FILE_SIZE = 1024 * 1024
+
+
+def parse_terms(text: str) -> list[str]:
+    """Split admin input into terms: one per line or comma-separated, '#' comments."""
+    terms = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        terms += [term.strip().lower() for term in re.split(r"[,;]", line) if term.strip()]
+    return terms
+
+
+def get_held_wish_text(held: dict) -> str:
+    username = f"@{held['username']}" if held['username'] else f"ID: {held['user_id']}"
+    matches = ", ".join(json.loads(held['matches']))
+    return (
+        f"🛡 <b>Пожелание на модерации</b>\n\n"
+        f"👤 {html.escape(username)} (<code>{held['user_id']}</code>)\n"
+        f"🚫 Совпадения: <code>{html.escape(matches)}</code>\n"
+        f"<blockquote>{html.escape(held['text'])}</blockquote>"
+    )
+
+
+@outbox.renderer("wish_approved")
+async def render_wish_approved(payload: dict) -> dict:
+    """Notification for the author of an approved held wish."""
+    return {"text": M.WISH_APPROVED, "parse_mode": "HTML"}
+
+
+async def notify_admins_about_held_wish(bot: Bot, held_id: int) -> None:
+    """Send a held wish to all admins with approve/reject buttons."""
+    held = await db.moderation.get_held_wish(held_id)
+    if not held:
+        return
+    for admin_id in ADMIN_IDS:
+        try:
+            await bot.send_message(
+                admin_id,
+                get_held_wish_text(held),
+                parse_mode="HTML",
+                reply_markup=get_admin_held_wish_menu(held_id)
+            )
+        except Exception as e:
+            logger.warning("Failed to notify admin %s about held wish: %s", admin_id, e)
+
+
+async def update_blocklist(message: types.Message, terms: list[str], add: bool) -> None:
+    if not terms:
+        await message.answer(
+            "❌ Укажите слова через запятую или с новой строки.\n"
+            "Пример: <code>/block слово1, слово2, =целое_слово</code>",
+            parse_mode="HTML"
+        )
+        return
+    if add:
+        changed = await db.moderation.add_blocklist_terms(terms)
+        blocklist.add(terms)
+        action = "Добавлено"
+    else:
+        changed = await db.moderation.remove_blocklist_terms(terms)
+        blocklist.remove(terms)
+        action = "Удалено"
+    if changed:
+        db.events.record(
+            message.from_user.id, "blocklist_added" if add else "blocklist_removed",
+            details={"terms": terms[:100], "count": len(terms)}
+        )
+    await message.answer(f"✅ {action}: {changed} из {len(terms)}\n📋 Всего в стоп-листе: {len(blocklist)}")
+
+
+@router.message(Command("blocklist"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_blocklist(message: types.Message):
+    """Show blocklist size and send the full list as a file."""
+    held_count = await db.moderation.count_held_wishes()
+    text = (
+        f"🛡 <b>Стоп-лист:</b> {len(blocklist)} слов\n"
+        f"⏳ <b>На модерации:</b> {held_count} (/held)\n\n"
+        f"<code>/block слово1, слово2</code> — добавить\n"
+        f"<code>/unblock слово1, слово2</code> — удалить\n"
+        f"Файл .txt с подписью <code>/block</code> — добавить списком\n\n"
+        f"Слова ищутся внутри текста с учётом регистра, ё/е, латиницы и цифр вместо букв. "
+        f"<code>=слово</code> — только целым словом."
+    )
+    if not len(blocklist):
+        await message.answer(text, parse_mode="HTML")
+        return
+    terms_file = types.BufferedInputFile("\n".join(blocklist.terms()).encode("utf-8"), filename="blocklist.txt")
+    await message.answer_document(terms_file, caption=text, parse_mode="HTML")
+
+
+@router.message(F.document, F.caption.regexp(r"^/block(\s|$)"), F.from_user.id.in_(ADMIN_IDS),
+                F.chat.type == ChatType.PRIVATE)
+async def block_from_file(message: types.Message):
+    """Add terms from an attached text file, one per line."""
+    if message.document.file_size and message.document.file_size > MAX_BLOCKLIST_FILE_SIZE:
+        await message.answer("❌ Файл слишком большой (максимум 1 МБ).")
+        return
+    content = await message.bot.download(message.document)
+    try:
+        text = content.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        await message.answer("❌ Файл должен быть в кодировке UTF-8.")
+        return
+    await update_blocklist(message, parse_terms(text), add=True)
+
+
+@router.message(Command("block"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_block(message: types.Message, command: CommandObject):
+    """Add terms: /block term1, term2."""
+    await update_blocklist(message, parse_terms(command.args or ""), add=True)
+
+
+@router.message(Command("unblock"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_unblock(message: types.Message, command: CommandObject):
+    """Remove terms: /unblock term1, term2."""
+    await update_blocklist(message, parse_terms(command.args or ""), add=False)
+
+
+@router.message(Command("held"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_held(message: types.Message):
+    """Show the oldest wishes waiting for review."""
+    held_wishes = await db.moderation.get_held_wishes(HELD_PAGE_SIZE)
+    if not held_wishes:
+        await message.answer("✅ Пожеланий на модерации нет.")
+        return
+    for held in held_wishes:
+        await message.answer(
+            get_held_wish_text(held),
+            parse_mode="HTML",
+            reply_markup=get_admin_held_wish_menu(held['id'])
+        )
+
+
+@router.callback_query(F.data.startswith("held_approve:"), F.from_user.id.in_(ADMIN_IDS))
+async def approve_held_wish(callback: types.CallbackQuery):
+    """Save and publish a held wish as if it passed the filter."""
+    from apps.handlers.wishes import get_publish_chat
+
+    held = await db.moderation.get_held_wish(int(callback.data.split(":")[1]))
+    if not held or not await db.moderation.delete_held_wish(held['id']):
+        await callback.answer("Уже рассмотрено другим админом")
+        await callback.message.edit_reply_markup(reply_markup=None)
+        return
+
+    # The post and the author's notification are queued with the wish
+    success = await db.add_wish(held['user_id'], held['text'], publish_to=await get_publish_chat(), notify_user=True)
+    db.events.record(callback.from_user.id, "held_wish_approved", held['user_id'], details={"saved": success})
+
+    await callback.answer("✅ Опубликовано" if success else "❌ У пользователя уже есть пожелание")
+    await callback.message.edit_text(
+        f"{get_held_wish_text(held)}\n\n{'✅ Одобрено' if success else '❌ Не сохранено: пожелание уже есть'}",
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(F.data.startswith("held_reject:"), F.from_user.id.in_(ADMIN_IDS))
+async def reject_held_wish(callback: types.CallbackQuery):
+    """Drop a held wish; the user may leave another one."""
+    held = await db.moderation.get_held_wish(int(callback.data.split(":")[1]))
+    if not held or not await db.moderation.delete_held_wish(held['id']):
+        await callback.answer("Уже рассмотрено другим админом")
+        await callback.message.edit_reply_markup(reply_markup=None)
+        return
+
+    db.events.record(callback.from_user.id, "held_wish_rejected", held['user_id'])
+    try:
+        await callback.bot.send_message(held['user_id'], M.WISH_REJECTED, parse_mode="HTML")
+    except Exception as e:
+        logger.warning("Failed to notify user %s about rejection: %s", held['user_id'], e)
+
+    await callback.answer("❌ Отклонено")
+    await callback.message.edit_text(f"{get_held_wish_text(held)}\n\n❌ Отклонено", parse_mode="HTML")
@@ -0,0 +1,274 @@
+"""Broadcast target management - chats, intervals, quiet hours and posts."""
+import re
+from datetime import datetime
+
+from aiogram import Router, types, F
+from aiogram.exceptions import TelegramAPIError
+from aiogram.fsm.context import FSMContext
+
+from config.config import ADMIN_IDS, CHAT_ID
+from data.database import db
+from utils.keyboards.inline import (
+    get_admin_broadcast_target_menu,
+    get_admin_broadcasts_menu,
+    get_admin_cancel_button,
+)
+from utils.scheduler import MIN_INTERVAL_SECONDS, TIMEZONE, broadcaster
+from apps.handlers.admin.post import set_post
+from apps.handlers.admin.utils import AdminState, parse_message_id
+
+router = Router()
+
+DEFAULT_INTERVAL_SECONDS = 60 * 60
+MAX_INTERVAL_SECONDS = 7 * 24 * 60 * 60
+QUIET_HOURS_PATTERN = re.compile(r"^(\d{1,2})\s*[-–]\s*(\d{1,2})$")
+
+PROMPTS = {
+    "interval": "⏱ <b>Отправьте интервал в минутах</b>\n\nНапример: <code>90</code>",
+    "quiet": (
+        "🌙 <b>Отправьте тихие часы</b>\n\n"
+        "Формат: <code>23-8</code> (в это время рассылки нет).\n"
+        "Отправьте <code>-</code>, чтобы убрать."
+    ),
+    "post": (
+        "💬 <b>Отправьте ссылку на пост для комментариев</b>\n\n"
+        "Формат: https://t.me/c/XXXXXXXXXX/XXX или ID сообщения.\n"
+        "Отправьте <code>-</code>, чтобы публиковать просто в чат.\n"
+        "В основном чате это тот же пост, что и для новых пожеланий."
+    ),
+}
+
+
+def format_interval(seconds: int) -> str:
+    """Human-readable interval: '2 ч', '90 мин'."""
+    minutes = seconds // 60
+    if minutes % 60 == 0:
+        return f"{minutes // 60} ч"
+    return f"{minutes} мин"
+
+
+def get_target_summary(target: dict) -> str:
+    """One-line description of a target's schedule."""
+    parts = [f"каждые {format_interval(target['interval_seconds'])}"]
+    if target["quiet_start"] is not None:
+        parts.append(f"тихо {target['quiet_start']:02d}–{target['quiet_end']:02d}")
+    if target["reply_to"]:
+        parts.append(f"пост {target['reply_to']}")
+    return " · ".join(parts)
+
+
+def get_next_run_text(target: dict) -> str:
+    if not target["enabled"]:
+        return "приостановлена"
+    next_run = broadcaster.next_run(target["id"])
+    if next_run is None:
+        return "—"
+    return datetime.fromtimestamp(next_run, TIMEZONE).strftime("%d.%m %H:%M")
+
+
+def get_target_text(target: dict) -> str:
+    status = "🟢 Активна" if target["enabled"] else "⏸ Приостановлена"
+    return (
+        f"📢 <b>Рассылка в чат</b> <code>{target['chat_id']}</code>\n\n"
+        f"<b>Статус:</b> {status}\n"
+        f"<b>Расписание:</b> {get_target_summary(target)}\n"
+        f"<b>Следующая:</b> {get_next_run_text(target)}"
+    )
+
+
+async def show_targets(callback: types.CallbackQuery):
+    targets = await db.broadcasts.get_targets()
+    lines = ["📢 <b>Рассылки</b>\n"]
+    for target in targets:
+        icon = "🟢" if target["enabled"] else "⏸"
+        lines.append(
+            f"{icon} <code>{target['chat_id']}</code> — {get_target_summary(target)}\n"
+            f"    следующая: {get_next_run_text(target)}"
+        )
+    if not targets:
+        lines.append("Чатов для рассылки пока нет. Добавьте первый кнопкой ниже.")
+    await callback.message.edit_text(
+        "\n".join(lines),
+        parse_mode="HTML",
+        reply_markup=get_admin_broadcasts_menu(targets)
+    )
+
+
+def get_target_id(callback: types.CallbackQuery) -> int:
+    return int(callback.data.split(":")[1])
+
+
+@router.callback_query(F.data == "admin_broadcasts", F.from_user.id.in_(ADMIN_IDS))
+async def admin_broadcasts(callback: types.CallbackQuery, state: FSMContext):
+    """Show all broadcast targets."""
+    await state.clear()
+    await callback.answer()
+    await show_targets(callback)
+
+
+@router.callback_query(F.data.startswith("bt_view:"), F.from_user.id.in_(ADMIN_IDS))
+async def view_target(callback: types.CallbackQuery):
+    """Show settings of one target."""
+    target = await db.broadcasts.get_target(get_target_id(callback))
+    if not target:
+        await callback.answer("❌ Рассылка не найдена")
+        await show_targets(callback)
+        return
+    await callback.answer()
+    await callback.message.edit_text(
+        get_target_text(target),
+        parse_mode="HTML",
+        reply_markup=get_admin_broadcast_target_menu(target)
+    )
+
+
+@router.callback_query(F.data.startswith("bt_toggle:"), F.from_user.id.in_(ADMIN_IDS))
+async def toggle_target(callback: types.CallbackQuery):
+    """Pause or resume a target."""
+    target_id = get_target_id(callback)
+    target = await db.broadcasts.get_target(target_id)
+    if not target:
+        await callback.answer("❌ Рассылка не найдена")
+        return
+    await db.broadcasts.update_target(target_id, enabled=not target["enabled"])
+    db.events.record(
+        callback.from_user.id, "broadcast_target_updated",
+        details={"target_id": target_id, "enabled": not target["enabled"]}
+    )
+    await broadcaster.refresh(target_id)
+    target = await db.broadcasts.get_target(target_id)
+    await callback.answer("▶️ Рассылка включена" if target["enabled"] else "⏸ Рассылка приостановлена")
+    await callback.message.edit_text(
+        get_target_text(target),
+        parse_mode="HTML",
+        reply_markup=get_admin_broadcast_target_menu(target)
+    )
+
+
+@router.callback_query(F.data.startswith("bt_delete:"), F.from_user.id.in_(ADMIN_IDS))
+async def delete_target(callback: types.CallbackQuery):
+    """Delete a target."""
+    target_id = get_target_id(callback)
+    await db.broadcasts.delete_target(target_id)
+    db.events.record(callback.from_user.id, "broadcast_target_deleted", details={"target_id": target_id})
+    await broadcaster.refresh(target_id)
+    await callback.answer("🗑 Рассылка удалена")
+    await show_targets(callback)
+
+
+@router.callback_query(F.data == "bt_add", F.from_user.id.in_(ADMIN_IDS))
+async def add_target(callback: types.CallbackQuery, state: FSMContext):
+    """Start adding a target."""
+    await callback.answer()
+    await callback.message.edit_text(
+        "➕ <b>Отправьте ID чата или его @username</b>\n\n"
+        "Бот должен быть участником чата и иметь право писать в нём.",
+        parse_mode="HTML",
+        reply_markup=get_admin_cancel_button()
+    )
+    await state.set_state(AdminState.waiting_for_broadcast_chat)
+
+
+@router.message(AdminState.waiting_for_broadcast_chat, F.from_user.id.in_(ADMIN_IDS))
+async def process_target_chat(message: types.Message, state: FSMContext):
+    """Validate the chat and create a target with the default interval."""
+    text = (message.text or "").strip()
+    if not re.fullmatch(r"@[A-Za-z0-9_]{4,}|-?\d+", text):
+        await message.answer(
+            "❌ Нужен числовой ID чата или @username.\n"
+            "Попробуйте ещё раз или нажмите кнопку «Отменить»."
+        )
+        return
+    try:
+        chat = await message.bot.get_chat(text)
+    except TelegramAPIError as e:
+        await message.answer(f"❌ Бот не видит этот чат: {e.message}")
+        return
+
+    target_id = await db.broadcasts.add_target(chat.id, DEFAULT_INTERVAL_SECONDS)
+    db.events.record(
+        message.from_user.id, "broadcast_target_added", details={"target_id": target_id, "chat_id": chat.id}
+    )
+    await broadcaster.refresh(target_id)
+    await state.clear()
+    target = await db.broadcasts.get_target(target_id)
+    await message.answer(
+        get_target_text(target),
+        parse_mode="HTML",
+        reply_markup=get_admin_broadcast_target_menu(target)
+    )
+
+
+@router.callback_query(F.data.startswith("bt_edit:"), F.from_user.id.in_(ADMIN_IDS))
+async def edit_target(callback: types.CallbackQuery, state: FSMContext):
+    """Ask for a new interval, quiet hours or post."""
+    _, target_id, field = callback.data.split(":")
+    await callback.answer()
+    await state.set_state(AdminState.waiting_for_broadcast_value)
+    await state.update_data(target_id=int(target_id), field=field)
+    await callback.message.edit_text(
+        PROMPTS[field],
+        parse_mode="HTML",
+        reply_markup=get_admin_cancel_button()
+    )
+
+
+def parse_target_value(field: str, text: str) -> dict | None:
+    """Parse admin input into target fields, or None if invalid."""
+    if field == "interval":
+        if not text.isdecimal():
+            return None
+        seconds = int(text) * 60
+        if not MIN_INTERVAL_SECONDS <= seconds <= MAX_INTERVAL_SECONDS:
+            return None
+        return {"interval_seconds": seconds}
+    if field == "quiet":
+        if text == "-":
+            return {"quiet_start": None, "quiet_end": None}
+        match = QUIET_HOURS_PATTERN.match(text)
+        if not match:
+            return None
+        start, end = int(match.group(1)), int(match.group(2))
+        if start > 23 or end > 23:
+            return None
+        return {"quiet_start": start, "quiet_end": end}
+    if field == "post":
+        if text == "-":
+            return {"reply_to": None}
+        message_id = parse_message_id(text)
+        return {"reply_to": message_id} if message_id else None
+    return None
+
+
+@router.message(AdminState.waiting_for_broadcast_value, F.from_user.id.in_(ADMIN_IDS))
+async def process_target_value(message: types.Message, state: FSMContext):
+    """Apply the new value and reschedule the target."""
+    data = await state.get_data()
+    fields = parse_target_value(data["field"], (message.text or "").strip())
+    if fields is None:
+        await message.answer(
+            "❌ Не удалось распознать значение.\n"
+            "Попробуйте ещё раз или нажмите кнопку «Отменить»."
+        )
+        return
+
+    target_id = data["target_id"]
+    await state.clear()
+    target = await db.broadcasts.get_target(target_id)
+    if target is None:
+        await message.answer("❌ Рассылка не найдена")
+        return
+    if "reply_to" in fields and target["chat_id"] == CHAT_ID:
+        # The main chat has one post, shared with wishes (💬 Пост для комментариев)
+        await set_post(fields["reply_to"])
+    elif not await db.broadcasts.update_target(target_id, **fields):
+        await message.answer("❌ Рассылка не найдена")
+        return
+    db.events.record(message.from_user.id, "broadcast_target_updated", details={"target_id": target_id, **fields})
+    await broadcaster.refresh(target_id)
+    target = await db.broadcasts.get_target(target_id)
+    await message.answer(
+        "✅ Сохранено\n\n" + get_target_text(target),
+        parse_mode="HTML",
+        reply_markup=get_admin_broadcast_target_menu(target)
+    )
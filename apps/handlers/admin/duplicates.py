@@ -0,0 +1,115 @@
+"""Near-duplicate report - clusters of similar wishes with authors and referrers."""
+import csv
+import html
+import io
+from collections import Counter
+
+from aiogram import Router, types, F
+from aiogram.filters import Command
+from aiogram.enums import ChatType
+
+from config.config import ADMIN_IDS
+from data.database import db
+
+router = Router()
+
+TOP_CLUSTERS = 5
+TOP_REFERRERS = 10
+
+
+def build_clusters(duplicates: list[dict], originals: list[dict]) -> list[list[dict]]:
+    """Group wishes linked by ``duplicate_of`` into clusters, largest first."""
+    parent: dict[int, int] = {}
+
+    def find(wish_id: int) -> int:
+        root = wish_id
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while wish_id != root:
+            parent[wish_id], wish_id = root, parent[wish_id]
+        return root
+
+    for row in duplicates:
+        parent[find(row['wish_id'])] = find(row['duplicate_of'])
+
+    clusters: dict[int, list[dict]] = {}
+    for row in originals + duplicates:
+        clusters.setdefault(find(row['wish_id']), []).append(row)
+    return sorted(clusters.values(), key=len, reverse=True)
+
+
+def format_author(user_id: int, username: str | None) -> str:
+    return f"@{username}" if username else f"ID: {user_id}"
+
+
+def build_report(clusters: list[list[dict]]) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Cluster', 'Cluster Size', 'Wish ID', 'Similarity', 'User ID', 'Username',
+                     'Referrer ID', 'Referrer Username', 'Wish'])
+    for number, cluster in enumerate(clusters, 1):
+        for row in sorted(cluster, key=lambda r: r['wish_id']):
+            writer.writerow([
+                number,
+                len(cluster),
+                row['wish_id'],
+                f"{row['similarity']:.2f}" if row.get('similarity') else "",
+                row['user_id'],
+                row['username'] or "N/A",
+                row['referrer_id'] or "",
+                row['referrer_username'] or "",
+                row['text'],
+            ])
+    return output.getvalue().encode('utf-8-sig')  # BOM for Excel
+
+
+@router.message(Command("dupes"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_dupes(message: types.Message):
+    """Report clusters of near-duplicate wishes."""
+    duplicates = await db.wishes.get_near_duplicates()
+    if not duplicates:
+        await message.answer("✅ Похожих пожеланий не найдено.")
+        return
+
+    linked = {row['wish_id'] for row in duplicates}
+    original_ids = list({row['duplicate_of'] for row in duplicates} - linked)
+    originals = await db.wishes.get_wishes_by_ids(original_ids)
+    clusters = build_clusters(duplicates, originals)
+    wishes_total = sum(len(cluster) for cluster in clusters)
+
+    lines = [
+        "👯 <b>Похожие пожелания</b>\n",
+        f"Кластеров: <b>{len(clusters)}</b>, пожеланий в них: <b>{wishes_total}</b>\n",
+        "<b>Крупнейшие кластеры:</b>",
+    ]
+    for number, cluster in enumerate(clusters[:TOP_CLUSTERS], 1):
+        sample = min(cluster, key=lambda r: r['wish_id'])['text'] or ""
+        sample = f"{sample[:80]}..." if len(sample) > 80 else sample
+        referrers = {row['referrer_id'] for row in cluster if row['referrer_id']}
+        lines.append(
+            f"{number}. {len(cluster)} пожеланий · рефереров: {len(referrers)}\n"
+            f"<i>{html.escape(sample)}</i>"
+        )
+
+    # Referrers who got bonus tickets for near-duplicate wishes
+    referrer_counts = Counter()
+    referrer_names = {}
+    for cluster in clusters:
+        for row in cluster:
+            if row['referrer_id']:
+                referrer_counts[row['referrer_id']] += 1
+                referrer_names[row['referrer_id']] = row['referrer_username']
+    if referrer_counts:
+        lines.append("\n<b>Рефереры авторов похожих пожеланий:</b>")
+        for referrer_id, count in referrer_counts.most_common(TOP_REFERRERS):
+            author = format_author(referrer_id, referrer_names[referrer_id])
+            lines.append(f"• {html.escape(author)} (<code>{referrer_id}</code>) — {count}")
+
+    text = "\n".join(lines)
+    if len(text) > 4000:
+        text = f"{text[:4000]}..."
+    await message.answer(text, parse_mode="HTML")
+    await message.answer_document(
+        types.BufferedInputFile(build_report(clusters), filename="near_duplicates.csv"),
+        caption=f"👯 Все кластеры: {len(clusters)}"
+    )
@@ -0,0 +1,100 @@
+"""Audit log queries - events by user or action and ticket balance checks."""
+import html
+import json
+from datetime import datetime, timezone
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+from aiogram.enums import ChatType
+
+from config.config import ADMIN_IDS
+from data.database import db
+from data.repositories.events import ACTIONS
+from utils.scheduler import TIMEZONE
+
+router = Router()
+
+PAGE_SIZE = 30
+MESSAGE_LIMIT = 4000
+
+USAGE = (
+    "📜 <b>Журнал событий</b>\n\n"
+    "<code>/events</code> — последние события\n"
+    "<code>/events @username</code> или <code>/events ID</code> — события пользователя и сверка билетов\n"
+    "<code>/events действие</code> — события одного вида\n\n"
+    "Действия: " + ", ".join(f"<code>{action}</code>" for action in ACTIONS)
+)
+
+
+def format_event(event: dict) -> str:
+    created = datetime.strptime(event['created_at'], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    parts = [created.astimezone(TIMEZONE).strftime("%d.%m %H:%M"), f"<code>{event['action']}</code>"]
+    if event['actor_id'] is not None and event['actor_id'] != event['target_id']:
+        parts.append(f"от <code>{event['actor_id']}</code>")
+    if event['target_id'] is not None:
+        parts.append(f"→ <code>{event['target_id']}</code>")
+    if event['delta']:
+        parts.append(f"<b>{event['delta']:+d}</b> 🎫")
+    line = " · ".join(parts)
+    if event['details']:
+        line += f"\n    <i>{html.escape(json.dumps(event['details'], ensure_ascii=False)[:200])}</i>"
+    return line
+
+
+async def get_balance_text(user_id: int) -> str:
+    balance = await db.events.get_ticket_balance(user_id)
+    if balance['stored'] is None:
+        return f"🎫 По журналу: <b>{balance['logged']}</b> (пользователя нет в базе)"
+    if balance['logged'] == balance['stored']:
+        status = "✅ сходится"
+    else:
+        status = f"⚠️ расхождение {balance['stored'] - balance['logged']:+d}"
+    return (
+        f"🎫 По журналу: <b>{balance['logged']}</b> · в базе: <b>{balance['stored']}</b> — {status}\n"
+        f"Событий с билетами пользователя: {balance['events']}"
+    )
+
+
+@router.message(Command("events"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_events(message: types.Message, command: CommandObject):
+    """Query the audit log: /events [@username | ID | action] [action]."""
+    args = (command.args or "").split()
+    if args and args[0] in ("help", "?"):
+        await message.answer(USAGE, parse_mode="HTML")
+        return
+
+    user_id = action = None
+    for arg in args[:2]:
+        if arg in ACTIONS:
+            action = arg
+        elif arg.lstrip("-").isdecimal():
+            user_id = int(arg)
+        else:
+            user = await db.find_user_by_username(arg)
+            if not user:
+                await message.answer(
+                    f"❌ Пользователь или действие <code>{html.escape(arg)}</code> не найдены.\n\n{USAGE}",
+                    parse_mode="HTML"
+                )
+                return
+            user_id = user['user_id']
+
+    events = await db.events.get_events(user_id, action, PAGE_SIZE)
+    title = "📜 <b>Журнал событий</b>"
+    if user_id is not None:
+        title += f" пользователя <code>{user_id}</code>"
+    if action:
+        title += f" · <code>{action}</code>"
+    lines = [title + "\n"]
+    if user_id is not None:
+        lines.append(await get_balance_text(user_id) + "\n")
+    if not events:
+        lines.append("Событий нет.")
+    length = sum(len(line) for line in lines)
+    for event in events:
+        line = format_event(event)
+        length += len(line) + 1
+        if length > MESSAGE_LIMIT:
+            break
+        lines.append(line)
+    await message.answer("\n".join(lines), parse_mode="HTML")
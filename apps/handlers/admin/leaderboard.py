@@ -0,0 +1,47 @@
+"""Leaderboard handler - top-100 users by tickets and referrals."""
+import html
+
+from aiogram import Router, types, F
+
+from config.config import ADMIN_IDS
+from data.database import db
+from utils.keyboards.inline import get_admin_leaderboard_menu
+
+router = Router()
+
+TOP_SIZE = 100
+MESSAGE_LIMIT = 4000
+
+TITLES = {
+    "tickets": "🎫 <b>Топ-{count} по билетам</b>",
+    "referrals": "👥 <b>Топ-{count} по рефералам</b> (оставили пожелание)",
+}
+
+
+def format_leaderboard(kind: str, top: list[dict]) -> str:
+    """Top list as text, cut to fit one message."""
+    lines = []
+    length = 0
+    for place, row in enumerate(top, 1):
+        author = f"@{row['username']}" if row['username'] else f"ID: {row['user_id']}"
+        line = f"{place}. {html.escape(author)} — {row[kind]}"
+        length += len(line) + 1
+        if length > MESSAGE_LIMIT:
+            lines.append("…")
+            break
+        lines.append(line)
+    title = TITLES[kind].format(count=len(top))
+    return f"{title}\n\n" + ("\n".join(lines) or "Пока никого нет.")
+
+
+@router.callback_query(F.data.startswith("admin_top:"), F.from_user.id.in_(ADMIN_IDS))
+async def admin_leaderboard(callback: types.CallbackQuery):
+    """Show the top-100 by tickets or referrals."""
+    kind = callback.data.split(":")[1]
+    top = await db.leaderboard.get_top(kind, TOP_SIZE)
+    await callback.message.edit_text(
+        format_leaderboard(kind, top),
+        parse_mode="HTML",
+        reply_markup=get_admin_leaderboard_menu(kind)
+    )
+    await callback.answer()
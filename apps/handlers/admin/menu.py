@@ -16,6 +16,7 @@ async def get_admin_panel_text() -> tuple[str, bool, int | None]:
     wishes_count = await db.get_wishes_count()
     reply_id = await db.get_reply_message_id()
     bot_enabled = await db.get_bot_enabled()
+    outbox = await db.outbox.get_counts()
     
     post_status = f"✅ ID: {reply_id}" if reply_id else "❌ Не установлен"
     bot_status = "🟢 Включен" if bot_enabled else "🔴 Выключен"
@@ -28,6 +29,8 @@ async def get_admin_panel_text() -> tuple[str, bool, int | None]:
         f"🤖 <b>Статус бота:</b> {bot_status}\n"
         f"💬 <b>Пост для комментариев:</b> {post_status}"
     )
+    if outbox['pending'] or outbox['failed']:
+        text += f"\n📬 <b>Очередь отправки:</b> {outbox['pending']} · не доставлено: {outbox['failed']}"
     
     return text, bot_enabled, reply_id
 
@@ -60,6 +63,7 @@ async def admin_toggle_bot(callback: types.CallbackQuery):
     current_status = await db.get_bot_enabled()
     new_status = not current_status
     await db.set_bot_enabled(new_status)
+    db.events.record(callback.from_user.id, "bot_toggled", details={"enabled": new_status})
     
     status_text = "🟢 включен" if new_status else "🔴 выключен"
     await callback.answer(f"Бот {status_text}")
@@ -0,0 +1,170 @@
+"""Bulk wish moderation - reset many wishes in one transaction."""
+import csv
+import io
+import re
+import time
+from datetime import datetime
+
+from aiogram import Router, types, F
+from aiogram.fsm.context import FSMContext
+
+from config.config import ADMIN_IDS
+from data.database import db
+from data.repositories.wishes import BulkSelection
+from utils.keyboards.inline import get_admin_bulk_confirm_menu, get_admin_cancel_button
+from apps.handlers.admin.utils import AdminState, get_ticket_word
+
+router = Router()
+
+MAX_LIST_SIZE = 10_000
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+WINDOW_PATTERN = re.compile(
+    r"^(\d{4}-\d{2}-\d{2} \d{1,2}:\d{2})\s*(?:\.\.|—|–|\s-\s)\s*(\d{4}-\d{2}-\d{2} \d{1,2}:\d{2})"
+    r"(?:\s+(\d+)\s*(m|h|d|мин|ч|д))?$"
+)
+AGE_UNITS = {"m": 60, "мин": 60, "h": 3600, "ч": 3600, "d": 86400, "д": 86400}
+USERNAME_PATTERN = re.compile(r"@?[A-Za-z0-9_]{3,32}")
+
+
+def parse_bulk_selection(text: str) -> BulkSelection | str:
+    """Parse a time window or a list of users. Returns an error text on failure."""
+    match = WINDOW_PATTERN.match(text)
+    if match:
+        try:
+            created_from = datetime.strptime(match.group(1), TIME_FORMAT)
+            created_to = datetime.strptime(match.group(2), TIME_FORMAT)
+        except ValueError:
+            return "Неверная дата или время."
+        if created_from >= created_to:
+            return "Начало окна должно быть раньше конца."
+        max_account_age = None
+        if match.group(3):
+            max_account_age = int(match.group(3)) * AGE_UNITS[match.group(4)]
+        return BulkSelection(
+            created_from=created_from.strftime("%Y-%m-%d %H:%M:%S"),
+            created_to=created_to.strftime("%Y-%m-%d %H:%M:%S"),
+            max_account_age=max_account_age,
+        )
+
+    tokens = [token for token in re.split(r"[\s,;]+", text) if token]
+    if len(tokens) > MAX_LIST_SIZE:
+        return f"Слишком длинный список (максимум {MAX_LIST_SIZE})."
+    invalid = [token for token in tokens if not token.isdecimal() and not USERNAME_PATTERN.fullmatch(token)]
+    if not tokens or invalid:
+        return f"Не распознано: {', '.join(invalid[:10])}" if invalid else "Пустой список."
+    return BulkSelection(
+        user_ids=tuple(sorted({int(token) for token in tokens if token.isdecimal()})),
+        usernames=tuple(sorted({token.lstrip("@").lower() for token in tokens if not token.isdecimal()})),
+    )
+
+
+def build_report(rows: list[dict]) -> bytes:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['User ID', 'Username', 'Referrer ID', 'Registered', 'Wish Created', 'Wish'])
+    for row in rows:
+        writer.writerow([
+            row['user_id'],
+            row['username'] or "N/A",
+            row['referrer_id'] or "",
+            row['user_created_at'],
+            row['wish_created_at'],
+            row['text'],
+        ])
+    return output.getvalue().encode('utf-8-sig')  # BOM for Excel
+
+
+def get_unmatched(selection: BulkSelection, rows: list[dict]) -> list[str]:
+    """Listed users that had no wish to reset."""
+    ids = {row['user_id'] for row in rows}
+    names = {row['username'].lower() for row in rows if row['username']}
+    return (
+        [str(user_id) for user_id in selection.user_ids if user_id not in ids]
+        + [f"@{name}" for name in selection.usernames if name not in names]
+    )
+
+
+@router.callback_query(F.data == "admin_bulk_reset", F.from_user.id.in_(ADMIN_IDS))
+async def admin_bulk_reset_start(callback: types.CallbackQuery, state: FSMContext):
+    """Start bulk wish reset."""
+    await callback.answer()
+    await callback.message.edit_text(
+        "🧹 <b>Массовое удаление пожеланий</b>\n\n"
+        "Отправьте <b>список</b> username или ID через пробел, запятую или с новой строки:\n"
+        "<code>@spam1 @spam2 123456789</code>\n\n"
+        "Или <b>окно времени</b> (UTC) и, по желанию, максимальный возраст аккаунта "
+        "в боте на момент пожелания (m/h/d):\n"
+        "<code>2025-12-20 10:00 .. 2025-12-20 12:00 30m</code>\n\n"
+        "Сначала покажу, сколько пожеланий будет удалено.",
+        parse_mode="HTML",
+        reply_markup=get_admin_cancel_button()
+    )
+    await state.set_state(AdminState.waiting_for_bulk_selection)
+
+
+@router.message(AdminState.waiting_for_bulk_selection, F.from_user.id.in_(ADMIN_IDS))
+async def process_bulk_selection(message: types.Message, state: FSMContext):
+    """Parse the selection and show a preview."""
+    selection = parse_bulk_selection((message.text or "").strip())
+    if isinstance(selection, str):
+        await message.answer(
+            f"❌ {selection}\nПопробуйте ещё раз или нажмите «Отменить».",
+            reply_markup=get_admin_cancel_button()
+        )
+        return
+
+    preview = await db.wishes.preview_bulk_reset(selection)
+    if not preview['wishes']:
+        await message.answer(
+            "🤷 Под условия не попало ни одного пожелания.\n"
+            "Попробуйте другие условия или нажмите «Отменить».",
+            reply_markup=get_admin_cancel_button()
+        )
+        return
+
+    await state.update_data(bulk_selection=selection.to_dict())
+    await state.set_state(AdminState.waiting_for_bulk_confirm)
+    await message.answer(
+        f"🧹 <b>Предпросмотр</b>\n\n"
+        f"🗑 Пожеланий будет удалено: <b>{preview['wishes']}</b> "
+        f"(−{preview['wishes']} {get_ticket_word(preview['wishes'])} у авторов)\n"
+        f"👤 Рефереров затронуто: {preview['referrers']} "
+        f"(−{preview['referrer_tickets']} {get_ticket_word(preview['referrer_tickets'])})\n\n"
+        f"Всё применится одной транзакцией, отчёт придёт файлом.",
+        parse_mode="HTML",
+        reply_markup=get_admin_bulk_confirm_menu(preview['wishes'])
+    )
+
+
+@router.callback_query(
+    F.data == "bulk_reset_confirm", AdminState.waiting_for_bulk_confirm, F.from_user.id.in_(ADMIN_IDS)
+)
+async def bulk_reset_confirm(callback: types.CallbackQuery, state: FSMContext):
+    """Apply the bulk reset and send the report."""
+    data = await state.get_data()
+    await state.clear()
+    await callback.answer("Удаляю...")
+    await callback.message.edit_reply_markup(reply_markup=None)
+
+    selection = BulkSelection.from_dict(data["bulk_selection"])
+    rows = await db.wishes.bulk_reset_wishes(selection, actor_id=callback.from_user.id)
+    referrers = {row['referrer_id'] for row in rows if row['referrer_id']}
+    referrer_tickets = sum(1 for row in rows if row['referrer_id'])
+
+    caption = (
+        f"🧹 Удалено пожеланий: {len(rows)}\n"
+        f"👤 Рефереров затронуто: {len(referrers)} "
+        f"(−{referrer_tickets} {get_ticket_word(referrer_tickets)})"
+    )
+    unmatched = get_unmatched(selection, rows)
+    if unmatched:
+        shown = ", ".join(unmatched[:10]) + (" и др." if len(unmatched) > 10 else "")
+        caption += f"\n❔ Без пожелания или не найдены ({len(unmatched)}): {shown}"
+
+    if not rows:
+        await callback.message.answer(caption)
+        return
+    report = types.BufferedInputFile(
+        build_report(rows), filename=f"bulk_reset_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+    await callback.message.answer_document(report, caption=caption[:1024])
@@ -1,17 +1,33 @@
-"""Post management handlers - set/clear reply message for comments."""
-import re
+"""Post management handlers - set/clear reply message for comments.
 
+The post is used both for wishes published to ``CHAT_ID`` and for the
+broadcast targets in that chat; ``set_post`` keeps the setting and those
+targets in step, whichever admin screen changes it.
+"""
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 
-from config.config import ADMIN_IDS
+from config.config import ADMIN_IDS, CHAT_ID
 from data.database import db
+from utils.scheduler import broadcaster
 from utils.keyboards.inline import get_admin_cancel_button, get_admin_menu
-from apps.handlers.admin.utils import AdminState
+from apps.handlers.admin.utils import AdminState, parse_message_id
 
 router = Router()
 
 
+async def set_post(message_id: int | None) -> int:
+    """Set or clear the post of ``CHAT_ID`` and its broadcast targets. Returns how many targets changed."""
+    if message_id:
+        await db.set_reply_message_id(message_id)
+    else:
+        await db.clear_reply_message_id()
+    target_ids = await db.broadcasts.set_chat_reply_to(CHAT_ID, message_id)
+    for target_id in target_ids:
+        await broadcaster.refresh(target_id)
+    return len(target_ids)
+
+
 @router.callback_query(F.data == "admin_set_post", F.from_user.id.in_(ADMIN_IDS))
 async def admin_set_post(callback: types.CallbackQuery, state: FSMContext):
     """Start post setting process."""
@@ -19,7 +35,8 @@ async def admin_set_post(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "📨 <b>Отправьте ссылку на сообщение в чате</b>\n\n"
         "Формат: https://t.me/c/XXXXXXXXXX/XXX\n\n"
-        "Это сообщение должно быть копией поста канала в группе-обсуждении.",
+        "Это сообщение должно быть копией поста канала в группе-обсуждении.\n"
+        "Новые пожелания и рассылки в этот чат будут публиковаться комментариями к нему.",
         parse_mode="HTML",
         reply_markup=get_admin_cancel_button()
     )
@@ -29,32 +46,15 @@ async def admin_set_post(callback: types.CallbackQuery, state: FSMContext):
 @router.message(AdminState.waiting_for_post_link, F.from_user.id.in_(ADMIN_IDS))
 async def process_post_link(message: types.Message, state: FSMContext):
     """Process post link."""
-    text = message.text.strip()
-    
-    message_id = None
-    
-    # Pattern 1: Private link - t.me/c/CHAT_ID/MESSAGE_ID
-    match_private = re.search(r't\.me/c/(\d+)/(\d+)', text)
-    
-    # Pattern 2: Public link - t.me/username/MESSAGE_ID
-    match_public = re.search(r't\.me/([a-zA-Z_][a-zA-Z0-9_]*)/(\d+)', text)
-    
-    if match_private:
-        message_id = int(match_private.group(2))
-    elif match_public:
-        message_id = int(match_public.group(2))
-    else:
-        # Try as plain ID
-        try:
-            message_id = int(text)
-        except ValueError:
-            pass
+    message_id = parse_message_id(message.text.strip())
     
     if message_id:
-        await db.set_reply_message_id(message_id)
+        targets = await set_post(message_id)
+        db.events.record(message.from_user.id, "post_set", details={"message_id": message_id})
         await message.answer(
             f"✅ Пост для комментариев установлен!\n"
-            f"ID сообщения: <code>{message_id}</code>",
+            f"ID сообщения: <code>{message_id}</code>\n"
+            f"Рассылок в этот чат обновлено: {targets}",
             parse_mode="HTML"
         )
         await state.clear()
@@ -69,8 +69,9 @@ async def process_post_link(message: types.Message, state: FSMContext):
 @router.callback_query(F.data == "admin_clear_post", F.from_user.id.in_(ADMIN_IDS))
 async def admin_clear_post(callback: types.CallbackQuery):
     """Clear post binding."""
-    await db.clear_reply_message_id()
-    await callback.answer("✅ Привязка к посту удалена")
+    await set_post(None)
+    db.events.record(callback.from_user.id, "post_cleared")
+    await callback.answer("✅ Привязка к посту удалена, рассылки в чат публикуются без неё")
     
     # Update menu
     from apps.handlers.admin.menu import get_admin_panel_text
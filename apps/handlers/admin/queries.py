@@ -0,0 +1,49 @@
+"""Query diagnostics - slowest SQL statements since startup."""
+import html
+
+from aiogram import Router, types, F
+from aiogram.filters import Command, CommandObject
+from aiogram.enums import ChatType
+
+from config.config import ADMIN_IDS
+from data.query_log import query_log
+
+router = Router()
+
+DEFAULT_TOP = 10
+MAX_TOP = 30
+MESSAGE_LIMIT = 4000
+
+
+@router.message(Command("slowsql"), F.from_user.id.in_(ADMIN_IDS), F.chat.type == ChatType.PRIVATE)
+async def cmd_slowsql(message: types.Message, command: CommandObject):
+    """Show top-N slowest statements: /slowsql [N]."""
+    try:
+        limit = max(1, min(int(command.args), MAX_TOP)) if command.args else DEFAULT_TOP
+    except ValueError:
+        limit = DEFAULT_TOP
+    
+    statements = query_log.top(limit)
+    if not statements:
+        await message.answer("📭 Запросов пока не было.")
+        return
+    
+    # Whole entries only: a cut inside a tag or an entity breaks the HTML
+    header = "🐢 <b>Самые медленные запросы (топ {}):</b>\n"
+    entries = []
+    length = len(header.format(MAX_TOP))
+    for i, stats in enumerate(statements, 1):
+        flag = " ⚠️" if stats.flagged else ""
+        sql = stats.sql if len(stats.sql) <= 200 else f"{stats.sql[:200]}..."
+        entry = (
+            f"{i}. max <b>{stats.max * 1000:.1f}</b> ms · avg {stats.avg * 1000:.1f} ms · "
+            f"×{stats.count} · медленных {stats.slow}{flag}\n"
+            f"<code>{html.escape(sql)}</code>"
+        )
+        if stats.plan:
+            entry += f"\n<i>{html.escape('; '.join(stats.plan))}</i>"
+        length += len(entry) + 1
+        if length > MESSAGE_LIMIT:
+            break
+        entries.append(entry)
+    await message.answer("\n".join([header.format(len(entries)), *entries]), parse_mode="HTML")
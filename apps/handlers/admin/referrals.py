@@ -0,0 +1,128 @@
+"""Referral fraud report - referrers flagged by the referral graph analysis."""
+import csv
+import html
+import io
+import json
+from datetime import datetime
+
+from aiogram import Router, types, F
+
+from config.config import ADMIN_IDS
+from data.database import db
+from utils.keyboards.inline import get_admin_fraud_menu
+from utils.referral_graph import BURST_WINDOW, run_referral_analysis
+from utils.scheduler import TIMEZONE
+
+router = Router()
+
+TOP_SIZE = 15
+MESSAGE_LIMIT = 4000
+
+REASON_LABELS = {
+    "cycle": "кольцо рефералов",
+    "burst": "всплеск приглашений",
+    "quick_wishes": "быстрые пожелания",
+    "shared_signals": "похожие рефералы",
+    "linked_referrers": "связан с другими",
+    "chain": "цепочка",
+}
+
+
+def format_referrer(row: dict) -> str:
+    author = f"@{row['username']}" if row['username'] else f"ID: {row['user_id']}"
+    details = [
+        f"{row['referrals']} реф. ({row['wished_referrals']} с пожеланием)",
+        f"всплеск {row['max_burst']}/{BURST_WINDOW // 60} мин",
+        f"быстрых {row['quick_share']:.0%}",
+    ]
+    if row['subtree_size'] > row['referrals']:
+        details.append(f"в дереве {row['subtree_size']}")
+    if row['cluster_size'] > 1:
+        details.append(f"кластер из {row['cluster_size']}")
+    reasons = " · ".join(REASON_LABELS[reason] for reason in row['reasons'])
+    return (
+        f"{html.escape(author)} (<code>{row['user_id']}</code>) — <b>{row['score']:g}</b>\n"
+        f"    {', '.join(details)}\n"
+        f"    <i>{reasons}</i>"
+    )
+
+
+async def get_report_text() -> str:
+    summary = await db.get_setting("referral_analysis")
+    if not summary:
+        return "🕵️ <b>Подозрительные рефереры</b>\n\nАнализ ещё не запускался."
+    summary = json.loads(summary)
+    analyzed_at = datetime.fromtimestamp(summary['at'], TIMEZONE).strftime("%d.%m %H:%M")
+    lines = [
+        "🕵️ <b>Подозрительные рефереры</b>\n",
+        f"Анализ {analyzed_at}: <b>{summary['flagged']}</b> из {summary['users']} пользователей "
+        f"(загрузка {summary['load_seconds']:.1f} с, расчёт {summary['analyze_seconds']:.1f} с)\n",
+    ]
+    length = sum(len(line) for line in lines)
+    for place, row in enumerate(await db.referrals.get_suspicious(TOP_SIZE), 1):
+        line = f"{place}. {format_referrer(row)}"
+        length += len(line) + 1
+        if length > MESSAGE_LIMIT:
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@router.callback_query(F.data == "admin_fraud", F.from_user.id.in_(ADMIN_IDS))
+async def admin_fraud(callback: types.CallbackQuery):
+    """Show the top flagged referrers of the last analysis."""
+    await callback.answer()
+    await callback.message.edit_text(
+        await get_report_text(),
+        parse_mode="HTML",
+        reply_markup=get_admin_fraud_menu()
+    )
+
+
+@router.callback_query(F.data == "admin_fraud_run", F.from_user.id.in_(ADMIN_IDS))
+async def admin_fraud_run(callback: types.CallbackQuery):
+    """Run the referral analysis now."""
+    await callback.answer("⏳ Анализ запущен...")
+    await run_referral_analysis()
+    await callback.message.edit_text(
+        await get_report_text(),
+        parse_mode="HTML",
+        reply_markup=get_admin_fraud_menu()
+    )
+
+
+@router.callback_query(F.data == "admin_fraud_csv", F.from_user.id.in_(ADMIN_IDS))
+async def admin_fraud_csv(callback: types.CallbackQuery):
+    """Send all flagged referrers as CSV."""
+    rows = await db.referrals.get_suspicious()
+    if not rows:
+        await callback.answer("Подозрительных рефереров нет", show_alert=True)
+        return
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['User ID', 'Username', 'Score', 'Referrals', 'Wished Referrals', 'Subtree Size',
+                     'Depth', 'Max Burst', 'Quick Wish Share', 'Shared Signal Share', 'Cluster ID',
+                     'Cluster Size', 'Reasons'])
+    for row in rows:
+        writer.writerow([
+            row['user_id'],
+            row['username'] or "N/A",
+            row['score'],
+            row['referrals'],
+            row['wished_referrals'],
+            row['subtree_size'],
+            row['depth'],
+            row['max_burst'],
+            f"{row['quick_share']:.2f}",
+            f"{row['signal_share']:.2f}",
+            row['cluster_id'] or "",
+            row['cluster_size'],
+            ", ".join(row['reasons']),
+        ])
+
+    await callback.answer()
+    await callback.message.answer_document(
+        types.BufferedInputFile(output.getvalue().encode('utf-8-sig'), filename="suspicious_referrers.csv"),
+        caption=f"🕵️ Подозрительных рефереров: {len(rows)}"
+    )
@@ -0,0 +1,41 @@
+"""User search - username autocomplete for admins in inline mode.
+
+Typing ``@bot user:ali`` in any chat lists users whose username starts
+with ``ali``; choosing one sends ``@username``, which the username prompts
+(ticket grant, wish reset) accept as is. Inline mode has to be enabled for
+the bot in @BotFather.
+"""
+from aiogram import Router, types, F
+
+from config.config import ADMIN_IDS
+from data.database import db
+from apps.handlers.admin.utils import get_ticket_word
+
+router = Router()
+
+QUERY_PREFIX = "user:"
+# Telegram shows at most 50 results per answer
+RESULT_LIMIT = 20
+# Client-side cache of an answer; short, since ticket counts change
+ANSWER_CACHE_TIME = 5
+
+
+@router.inline_query(F.from_user.id.in_(ADMIN_IDS), F.query.startswith(QUERY_PREFIX))
+async def inline_user_search(inline_query: types.InlineQuery):
+    """Suggest users by username prefix."""
+    prefix = inline_query.query[len(QUERY_PREFIX):]
+    users = await db.users.search_by_username_prefix(prefix, RESULT_LIMIT)
+    results = [
+        types.InlineQueryResultArticle(
+            id=str(user['user_id']),
+            title=f"@{user['username']}",
+            description=(
+                f"🎫 {user['tickets']} {get_ticket_word(user['tickets'])} · "
+                f"{'✨ есть пожелание' if user['has_wished'] else 'без пожелания'} · "
+                f"👥 {user['referrals']} · ID {user['user_id']}"
+            ),
+            input_message_content=types.InputTextMessageContent(message_text=f"@{user['username']}")
+        )
+        for user in users
+    ]
+    await inline_query.answer(results, cache_time=ANSWER_CACHE_TIME, is_personal=True)
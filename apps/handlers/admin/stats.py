@@ -0,0 +1,113 @@
+"""Campaign analytics - hourly charts and CSV from the rollup table."""
+import asyncio
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+from aiogram import Router, types, F
+from aiogram.types import InputMediaPhoto
+
+from config.config import ADMIN_IDS
+from data.database import db
+from data.repositories.stats import HOUR_FORMAT, HOURLY_COLUMNS
+from utils.charts import render_series
+from utils.keyboards.inline import get_admin_stats_menu
+from utils.scheduler import TIMEZONE
+
+router = Router()
+
+DEFAULT_HOURS = 7 * 24
+PERIODS = {24: "24 ч", 7 * 24: "7 дней", 30 * 24: "30 дней"}
+SERIES = {
+    "signups": ("🟦 Регистрации", (59, 130, 246)),
+    "wishes": ("🟩 Пожелания", (34, 197, 94)),
+    "referral_conversions": ("🟧 Приглашённые с пожеланием", (249, 115, 22)),
+    "tickets_granted": ("🟪 Билеты", (168, 85, 247)),
+}
+
+
+async def load_series(hours: int) -> tuple[list[datetime], dict[str, list[int]]]:
+    """Zero-filled hourly series for the last ``hours`` hours, oldest first."""
+    until = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    since = until - timedelta(hours=hours)
+    rows = {
+        row['hour']: row
+        for row in await db.stats.get_hourly_stats(since.strftime(HOUR_FORMAT), until.strftime(HOUR_FORMAT))
+    }
+    slots = [since + timedelta(hours=offset) for offset in range(hours)]
+    series = {column: [] for column in HOURLY_COLUMNS}
+    for slot in slots:
+        row = rows.get(slot.strftime(HOUR_FORMAT))
+        for column in HOURLY_COLUMNS:
+            series[column].append(row[column] if row else 0)
+    return slots, series
+
+
+def get_caption(hours: int, series: dict[str, list[int]]) -> str:
+    lines = [f"📈 <b>Статистика за {PERIODS[hours]}</b> (по часам)\n"]
+    for column, (label, _) in SERIES.items():
+        values = series[column]
+        lines.append(f"{label}: <b>{sum(values)}</b> (пик {max(values, default=0)}/ч)")
+    return "\n".join(lines)
+
+
+async def render_chart(hours: int) -> tuple[bytes, str]:
+    slots, series = await load_series(hours)
+    # Vertical lines at local midnight
+    day_starts = [index for index, slot in enumerate(slots) if slot.astimezone(TIMEZONE).hour == 0]
+    panels = [(series[column], color) for column, (_, color) in SERIES.items()]
+    png = await asyncio.to_thread(render_series, panels, day_starts)
+    return png, get_caption(hours, series)
+
+
+def get_hours(callback: types.CallbackQuery) -> int:
+    hours = int(callback.data.split(":")[1])
+    return hours if hours in PERIODS else DEFAULT_HOURS
+
+
+@router.callback_query(F.data == "admin_stats", F.from_user.id.in_(ADMIN_IDS))
+async def admin_stats(callback: types.CallbackQuery):
+    """Send the chart for the last week."""
+    await callback.answer()
+    png, caption = await render_chart(DEFAULT_HOURS)
+    await callback.message.answer_photo(
+        types.BufferedInputFile(png, filename="stats.png"),
+        caption=caption,
+        parse_mode="HTML",
+        reply_markup=get_admin_stats_menu(DEFAULT_HOURS)
+    )
+
+
+@router.callback_query(F.data.startswith("stats_period:"), F.from_user.id.in_(ADMIN_IDS))
+async def stats_period(callback: types.CallbackQuery):
+    """Redraw the chart for another period."""
+    hours = get_hours(callback)
+    await callback.answer()
+    png, caption = await render_chart(hours)
+    await callback.message.edit_media(
+        InputMediaPhoto(
+            media=types.BufferedInputFile(png, filename="stats.png"),
+            caption=caption,
+            parse_mode="HTML"
+        ),
+        reply_markup=get_admin_stats_menu(hours)
+    )
+
+
+@router.callback_query(F.data.startswith("stats_csv:"), F.from_user.id.in_(ADMIN_IDS))
+async def stats_csv(callback: types.CallbackQuery):
+    """Send the hourly series of the period as CSV."""
+    hours = get_hours(callback)
+    slots, series = await load_series(hours)
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Hour (UTC)', 'Signups', 'Wishes', 'Referral Conversions', 'Tickets Granted'])
+    for index, slot in enumerate(slots):
+        writer.writerow([slot.strftime("%Y-%m-%d %H:%M")] + [series[column][index] for column in HOURLY_COLUMNS])
+
+    await callback.answer()
+    await callback.message.answer_document(
+        types.BufferedInputFile(output.getvalue().encode('utf-8-sig'), filename=f"hourly_stats_{hours}h.csv"),
+        caption=f"📈 Почасовая статистика за {PERIODS[hours]}"
+    )
@@ -5,7 +5,8 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from config.config import ADMIN_IDS
 from data.database import db
-from utils.keyboards.inline import get_admin_cancel_button
+from utils.keyboards.inline import get_admin_cancel_button, get_admin_user_search
+from utils.outbox import outbox
 from apps.handlers.admin.utils import AdminState, get_ticket_word
 
 router = Router()
@@ -19,6 +20,20 @@ def get_skip_message_button() -> InlineKeyboardMarkup:
     ])
 
 
+@outbox.renderer("tickets_granted")
+async def render_tickets_granted(payload: dict) -> dict:
+    """Notification for a user who was given tickets."""
+    count, total = payload['count'], payload['total']
+    text = (
+        f"🎉 <b>Поздравляем!</b>\n\n"
+        f"✨ Вы получили <b>{count}</b> дополнительн{'ый' if count == 1 else 'ых'} {get_ticket_word(count)}!\n"
+        f"🎫 Теперь у вас: <b>{total}</b> {get_ticket_word(total)}"
+    )
+    if payload['comment']:
+        text += f"\n\n💬 <i>{payload['comment']}</i>"
+    return {"text": text, "parse_mode": "HTML"}
+
+
 @router.callback_query(F.data == "admin_give_tickets", F.from_user.id.in_(ADMIN_IDS))
 async def admin_give_tickets_start(callback: types.CallbackQuery, state: FSMContext):
     """Start ticket giving process."""
@@ -28,7 +43,7 @@ async def admin_give_tickets_start(callback: types.CallbackQuery, state: FSMCont
         "👤 Введите username пользователя:\n\n"
         "<i>Можно с @ или без. Пример: @username или username</i>",
         parse_mode="HTML",
-        reply_markup=get_admin_cancel_button()
+        reply_markup=get_admin_user_search()
     )
     await state.set_state(AdminState.waiting_for_username_to_give_tickets)
 
@@ -45,7 +60,7 @@ async def process_username_for_tickets(message: types.Message, state: FSMContext
             f"❌ Пользователь <code>{username}</code> не найден.\n"
             "Попробуйте ещё раз или нажмите «Отменить».",
             parse_mode="HTML",
-            reply_markup=get_admin_cancel_button()
+            reply_markup=get_admin_user_search()
         )
         return
     
@@ -93,26 +108,28 @@ async def process_ticket_count(message: types.Message, state: FSMContext):
 
 
 @router.callback_query(F.data == "admin_skip_ticket_message", F.from_user.id.in_(ADMIN_IDS))
-async def skip_ticket_message(callback: types.CallbackQuery, state: FSMContext, bot):
+async def skip_ticket_message(callback: types.CallbackQuery, state: FSMContext):
     """Skip message and give tickets."""
     await callback.answer()
-    await _give_tickets_and_notify(callback.message, state, bot, custom_message=None)
+    await _give_tickets_and_notify(callback.message, state, custom_message=None, admin_id=callback.from_user.id)
 
 
 @router.message(AdminState.waiting_for_ticket_message, F.from_user.id.in_(ADMIN_IDS))
-async def process_ticket_message(message: types.Message, state: FSMContext, bot):
+async def process_ticket_message(message: types.Message, state: FSMContext):
     """Process message and give tickets."""
     custom_message = message.text.strip() if message.text else None
-    await _give_tickets_and_notify(message, state, bot, custom_message=custom_message)
+    await _give_tickets_and_notify(
+        message, state, custom_message=custom_message, admin_id=message.from_user.id
+    )
 
 
 async def _give_tickets_and_notify(
     message_ctx: types.Message, 
     state: FSMContext, 
-    bot,
-    custom_message: str | None
+    custom_message: str | None,
+    admin_id: int
 ):
-    """Give tickets and send notification to user."""
+    """Give tickets and queue the notification to the user."""
     data = await state.get_data()
     user_id = data.get('target_user_id')
     username = data.get('target_username', 'N/A')
@@ -123,44 +140,26 @@ async def _give_tickets_and_notify(
         await state.clear()
         return
     
-    # Give tickets
-    new_total = await db.add_tickets_to_user(user_id, count)
+    # Give tickets; the notification is queued in the same transaction and
+    # keyed by the admin's message, so a repeated update notifies once
+    new_total = await db.add_tickets_to_user(
+        user_id, count, actor_id=admin_id,
+        notify_key=f"{message_ctx.chat.id}:{message_ctx.message_id}", comment=custom_message
+    )
     
     if new_total is None:
         await message_ctx.answer("❌ Ошибка: пользователь не найден.")
         await state.clear()
         return
     
-    # Build user notification
-    ticket_word = get_ticket_word(count)
-    
-    user_notification = (
-        f"🎉 <b>Поздравляем!</b>\n\n"
-        f"✨ Вы получили <b>{count}</b> дополнительн{'ый' if count == 1 else 'ых'} {ticket_word}!\n"
-        f"🎫 Теперь у вас: <b>{new_total}</b> {get_ticket_word(new_total)}"
-    )
-    
-    if custom_message:
-        user_notification += f"\n\n💬 <i>{custom_message}</i>"
-    
-    # Send notification to user
-    notification_sent = False
-    try:
-        await bot.send_message(user_id, user_notification, parse_mode="HTML")
-        notification_sent = True
-    except Exception:
-        pass  # User may have blocked the bot
-    
     # Admin report
-    notification_status = "✅ отправлено" if notification_sent else "❌ не доставлено (возможно, бот заблокирован)"
-    
     admin_report = (
         f"✅ <b>Билеты выданы!</b>\n\n"
         f"👤 Пользователь: @{username}\n"
         f"🆔 ID: <code>{user_id}</code>\n"
         f"🎫 Выдано билетов: <b>+{count}</b>\n"
         f"📊 Всего билетов: <b>{new_total}</b>\n"
-        f"📬 Уведомление: {notification_status}"
+        f"📬 Уведомление: поставлено в очередь на отправку"
     )
     
     if custom_message:
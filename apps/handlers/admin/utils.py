@@ -1,4 +1,6 @@
 """Shared utilities for admin handlers."""
+import re
+
 from aiogram.fsm.state import State, StatesGroup
 
 from config.config import ADMIN_IDS
@@ -11,6 +13,10 @@ class AdminState(StatesGroup):
     waiting_for_username_to_give_tickets = State()
     waiting_for_ticket_count = State()
     waiting_for_ticket_message = State()
+    waiting_for_broadcast_chat = State()
+    waiting_for_broadcast_value = State()
+    waiting_for_bulk_selection = State()
+    waiting_for_bulk_confirm = State()
 
 
 def is_admin(user_id: int) -> bool:
@@ -29,3 +35,22 @@ def get_ticket_word(count: int) -> str:
         return "билета"
     else:
         return "билетов"
+
+
+def parse_message_id(text: str) -> int | None:
+    """Extract a message ID from a post link or a plain ID."""
+    # Pattern 1: Private link - t.me/c/CHAT_ID/MESSAGE_ID
+    match_private = re.search(r't\.me/c/(\d+)/(\d+)', text)
+    
+    # Pattern 2: Public link - t.me/username/MESSAGE_ID
+    match_public = re.search(r't\.me/([a-zA-Z_][a-zA-Z0-9_]*)/(\d+)', text)
+    
+    if match_private:
+        return int(match_private.group(2))
+    if match_public:
+        return int(match_public.group(2))
+    # Try as plain ID
+    try:
+        return int(text)
+    except ValueError:
+        return None
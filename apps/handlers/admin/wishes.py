@@ -8,7 +8,7 @@ from aiogram.enums import ChatType
 
 from config.config import ADMIN_IDS
 from data.database import db
-from utils.keyboards.inline import get_admin_cancel_button
+from utils.keyboards.inline import get_admin_cancel_button, get_admin_user_search
 from apps.handlers.admin.utils import AdminState
 
 router = Router()
@@ -23,7 +23,7 @@ async def admin_reset_wish_start(callback: types.CallbackQuery, state: FSMContex
         "Можно с @ или без. Пример: <code>@username</code> или <code>username</code>\n\n"
         "Пожелание будет удалено, билеты изъяты.",
         parse_mode="HTML",
-        reply_markup=get_admin_cancel_button()
+        reply_markup=get_admin_user_search()
     )
     await state.set_state(AdminState.waiting_for_username_to_reset)
 
@@ -40,7 +40,7 @@ async def process_username_to_reset(message: types.Message, state: FSMContext):
             f"❌ Пользователь <code>{username}</code> не найден.\n"
             "Попробуйте ещё раз или нажмите «Отменить».",
             parse_mode="HTML",
-            reply_markup=get_admin_cancel_button()
+            reply_markup=get_admin_user_search()
         )
         return
     
@@ -53,7 +53,7 @@ async def process_username_to_reset(message: types.Message, state: FSMContext):
         )
         return
     
-    success = await db.reset_wish(user['user_id'])
+    success = await db.reset_wish(user['user_id'], actor_id=message.from_user.id)
     
     if success:
         username_display = f"@{user['username']}" if user['username'] else f"ID: {user['user_id']}"
@@ -115,7 +115,7 @@ async def handle_forwarded_wish(message: types.Message):
         return
     
     user = await db.get_user(wish['user_id'])
-    success = await db.reset_wish(wish['user_id'])
+    success = await db.reset_wish(wish['user_id'], actor_id=message.from_user.id)
     
     if success:
         username_display = f"@{user['username']}" if user and user['username'] else f"ID: {wish['user_id']}"
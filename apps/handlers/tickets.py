@@ -1,13 +1,16 @@
 from aiogram import Router, types, F
-from aiogram.types import FSInputFile
 from aiogram.utils.deep_linking import create_start_link
 
-from config.config import TICKETS_IMAGE
 from data.database import db
-from utils.keyboards.inline import get_back_button
+from utils.card_renderer import card_renderer
+from utils.messages import M
+from utils.navigation import show_screen
+from utils.screens import screens
 
 router = Router()
 
+LEADERBOARD_SIZE = 10
+
 
 @router.callback_query(F.data == "my_tickets")
 async def show_tickets(callback: types.CallbackQuery):
@@ -15,33 +18,29 @@ async def show_tickets(callback: types.CallbackQuery):
     user = await db.get_user(callback.from_user.id)
     
     if not user:
-        await callback.answer("Ошибка: пользователь не найден.", show_alert=True)
+        await callback.answer(M.USER_NOT_FOUND, show_alert=True)
         return
 
     total_referrals = await db.get_total_referrals(callback.from_user.id)
     active_referrals = await db.get_referral_count(callback.from_user.id)
+    rank = await db.leaderboard.get_rank(callback.from_user.id)
     link = await create_start_link(callback.bot, str(callback.from_user.id), encode=True)
+    card = await card_renderer.get(callback.from_user.id, user['tickets'], total_referrals, active_referrals, link)
     
-    text = (
-        f"🎫 <b>Ваши билеты:</b> {user['tickets']}\n"
-        f"👥 <b>Приглашено друзей:</b> {total_referrals} ({active_referrals} оставили пожелание)\n\n"
-        f"🔗 <b>Ваша реферальная ссылка:</b>\n<code>{link}</code>\n\n"
-        "Отправьте её друзьям! За каждого приглашённого друга, "
-        "который оставит пожелание, вы получите +1 билет 🎁"
+    await show_screen(
+        callback, screens.tickets(user['tickets'], total_referrals, active_referrals, link, rank, card)
     )
+
+
+@router.callback_query(F.data == "leaderboard")
+async def show_leaderboard(callback: types.CallbackQuery):
+    """Показать лидеров по билетам и приглашённым друзьям."""
+    rank = await db.leaderboard.get_rank(callback.from_user.id)
     
-    try:
-        await callback.message.delete()
-    except Exception:
-        pass
+    if not rank:
+        await callback.answer(M.USER_NOT_FOUND, show_alert=True)
+        return
     
-    if TICKETS_IMAGE.exists():
-        photo = FSInputFile(TICKETS_IMAGE)
-        await callback.message.answer_photo(
-            photo,
-            caption=text,
-            parse_mode="HTML",
-            reply_markup=get_back_button()
-        )
-    else:
-        await callback.message.answer(text, parse_mode="HTML", reply_markup=get_back_button())
+    tickets_top = await db.leaderboard.get_top("tickets", LEADERBOARD_SIZE)
+    referrals_top = await db.leaderboard.get_top("referrals", LEADERBOARD_SIZE)
+    await show_screen(callback, screens.leaderboard(LEADERBOARD_SIZE, tickets_top, referrals_top, rank))
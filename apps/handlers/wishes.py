@@ -2,12 +2,16 @@ import logging
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import FSInputFile
 
-from config.config import CONGRAT_IMAGE, CHAT_ID
+from config.config import CHAT_ID
 from data.database import db
 from utils.keyboards.inline import get_back_button
-from utils.subscription import check_subscription, get_subscription_keyboard, get_subscription_text
+from utils.messages import M
+from utils.blocklist import blocklist
+from utils.navigation import show_screen, send_screen, spawn
+from utils.outbox import outbox
+from utils.screens import screens
+from utils.subscription import check_subscription
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -25,101 +29,70 @@ async def start_wish(callback: types.CallbackQuery, state: FSMContext):
     sub_status = await check_subscription(callback.bot, callback.from_user.id)
     
     if not sub_status["all_ok"]:
-        await callback.answer("❌ Сначала подпишитесь на каналы!", show_alert=True)
-        
-        try:
-            await callback.message.delete()
-        except Exception:
-            pass
-        
-        await callback.message.answer(
-            get_subscription_text(sub_status),
-            parse_mode="HTML",
-            reply_markup=get_subscription_keyboard(sub_status)
-        )
+        await callback.answer(M.SUBSCRIBE_FIRST, show_alert=True)
+        await show_screen(callback, screens.subscription(sub_status))
         return
     
     user = await db.get_user(callback.from_user.id)
     
     if user and user['has_wished']:
         wish = await db.get_user_wish(callback.from_user.id)
-        text = (
-            f"✨ <b>Ваше пожелание:</b>\n<i>{wish['text']}</i>\n\n"
-            "Вы уже оставили пожелание и получили билет! 🎫"
-        )
-        
-        try:
-            await callback.message.delete()
-        except Exception:
-            pass
-        
-        await callback.message.answer(text, parse_mode="HTML", reply_markup=get_back_button())
+        await show_screen(callback, screens.wish_exists(wish['text']))
         return
 
-    text = (
-        "📝 <b>Введите ваше новогоднее пожелание:</b>\n\n"
-        "Оно будет сохранено, и вы получите 1 билет на розыгрыш! 🎫"
-    )
-    
-    try:
-        await callback.message.delete()
-    except Exception:
-        pass
-    
-    await callback.message.answer(text, parse_mode="HTML", reply_markup=get_back_button())
+    if await db.moderation.get_user_held_wish(callback.from_user.id):
+        await show_screen(callback, screens.wish_held)
+        return
+
+    await show_screen(callback, screens.wish_prompt)
     await state.set_state(WishState.waiting_for_wish)
 
 
+async def get_publish_chat() -> int | None:
+    """Чат для публикации новых пожеланий (None, если бот выключен)."""
+    if not CHAT_ID or not await db.get_bot_enabled():
+        return None
+    return CHAT_ID
+
+
+@outbox.renderer("wish_post")
+async def render_wish_post(payload: dict) -> dict:
+    """Пост с пожеланием для чата (ответом на закреплённое сообщение, если оно задано)."""
+    username = f"@{payload['username']}" if payload['username'] else f"ID: {payload['user_id']}"
+    return {
+        "text": M.WISH_POST.format(username=username, wish_text=payload['text']),
+        "parse_mode": "HTML",
+        "reply_to_message_id": await db.get_reply_message_id(),
+    }
+
+
 @router.message(WishState.waiting_for_wish)
 async def process_wish(message: types.Message, state: FSMContext):
     """Обработка полученного пожелания."""
     if not message.text:
-        await message.answer("❌ Пожалуйста, пришлите текстовое пожелание.")
+        await message.answer(M.WISH_TEXT_REQUIRED)
+        return
+
+    # Пожелания со словами из стоп-листа не публикуются до проверки админом
+    matches = blocklist.match(message.text)
+    if matches:
+        from apps.handlers.admin.blocklist import notify_admins_about_held_wish
+        
+        held_id = await db.moderation.hold_wish(message.from_user.id, message.text, matches)
+        if held_id:
+            logger.info("Пожелание от %s отправлено на модерацию: %s", message.from_user.id, matches)
+            spawn(notify_admins_about_held_wish(message.bot, held_id))
+        await send_screen(message, screens.wish_held)
+        await state.clear()
         return
 
-    success = await db.add_wish(message.from_user.id, message.text)
+    # Пост в чат ставится в очередь вместе с пожеланием и уходит в фоне
+    success = await db.add_wish(message.from_user.id, message.text, publish_to=await get_publish_chat())
     
     if success:
-        # Публикуем пожелание в чат немедленно (если бот включен)
-        bot_enabled = await db.get_bot_enabled()
-        if CHAT_ID and bot_enabled:
-            username = f"@{message.from_user.username}" if message.from_user.username else f"ID: {message.from_user.id}"
-            wish_text = (
-                f"🎄 Новогоднее пожелание от {username}:\n"
-                f"<blockquote>{message.text}</blockquote>"
-            )
-            reply_to = await db.get_reply_message_id()
-            try:
-                await message.bot.send_message(
-                    CHAT_ID, 
-                    wish_text, 
-                    parse_mode="HTML",
-                    reply_to_message_id=reply_to
-                )
-                logger.info(f"Пожелание от {username} опубликовано в чат")
-            except Exception as e:
-                logger.error(f"Ошибка публикации пожелания в чат: {e}")
-        
-        congrat_text = (
-            "🎄 <b>Твоё пожелание сохранено!</b>\n\n"
-            "Ты получил +1 билет 🎫\n"
-            "Приглашай друзей, чтобы увеличить свои шансы!"
-        )
-        
-        if CONGRAT_IMAGE.exists():
-            photo = FSInputFile(CONGRAT_IMAGE)
-            await message.answer_photo(
-                photo,
-                caption=congrat_text,
-                parse_mode="HTML",
-                reply_markup=get_back_button()
-            )
-        else:
-            await message.answer(congrat_text, parse_mode="HTML", reply_markup=get_back_button())
+        logger.info("Пожелание от %s сохранено", message.from_user.id)
+        await send_screen(message, screens.wish_saved)
     else:
-        await message.answer(
-            "❌ Произошла ошибка или вы уже оставляли пожелание.",
-            reply_markup=get_back_button()
-        )
+        await message.answer(M.WISH_ERROR, reply_markup=get_back_button())
     
     await state.clear()
@@ -0,0 +1,4 @@
+"""Repository microbenchmarks across database sizes.
+
+Run with ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,59 @@
+"""Command-line entry point for repository benchmarks."""
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.repositories import build_cases, Pools
+from benchmarks.runner import compare, load_json, run, save_json, uncovered_methods
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark repository methods across database sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="user counts (default: 10000 100000 1000000)")
+    parser.add_argument("--iterations", type=int, default=200, help="operations per method (default: 200)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="run only methods whose name contains this string")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"), help="results JSON file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed p50 regression before failing (default: 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as the new baseline")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    missing = uncovered_methods(build_cases(Pools(0, [], [])))
+    if missing:
+        print(f"warning: no benchmark for {', '.join(missing)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        document = run(args.sizes, args.iterations, args.seed, Path(tmp), args.only)
+    save_json(args.output, document)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        save_json(args.baseline, document)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if args.baseline.exists():
+        regressions = compare(document, load_json(args.baseline), args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""Synthetic campaign data generator.
+
+Builds a ``bot.db`` with a realistic shape:
+
+- signups spread over the campaign with a growing daily rate;
+- referral trees grown by preferential attachment, so referral fan-out
+  follows a power law (a few referrers bring hundreds of users);
+- a configurable share of users with wishes of log-normal length,
+  mostly Cyrillic with emoji and some Latin text;
+- ticket balances consistent with wishes and referrals, plus rare
+  heavy-tailed admin grants;
+- the usual settings rows and one broadcast target;
+- hourly rollups rebuilt from the generated users and wishes;
+- an audit log that starts with a balance snapshot of every user;
+- an empty near-duplicate index, as in a database from before it existed,
+  so the backfill can be measured.
+
+Rows are bulk-inserted in large transactions with journaling disabled.
+The same seed always produces the same database.
+
+Usage: ``python -m benchmarks.datagen --users 1000000 --output bot.db``
+"""
+import argparse
+import asyncio
+import math
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BATCH_SIZE = 100_000
+CAMPAIGN_DAYS = 30
+NO_USERNAME_SHARE = 0.15
+GRANT_SHARE = 0.01
+
+WORDS = (
+    "счастья здоровья любви удачи тепла мира добра радости успехов света "
+    "новом году пусть желаю всем вам чтобы сбылись мечты семье близким друзьям "
+    "года праздника чудес улыбок благополучия вдохновения гармонии уюта "
+    "исполнения желаний ярких впечатлений путешествий побед новых свершений"
+).split()
+LATIN_WORDS = "happy new year peace love joy health wishes to everyone".split()
+EMOJI = ["🎄", "✨", "🎁", "🎅", "❄️", "🥂", "🎉", "❤️", "⭐", "☃️", "🍊", "🔥"]
+NAME_PARTS = ["alex", "maria", "ivan", "olga", "dima", "kate", "max", "anna", "sergey", "nika",
+              "crypto", "ton", "dev", "pro", "msk", "spb", "official", "real"]
+
+
+def _username(rng: random.Random, user_id: int) -> str | None:
+    if rng.random() < NO_USERNAME_SHARE:
+        return None
+    first, second = rng.choice(NAME_PARTS), rng.choice(NAME_PARTS)
+    style = rng.random()
+    if style < 0.4:
+        name = f"{first}_{second}"
+    elif style < 0.7:
+        name = f"{first.capitalize()}{second.capitalize()}"
+    else:
+        name = f"{first}{rng.randint(1, 9999)}"
+    # Keep usernames unique like real Telegram usernames
+    return f"{name}_{user_id:x}"
+
+
+def _wish_text(rng: random.Random) -> str:
+    length = min(max(int(rng.lognormvariate(math.log(60), 0.6)), 5), 1000)
+    words = LATIN_WORDS if rng.random() < 0.08 else WORDS
+    parts = []
+    size = 0
+    while size < length:
+        if rng.random() < 0.12:
+            token = rng.choice(EMOJI)
+        else:
+            token = rng.choice(words)
+        parts.append(token)
+        size += len(token) + 1
+    text = " ".join(parts)
+    return text[0].upper() + text[1:] + (rng.choice(EMOJI) if rng.random() < 0.5 else "!")
+
+
+def _signup_times(rng: random.Random, count: int, start: datetime) -> list[str]:
+    # Signups accelerate towards New Year: density grows linearly over the campaign
+    span = CAMPAIGN_DAYS * 86400
+    offsets = sorted(span * math.sqrt(rng.random()) for _ in range(count))
+    return [(start + timedelta(seconds=offset)).strftime("%Y-%m-%d %H:%M:%S") for offset in offsets]
+
+
+async def _run_and_close(database, *steps) -> None:
+    """Run database coroutines in order, then close the pooled connections."""
+    try:
+        for step in steps:
+            await step()
+    finally:
+        await database.close()
+
+
+def generate(path: Path, users: int, wish_share: float = 0.6, referral_share: float = 0.45,
+             seed: int = 0) -> dict:
+    """Generate a database at ``path``. Returns summary counts."""
+    from data.database import Database
+    from data.repositories.users import normalize_username
+
+    rng = random.Random(seed)
+    path.unlink(missing_ok=True)
+    database = Database(str(path))
+    asyncio.run(_run_and_close(database, database.init))
+
+    start = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    created = _signup_times(rng, users, start)
+
+    referrers = [0] * (users + 1)
+    wished = bytearray(users + 1)
+    tickets = [0] * (users + 1)
+    referrals = [0] * (users + 1)
+    # Each user appears once, plus once per referral: uniform picks = preferential attachment
+    attachment: list[int] = []
+
+    for user_id in range(1, users + 1):
+        if attachment and rng.random() < referral_share:
+            referrers[user_id] = rng.choice(attachment)
+            attachment.append(referrers[user_id])
+        attachment.append(user_id)
+        if rng.random() < wish_share:
+            wished[user_id] = 1
+            tickets[user_id] += 1
+            if referrers[user_id]:
+                tickets[referrers[user_id]] += 1
+                referrals[referrers[user_id]] += 1
+        if rng.random() < GRANT_SHARE:
+            tickets[user_id] += min(int(rng.paretovariate(1.5)), 500)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    wishes_total = 0
+    for batch_start in range(1, users + 1, BATCH_SIZE):
+        batch = range(batch_start, min(batch_start + BATCH_SIZE, users + 1))
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO users (user_id, username, username_key, tickets, referrer_id, has_wished, created_at, "
+            "referrals) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (uid, username, normalize_username(username), tickets[uid], referrers[uid] or None, wished[uid],
+                 created[uid - 1], referrals[uid])
+                for uid, username in ((uid, _username(rng, uid)) for uid in batch)
+            )
+        )
+        wish_rows = [(uid, _wish_text(rng), created[uid - 1]) for uid in batch if wished[uid]]
+        conn.executemany("INSERT INTO wishes (user_id, text, created_at) VALUES (?, ?, ?)", wish_rows)
+        wishes_total += len(wish_rows)
+        conn.execute("COMMIT")
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+        [
+            ("reply_message_id", str(rng.randint(100, 10_000))),
+            ("bot_enabled", "true"),
+        ]
+    )
+    conn.execute(
+        "INSERT INTO broadcast_targets (chat_id, interval_seconds, last_run) VALUES (?, ?, ?)",
+        (-1001000000000, 3600, start.timestamp() + CAMPAIGN_DAYS * 86400)
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    asyncio.run(_run_and_close(database, database.stats.rebuild_hourly_stats, database.events.snapshot_balances))
+    return {"users": users, "wishes": wishes_total, "referred": sum(1 for r in referrers if r)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic campaign database.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--output", type=Path, default=Path("bot.db"))
+    parser.add_argument("--wish-share", type=float, default=0.6, help="share of users with a wish")
+    parser.add_argument("--referral-share", type=float, default=0.45, help="share of users with a referrer")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.output.exists():
+        parser.error(f"{args.output} already exists, refusing to overwrite")
+
+    started = time.perf_counter()
+    summary = generate(args.output, args.users, args.wish_share, args.referral_share, args.seed)
+    print(f"Generated {summary['users']} users, {summary['wishes']} wishes, "
+          f"{summary['referred']} referred in {time.perf_counter() - started:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
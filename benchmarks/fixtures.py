@@ -0,0 +1,30 @@
+"""Benchmark database fixtures.
+
+Fixtures are generated once per size with ``benchmarks.datagen`` into
+``benchmarks/.data`` and copied before each run, so mutating benchmarks
+never touch the cached file.
+"""
+import shutil
+from pathlib import Path
+
+from benchmarks.datagen import generate
+
+DATA_DIR = Path(__file__).parent / ".data"
+
+
+def fixture_path(users: int, seed: int = 0) -> Path:
+    """Path to the cached fixture for the size, building it if needed."""
+    DATA_DIR.mkdir(exist_ok=True)
+    path = DATA_DIR / f"users_{users}_seed_{seed}.db"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        generate(tmp, users, seed=seed)
+        tmp.rename(path)
+    return path
+
+
+def working_copy(users: int, target: Path, seed: int = 0) -> Path:
+    """Copy the cached fixture to ``target`` for a mutating run."""
+    shutil.copyfile(fixture_path(users, seed), target)
+    return target
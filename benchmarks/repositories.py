@@ -0,0 +1,231 @@
+"""Benchmark cases for every public repository method.
+
+Each case receives the ``Database`` facade and a seeded RNG and performs a
+single operation. Mutating cases draw their targets from pools of
+suitable users so every operation does real work (e.g. ``add_wish`` only
+runs for users without a wish).
+"""
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from data.database import Database
+from data.repositories.events import FLUSH_SIZE
+from data.repositories.outbox import enqueue
+from data.repositories.wishes import BulkSelection
+
+# Users per bulk reset; together with the single resets every iteration
+# consumes ~7 users with wishes, see the pool size in runner.run_size
+BULK_BATCH = 5
+INDEX_BATCH = 100
+OUTBOX_BATCH = 50
+
+Operation = Callable[[Database, random.Random], Awaitable[object]]
+
+
+@dataclass
+class Case:
+    """One benchmarked repository method."""
+    name: str
+    operation: Operation
+    # Expensive full-table methods run fewer iterations
+    heavy: bool = False
+
+
+class Pools:
+    """Target user ids for mutating benchmarks, consumed without reuse."""
+
+    def __init__(self, users: int, wished: list[int], unwished: list[int],
+                 usernames: list[str] | None = None, wish_texts: list[str] | None = None):
+        self.users = users
+        self.wished = wished
+        self.unwished = unwished
+        self.usernames = usernames or [""]
+        self.wish_texts = wish_texts or [""]
+        self._next_user = users + 1
+
+    def new_user_id(self) -> int:
+        self._next_user += 1
+        return self._next_user
+
+
+async def load_pools(db: Database, users: int, rng: random.Random, size: int) -> Pools:
+    ids = [rng.randint(1, users) for _ in range(size)]
+    async with db.users._read() as conn:
+        async with conn.execute(
+            "SELECT u.user_id, u.username, u.has_wished, w.text FROM users u "
+            "LEFT JOIN wishes w ON w.user_id = u.user_id "
+            f"WHERE u.user_id IN ({','.join('?' * len(ids))})",
+            ids
+        ) as cursor:
+            rows = await cursor.fetchall()
+    wished = [row[0] for row in rows if row[2] and row[1]]
+    unwished = [row[0] for row in rows if not row[2]]
+    usernames = [row[1] for row in rows if row[1]]
+    wish_texts = [row[3] for row in rows if row[3]]
+    rng.shuffle(wished)
+    rng.shuffle(unwished)
+    return Pools(users, wished, unwished, usernames, wish_texts)
+
+
+def build_cases(pools: Pools) -> list[Case]:
+    """All repository benchmark cases for a populated database."""
+    def any_user(rng: random.Random) -> int:
+        return rng.randint(1, pools.users)
+
+    async def reset_wish(db: Database, rng: random.Random):
+        if pools.wished:
+            return await db.wishes.reset_wish(pools.wished.pop())
+
+    async def add_wish(db: Database, rng: random.Random):
+        if pools.unwished:
+            return await db.wishes.add_wish(pools.unwished.pop(), "Бенчмарк пожелание 🎄")
+
+    async def reset_wish_by_username(db: Database, rng: random.Random):
+        if pools.wished:
+            user = await db.users.get_user(pools.wished.pop())
+            return await db.wishes.reset_wish_by_username(user['username'])
+
+    async def bulk_reset_wishes(db: Database, rng: random.Random):
+        batch = tuple(pools.wished.pop() for _ in range(min(BULK_BATCH, len(pools.wished))))
+        if batch:
+            return await db.wishes.bulk_reset_wishes(BulkSelection(user_ids=batch))
+
+    # One hour of the generated campaign, wishes made within 10 minutes of /start
+    spam_window = BulkSelection(created_from="2025-12-20 10:00:00", created_to="2025-12-20 11:00:00",
+                                max_account_age=600)
+
+    # A typical analysis result to store
+    flagged = [
+        {"user_id": user_id, "score": 3.0, "referrals": 40, "wished_referrals": 35, "subtree_size": 60,
+         "depth": 1, "max_burst": 30, "quick_share": 0.9, "signal_share": 0.1, "cluster_id": None,
+         "cluster_size": 1, "reasons": ["burst"]}
+        for user_id in range(1, 201)
+    ]
+
+    async def delete_held_wish(db: Database, rng: random.Random):
+        held_id = await db.moderation.hold_wish(pools.new_user_id(), "Бенчмарк", ["бенч"])
+        return await db.moderation.delete_held_wish(held_id)
+
+    async def delete_target(db: Database, rng: random.Random):
+        target_id = await db.broadcasts.add_target(-1, 3600)
+        return await db.broadcasts.delete_target(target_id)
+
+    async def flush_events(db: Database, rng: random.Random):
+        # One full batch, as written by the background writer
+        for _ in range(FLUSH_SIZE):
+            db.events.record(any_user(rng), "tickets_granted", any_user(rng), 0)
+        return await db.events.flush()
+
+    async def save_outbox_results(db: Database, rng: random.Random):
+        # One dispatched batch: queue it, then record it as sent
+        async with db.outbox._write() as conn:
+            for _ in range(OUTBOX_BATCH):
+                await enqueue(conn, f"bench:{rng.random()}", "tickets_granted", any_user(rng),
+                              {"count": 1, "total": 1, "comment": None})
+            await conn.commit()
+        due = await db.outbox.get_due(OUTBOX_BATCH)
+        return await db.outbox.save_results([message['id'] for message in due], [], [])
+
+    return [
+        # UserRepository
+        Case("UserRepository.get_user", lambda db, rng: db.users.get_user(any_user(rng))),
+        Case("UserRepository.create_user",
+             lambda db, rng: db.users.create_user(pools.new_user_id(), "bench", any_user(rng))),
+        Case("UserRepository.update_username",
+             lambda db, rng: db.users.update_username(any_user(rng), f"renamed{rng.random()}")),
+        Case("UserRepository.find_user_by_username",
+             lambda db, rng: db.users.find_user_by_username(f"@{rng.choice(pools.usernames).upper()}")),
+        Case("UserRepository.search_by_username_prefix",
+             lambda db, rng: db.users.search_by_username_prefix(rng.choice(pools.usernames)[:rng.randint(1, 4)])),
+        Case("UserRepository.add_tickets_to_user",
+             lambda db, rng: db.users.add_tickets_to_user(any_user(rng), 1, notify_key=f"bench:{rng.random()}")),
+        Case("UserRepository.get_referral_count", lambda db, rng: db.users.get_referral_count(any_user(rng))),
+        Case("UserRepository.get_total_referrals", lambda db, rng: db.users.get_total_referrals(any_user(rng))),
+        # WishRepository
+        Case("WishRepository.add_wish", add_wish),
+        Case("WishRepository.get_user_wish", lambda db, rng: db.wishes.get_user_wish(any_user(rng))),
+        Case("WishRepository.get_random_wish", lambda db, rng: db.wishes.get_random_wish(), heavy=True),
+        Case("WishRepository.find_wish_by_text",
+             lambda db, rng: db.wishes.find_wish_by_text(rng.choice(pools.wish_texts))),
+        Case("WishRepository.reset_wish", reset_wish),
+        Case("WishRepository.reset_wish_by_username", reset_wish_by_username),
+        Case("WishRepository.preview_bulk_reset",
+             lambda db, rng: db.wishes.preview_bulk_reset(spam_window), heavy=True),
+        Case("WishRepository.bulk_reset_wishes", bulk_reset_wishes),
+        Case("WishRepository.index_unsigned_wishes",
+             lambda db, rng: db.wishes.index_unsigned_wishes(rng.randint(0, pools.users), INDEX_BATCH)),
+        Case("WishRepository.get_near_duplicates", lambda db, rng: db.wishes.get_near_duplicates(), heavy=True),
+        Case("WishRepository.get_wishes_by_ids",
+             lambda db, rng: db.wishes.get_wishes_by_ids([rng.randint(1, pools.users) for _ in range(20)])),
+        # SettingsRepository
+        Case("SettingsRepository.load_all", lambda db, rng: db.settings.load_all()),
+        Case("SettingsRepository.get_setting", lambda db, rng: db.settings.get_setting("reply_message_id")),
+        Case("SettingsRepository.set_setting", lambda db, rng: db.settings.set_setting("bench", str(rng.random()))),
+        Case("SettingsRepository.delete_setting", lambda db, rng: db.settings.delete_setting("bench")),
+        Case("SettingsRepository.get_reply_message_id", lambda db, rng: db.settings.get_reply_message_id()),
+        Case("SettingsRepository.set_reply_message_id", lambda db, rng: db.settings.set_reply_message_id(42)),
+        Case("SettingsRepository.clear_reply_message_id", lambda db, rng: db.settings.clear_reply_message_id()),
+        Case("SettingsRepository.get_bot_enabled", lambda db, rng: db.settings.get_bot_enabled()),
+        Case("SettingsRepository.set_bot_enabled", lambda db, rng: db.settings.set_bot_enabled(True)),
+        # BroadcastRepository
+        Case("BroadcastRepository.add_target",
+             lambda db, rng: db.broadcasts.add_target(-rng.randint(10**12, 2 * 10**12), 3600)),
+        Case("BroadcastRepository.get_targets", lambda db, rng: db.broadcasts.get_targets()),
+        Case("BroadcastRepository.get_target", lambda db, rng: db.broadcasts.get_target(1)),
+        Case("BroadcastRepository.update_target",
+             lambda db, rng: db.broadcasts.update_target(1, interval_seconds=rng.randint(60, 7200))),
+        Case("BroadcastRepository.set_chat_reply_to",
+             lambda db, rng: db.broadcasts.set_chat_reply_to(-1, rng.randint(1, 10**6))),
+        Case("BroadcastRepository.mark_sent", lambda db, rng: db.broadcasts.mark_sent(1, rng.random())),
+        Case("BroadcastRepository.delete_target", delete_target),
+        # LeaderboardRepository
+        Case("LeaderboardRepository.load", lambda db, rng: db.leaderboard.load(), heavy=True),
+        Case("LeaderboardRepository.get_rank", lambda db, rng: db.leaderboard.get_rank(any_user(rng))),
+        Case("LeaderboardRepository.get_top",
+             lambda db, rng: db.leaderboard.get_top(rng.choice(("tickets", "referrals")), rng.choice((10, 100)))),
+        # ReferralRepository
+        Case("ReferralRepository.load_graph", lambda db, rng: db.referrals.load_graph(), heavy=True),
+        Case("ReferralRepository.save_suspicious", lambda db, rng: db.referrals.save_suspicious(flagged)),
+        Case("ReferralRepository.get_suspicious", lambda db, rng: db.referrals.get_suspicious(15)),
+        # EventRepository
+        Case("EventRepository.flush", flush_events),
+        Case("EventRepository.close", lambda db, rng: db.events.close()),
+        Case("EventRepository.snapshot_balances", lambda db, rng: db.events.snapshot_balances(), heavy=True),
+        Case("EventRepository.get_events",
+             lambda db, rng: db.events.get_events(any_user(rng)) if rng.random() < 0.5
+             else db.events.get_events(action=rng.choice(("wish_added", "tickets_granted")))),
+        Case("EventRepository.get_ticket_balance", lambda db, rng: db.events.get_ticket_balance(any_user(rng))),
+        # OutboxRepository
+        Case("OutboxRepository.get_due", lambda db, rng: db.outbox.get_due(OUTBOX_BATCH)),
+        Case("OutboxRepository.save_results", save_outbox_results),
+        Case("OutboxRepository.get_counts", lambda db, rng: db.outbox.get_counts()),
+        Case("OutboxRepository.purge_sent", lambda db, rng: db.outbox.purge_sent()),
+        # UpdateJournalRepository
+        Case("UpdateJournalRepository.save",
+             lambda db, rng: db.updates.save([{"update_id": rng.randint(1, 10**9), "message": {"text": "Бенчмарк"}}])),
+        Case("UpdateJournalRepository.take", lambda db, rng: db.updates.take()),
+        # ModerationRepository
+        Case("ModerationRepository.get_blocklist_terms", lambda db, rng: db.moderation.get_blocklist_terms()),
+        Case("ModerationRepository.add_blocklist_terms",
+             lambda db, rng: db.moderation.add_blocklist_terms([f"бенч{rng.randint(1, 10**9)}"])),
+        Case("ModerationRepository.remove_blocklist_terms",
+             lambda db, rng: db.moderation.remove_blocklist_terms([f"бенч{rng.randint(1, 10**9)}"])),
+        Case("ModerationRepository.hold_wish",
+             lambda db, rng: db.moderation.hold_wish(pools.new_user_id(), "Бенчмарк", ["бенч"])),
+        Case("ModerationRepository.get_held_wish", lambda db, rng: db.moderation.get_held_wish(1)),
+        Case("ModerationRepository.get_user_held_wish",
+             lambda db, rng: db.moderation.get_user_held_wish(any_user(rng))),
+        Case("ModerationRepository.get_held_wishes", lambda db, rng: db.moderation.get_held_wishes(10)),
+        Case("ModerationRepository.count_held_wishes", lambda db, rng: db.moderation.count_held_wishes()),
+        Case("ModerationRepository.delete_held_wish", delete_held_wish),
+        # StatsRepository
+        Case("StatsRepository.get_users_count", lambda db, rng: db.stats.get_users_count(), heavy=True),
+        Case("StatsRepository.get_wishes_count", lambda db, rng: db.stats.get_wishes_count(), heavy=True),
+        Case("StatsRepository.get_all_participants_data",
+             lambda db, rng: db.stats.get_all_participants_data(), heavy=True),
+        # The last week of the generated campaign, as drawn by the admin chart
+        Case("StatsRepository.get_hourly_stats",
+             lambda db, rng: db.stats.get_hourly_stats("2025-12-24 00:00:00", "2025-12-31 00:00:00")),
+        Case("StatsRepository.rebuild_hourly_stats", lambda db, rng: db.stats.rebuild_hourly_stats(), heavy=True),
+    ]
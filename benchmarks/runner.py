@@ -0,0 +1,145 @@
+"""Run repository benchmarks, write results and compare with a baseline."""
+import asyncio
+import inspect
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fixtures import working_copy
+from benchmarks.repositories import Case, build_cases, load_pools
+from data.database import Database
+from data.repositories.broadcasts import BroadcastRepository
+from data.repositories.events import EventRepository
+from data.repositories.leaderboard import LeaderboardRepository
+from data.repositories.moderation import ModerationRepository
+from data.repositories.outbox import OutboxRepository
+from data.repositories.referrals import ReferralRepository
+from data.repositories.settings import SettingsRepository
+from data.repositories.stats import StatsRepository
+from data.repositories.users import UserRepository
+from data.repositories.wishes import WishRepository
+
+BENCHMARKED_REPOSITORIES = (
+    UserRepository, WishRepository, SettingsRepository, StatsRepository, BroadcastRepository,
+    ModerationRepository, LeaderboardRepository, ReferralRepository, EventRepository, OutboxRepository,
+)
+WARMUP = 5
+HEAVY_ITERATIONS = 5
+
+
+def uncovered_methods(cases: list[Case]) -> list[str]:
+    """Public repository methods without a benchmark case."""
+    covered = {case.name for case in cases}
+    missing = []
+    for repository in BENCHMARKED_REPOSITORIES:
+        for name, value in vars(repository).items():
+            if not name.startswith("_") and inspect.iscoroutinefunction(value):
+                if f"{repository.__name__}.{name}" not in covered:
+                    missing.append(f"{repository.__name__}.{name}")
+    return missing
+
+
+def _percentile(samples: list[float], q: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1]
+
+
+async def _measure(db: Database, case: Case, rng: random.Random, iterations: int) -> dict:
+    if case.heavy:
+        iterations = min(iterations, HEAVY_ITERATIONS)
+    for _ in range(0 if case.heavy else WARMUP):
+        await case.operation(db, rng)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        await case.operation(db, rng)
+        samples.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    # Peak Python heap of a single call, measured separately to keep timings clean
+    tracemalloc.start()
+    await case.operation(db, rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "p50_ms": round(_percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+async def run_size(db_path: Path, users: int, iterations: int, seed: int, only: str | None = None) -> dict:
+    """Benchmark all cases against one database."""
+    db = Database(str(db_path))
+    # Apply schema migrations to fixtures generated by older versions
+    await db.init()
+    rng = random.Random(seed)
+    pools = await load_pools(db, users, rng, size=min(users, 12 * (iterations + WARMUP + 1) + 100))
+    results = {}
+    try:
+        for case in build_cases(pools):
+            if only and only not in case.name:
+                continue
+            results[case.name] = await _measure(db, case, rng, iterations)
+            print(f"  {case.name:48} {results[case.name]['ops_per_sec']:>10} ops/s  "
+                  f"p50 {results[case.name]['p50_ms']:.3f} ms")
+    finally:
+        await db.close()
+    return results
+
+
+def run(sizes: list[int], iterations: int, seed: int, workdir: Path, only: str | None = None) -> dict:
+    """Run the suite for every size and return the results document."""
+    results = {}
+    for users in sizes:
+        print(f"== {users} users")
+        db_path = working_copy(users, workdir / f"bench_{users}.db", seed)
+        results[str(users)] = asyncio.run(run_size(db_path, users, iterations, seed, only))
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "iterations": iterations,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Methods whose p50 latency regressed more than ``threshold`` (0.2 = 20%)."""
+    regressions = []
+    for size, methods in current["results"].items():
+        for name, stats in methods.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base or not base["p50_ms"]:
+                continue
+            change = stats["p50_ms"] / base["p50_ms"] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{size} users {name}: p50 {base['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def load_json(path: Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path: Path, document: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
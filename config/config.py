@@ -20,10 +20,52 @@ REQUIRED_CHAT = os.getenv("REQUIRED_CHAT", "@TrainingCampTelegram")
 CHANNEL_INVITE_LINK = os.getenv("CHANNEL_INVITE_LINK", "")
 CHAT_INVITE_LINK = os.getenv("CHAT_INVITE_LINK", "")
 
+# Graceful shutdown: max seconds to wait for in-flight work
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", 25))
+
+# Prometheus metrics endpoint (port 0 disables it)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+
+# Slow-query log: threshold in ms and EXPLAIN QUERY PLAN capture
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 50))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+# Startup warm-up time budget in seconds
+WARMUP_BUDGET = float(os.getenv("WARMUP_BUDGET", 10))
+
+# Time zone for broadcast quiet hours
+BROADCAST_TZ = os.getenv("BROADCAST_TZ", "Europe/Moscow")
+
+# Referral fraud analysis period in seconds (0 disables the scheduled run)
+REFERRAL_ANALYSIS_INTERVAL = int(os.getenv("REFERRAL_ANALYSIS_INTERVAL", 6 * 60 * 60))
+
+# Logging: root level, "json" or "text" output, per-logger levels
+# ("aiogram.event=WARNING,data.query_log=ERROR") and sampling rates for
+# INFO records ("apps.handlers.common=0.1")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 ASSETS_DIR = BASE_DIR / "assets"
-DB_PATH = BASE_DIR / "bot.db"
+DB_PATH = Path(os.getenv("DB_PATH", BASE_DIR / "bot.db"))
+# Read-only connections used concurrently next to the single writer
+DB_READ_CONNECTIONS = int(os.getenv("DB_READ_CONNECTIONS", 4))
+
+# Online backups: directory, period in seconds (0 disables the scheduled
+# run) and number of archives kept
+BACKUP_DIR = Path(os.getenv("BACKUP_DIR", BASE_DIR / "backups"))
+BACKUP_INTERVAL = int(os.getenv("BACKUP_INTERVAL", 60 * 60))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", 48))
+
+# Personal ticket cards: worker processes rendering them (0 shows the
+# static image instead) and renders in progress beyond which the static
+# image is shown
+TICKET_CARD_WORKERS = int(os.getenv("TICKET_CARD_WORKERS", 2))
+TICKET_CARD_MAX_PENDING = int(os.getenv("TICKET_CARD_MAX_PENDING", 8))
 
 # Asset files
 MAIN_IMAGE = ASSETS_DIR / "main.png"
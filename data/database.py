@@ -6,12 +6,23 @@ This module provides a unified Database class that:
 3. Maintains backwards compatibility via proxy methods
 """
 import aiosqlite
-from config.config import DB_PATH
+from config.config import CHAT_ID, DB_PATH
+from data.pool import get_pool
 
 from data.repositories.users import UserRepository
 from data.repositories.wishes import WishRepository
 from data.repositories.settings import SettingsRepository
 from data.repositories.stats import StatsRepository
+from data.repositories.broadcasts import BroadcastRepository
+from data.repositories.moderation import ModerationRepository
+from data.repositories.leaderboard import LeaderboardRepository
+from data.repositories.referrals import ReferralRepository
+from data.repositories.events import EventRepository
+from data.repositories.outbox import OutboxRepository
+from data.repositories.updates import UpdateJournalRepository
+
+# Interval of the single hourly broadcast that preceded broadcast targets
+LEGACY_BROADCAST_INTERVAL = 60 * 60
 
 
 class Database:
@@ -20,15 +31,26 @@ class Database:
     def __init__(self, db_path: str = None):
         self.db_path = db_path or str(DB_PATH)
         
-        # Initialize repositories
-        self.users = UserRepository(self.db_path)
-        self.wishes = WishRepository(self.db_path)
+        # Initialize repositories; balance changes keep the leaderboard cache
+        # current and are written to the audit log; messages they cause go
+        # through the outbox
+        self.leaderboard = LeaderboardRepository(self.db_path)
+        self.events = EventRepository(self.db_path)
+        self.outbox = OutboxRepository(self.db_path)
+        self.users = UserRepository(self.db_path, self.leaderboard, self.events, self.outbox)
+        self.wishes = WishRepository(self.db_path, self.leaderboard, self.events, self.outbox)
         self.settings = SettingsRepository(self.db_path)
         self.stats = StatsRepository(self.db_path)
+        self.broadcasts = BroadcastRepository(self.db_path)
+        self.moderation = ModerationRepository(self.db_path)
+        self.referrals = ReferralRepository(self.db_path)
+        self.updates = UpdateJournalRepository(self.db_path)
     
     async def init(self):
         """Initialize database schema."""
         async with aiosqlite.connect(self.db_path) as db:
+            # Readers (exports, online backups) don't block writers under WAL
+            await db.execute("PRAGMA journal_mode = WAL")
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     user_id INTEGER PRIMARY KEY,
@@ -36,9 +58,36 @@ class Database:
                     tickets INTEGER DEFAULT 0,
                     referrer_id INTEGER,
                     has_wished BOOLEAN DEFAULT FALSE,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    referrals INTEGER DEFAULT 0,
+                    username_key TEXT
                 )
             """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_referrer ON users (referrer_id)")
+            async with db.execute("SELECT 1 FROM pragma_table_info('users') WHERE name = 'referrals'") as cursor:
+                has_referrals = await cursor.fetchone() is not None
+            if not has_referrals:
+                # Referred users who left a wish, kept as a counter for the leaderboard
+                await db.execute("ALTER TABLE users ADD COLUMN referrals INTEGER DEFAULT 0")
+                await db.execute("""
+                    UPDATE users SET referrals = (
+                        SELECT COUNT(*) FROM users r WHERE r.referrer_id = users.user_id AND r.has_wished
+                    )
+                """)
+            async with db.execute("SELECT 1 FROM pragma_table_info('users') WHERE name = 'username_key'") as cursor:
+                has_username_key = await cursor.fetchone() is not None
+            if not has_username_key:
+                # Normalized username (see normalize_username) for indexed exact and prefix lookups
+                await db.execute("ALTER TABLE users ADD COLUMN username_key TEXT")
+                await db.execute(
+                    "UPDATE users SET username_key = NULLIF(LOWER(LTRIM(TRIM(username), '@')), '') "
+                    "WHERE username IS NOT NULL"
+                )
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_username_key ON users (username_key)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_tickets ON users (tickets DESC)")
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_users_referrals ON users (referrals DESC) WHERE referrals > 0"
+            )
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS wishes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -48,13 +97,170 @@ class Database:
                     FOREIGN KEY (user_id) REFERENCES users (user_id)
                 )
             """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_wishes_user ON wishes (user_id)")
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS settings (
                     key TEXT PRIMARY KEY,
                     value TEXT
                 )
             """)
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'broadcast_targets'"
+            ) as cursor:
+                has_targets = await cursor.fetchone() is not None
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_targets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chat_id INTEGER NOT NULL,
+                    reply_to INTEGER,
+                    interval_seconds INTEGER NOT NULL,
+                    quiet_start INTEGER,
+                    quiet_end INTEGER,
+                    enabled BOOLEAN DEFAULT TRUE,
+                    last_run REAL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            if not has_targets and CHAT_ID:
+                # Carry the single-chat broadcast over to the first target
+                await db.execute(
+                    "INSERT INTO broadcast_targets (chat_id, reply_to, interval_seconds, last_run) VALUES ("
+                    "?, (SELECT CAST(value AS INTEGER) FROM settings WHERE key = 'reply_message_id'), ?, "
+                    "(SELECT CAST(value AS REAL) FROM settings WHERE key = 'last_broadcast_time'))",
+                    (CHAT_ID, LEGACY_BROADCAST_INTERVAL)
+                )
+                await db.execute("DELETE FROM settings WHERE key = 'last_broadcast_time'")
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS blocklist (
+                    term TEXT PRIMARY KEY,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS held_wishes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER UNIQUE,
+                    text TEXT,
+                    matches TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (user_id)
+                )
+            """)
+            # Near-duplicate index: MinHash signatures and LSH buckets
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS wish_signatures (
+                    wish_id INTEGER PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    duplicate_of INTEGER,
+                    similarity REAL
+                )
+            """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_wish_signatures_duplicate
+                ON wish_signatures (duplicate_of) WHERE duplicate_of IS NOT NULL
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS wish_lsh (
+                    band INTEGER,
+                    bucket INTEGER,
+                    wish_id INTEGER,
+                    PRIMARY KEY (band, bucket, wish_id)
+                ) WITHOUT ROWID
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_wish_lsh_wish ON wish_lsh (wish_id)")
+            # Hourly campaign rollups, kept current by the repositories
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hourly_stats'"
+            ) as cursor:
+                has_hourly_stats = await cursor.fetchone() is not None
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS hourly_stats (
+                    hour TEXT PRIMARY KEY,
+                    signups INTEGER NOT NULL DEFAULT 0,
+                    wishes INTEGER NOT NULL DEFAULT 0,
+                    referral_conversions INTEGER NOT NULL DEFAULT 0,
+                    tickets_granted INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            """)
+            # Result of the last referral fraud analysis
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS suspicious_referrers (
+                    user_id INTEGER PRIMARY KEY,
+                    score REAL NOT NULL,
+                    referrals INTEGER,
+                    wished_referrals INTEGER,
+                    subtree_size INTEGER,
+                    depth INTEGER,
+                    max_burst INTEGER,
+                    quick_share REAL,
+                    signal_share REAL,
+                    cluster_id INTEGER,
+                    cluster_size INTEGER,
+                    reasons TEXT
+                )
+            """)
+            # Append-only audit log; delta is the change of the target's tickets
+            async with db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events'"
+            ) as cursor:
+                has_events = await cursor.fetchone() is not None
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    actor_id INTEGER,
+                    action TEXT NOT NULL,
+                    target_id INTEGER,
+                    delta INTEGER NOT NULL DEFAULT 0,
+                    details TEXT
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_events_target ON events (target_id, delta)")
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_actor ON events (actor_id) WHERE actor_id IS NOT NULL"
+            )
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_events_action ON events (action)")
+            # Messages queued with the change they announce, see OutboxRepository
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL UNIQUE,
+                    kind TEXT NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    sent_at REAL,
+                    error TEXT
+                )
+            """)
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (next_attempt_at) WHERE status = 'pending'"
+            )
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_sent ON outbox (sent_at) WHERE status = 'sent'"
+            )
+            # Updates cut off by the last shutdown, see UpdateJournalRepository
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS unfinished_updates (
+                    update_id INTEGER PRIMARY KEY,
+                    payload TEXT NOT NULL
+                )
+            """)
             await db.commit()
+        
+        if not has_hourly_stats:
+            # One-shot backfill of the rollups from existing users and wishes
+            await self.stats.rebuild_hourly_stats()
+        if not has_events:
+            # Balances so far, so that the log sums up to users.tickets
+            await self.events.snapshot_balances()
+    
+    async def close(self):
+        """Close the pooled connections; they reopen on next use."""
+        await get_pool(self.db_path).close()
     
     # ==================== BACKWARDS COMPATIBILITY PROXIES ====================
     # These methods proxy to the appropriate repository for backwards compatibility
@@ -73,8 +279,9 @@ class Database:
     async def find_user_by_username(self, username: str):
         return await self.users.find_user_by_username(username)
     
-    async def add_tickets_to_user(self, user_id: int, count: int) -> int | None:
-        return await self.users.add_tickets_to_user(user_id, count)
+    async def add_tickets_to_user(self, user_id: int, count: int, actor_id: int = None,
+                                  notify_key: str = None, comment: str = None) -> int | None:
+        return await self.users.add_tickets_to_user(user_id, count, actor_id, notify_key, comment)
     
     async def get_referral_count(self, user_id: int) -> int:
         return await self.users.get_referral_count(user_id)
@@ -83,8 +290,8 @@ class Database:
         return await self.users.get_total_referrals(user_id)
     
     # --- Wish methods ---
-    async def add_wish(self, user_id: int, text: str) -> bool:
-        return await self.wishes.add_wish(user_id, text)
+    async def add_wish(self, user_id: int, text: str, publish_to: int = None, notify_user: bool = False) -> bool:
+        return await self.wishes.add_wish(user_id, text, publish_to, notify_user)
     
     async def get_user_wish(self, user_id: int):
         return await self.wishes.get_user_wish(user_id)
@@ -95,11 +302,11 @@ class Database:
     async def find_wish_by_text(self, text: str):
         return await self.wishes.find_wish_by_text(text)
     
-    async def reset_wish(self, user_id: int) -> bool:
-        return await self.wishes.reset_wish(user_id)
+    async def reset_wish(self, user_id: int, actor_id: int = None) -> bool:
+        return await self.wishes.reset_wish(user_id, actor_id)
     
-    async def reset_wish_by_username(self, username: str) -> dict | None:
-        return await self.wishes.reset_wish_by_username(username)
+    async def reset_wish_by_username(self, username: str, actor_id: int = None) -> dict | None:
+        return await self.wishes.reset_wish_by_username(username, actor_id)
     
     # --- Settings methods ---
     async def get_setting(self, key: str) -> str | None:
@@ -126,12 +333,6 @@ class Database:
     async def set_bot_enabled(self, enabled: bool):
         return await self.settings.set_bot_enabled(enabled)
     
-    async def get_last_broadcast_time(self) -> float | None:
-        return await self.settings.get_last_broadcast_time()
-    
-    async def set_last_broadcast_time(self, timestamp: float):
-        return await self.settings.set_last_broadcast_time(timestamp)
-    
     # --- Stats methods ---
     async def get_users_count(self) -> int:
         return await self.stats.get_users_count()
@@ -0,0 +1,151 @@
+"""Connection pool - one serialized writer and concurrent read-only connections.
+
+SQLite has a single writer at a time, and under WAL readers work on the
+last committed snapshot without blocking it or being blocked by it. With
+a connection per call, readers and ``BEGIN IMMEDIATE`` writers contended
+for file locks instead, and busy writers timed out with "database is
+locked". Each database file now gets:
+
+- one writer connection. Write requests wait in an ``asyncio.Queue`` and
+  a feeder task lends the connection to one request at a time, in arrival
+  order; a transaction left open by a failed request is rolled back
+  before the next one gets it. The longest wait for the writer is kept
+  in ``longest_wait`` (see ``reset_longest_wait``);
+- ``DB_READ_CONNECTIONS`` read-only connections (``mode=ro``,
+  ``query_only``) lent out concurrently; each statement sees everything
+  committed before it started.
+
+Connections are opened on first use and closed by ``Database.close``,
+which must run before the event loop ends.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import aiosqlite
+
+from config.config import DB_READ_CONNECTIONS
+from data.query_log import TimedConnection, query_log
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Writer and reader connections of one database file."""
+
+    def __init__(self, db_path: str, readers: int = DB_READ_CONNECTIONS):
+        self.db_path = db_path
+        self.size = max(readers, 1)
+        self._writer: aiosqlite.Connection | None = None
+        self._connections: list[aiosqlite.Connection] = []
+        self._feeder: asyncio.Task | None = None
+        # Longest time a write request waited for the writer
+        self.longest_wait = 0.0
+        self._reset()
+
+    def _reset(self) -> None:
+        # Fresh primitives, so a closed pool can be reopened in another event loop
+        self._opening = asyncio.Lock()
+        self._requests: asyncio.Queue[tuple[asyncio.Future, asyncio.Event]] = asyncio.Queue()
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+
+    async def _open(self) -> None:
+        async with self._opening:
+            if self._feeder is not None:
+                return
+            # The writer goes first: read-only connections can't create the WAL files
+            self._writer = await aiosqlite.connect(self.db_path)
+            self._writer.row_factory = aiosqlite.Row
+            self._connections.append(self._writer)
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            for _ in range(self.size):
+                reader = await aiosqlite.connect(uri, uri=True)
+                reader.row_factory = aiosqlite.Row
+                await reader.execute("PRAGMA query_only = ON")
+                self._connections.append(reader)
+                self._idle.put_nowait(reader)
+            self._feeder = asyncio.create_task(self._feed())
+
+    async def _feed(self) -> None:
+        """Lend the writer to queued requests one at a time."""
+        while True:
+            granted, released = await self._requests.get()
+            if granted.cancelled():
+                continue
+            granted.set_result(None)
+            await released.wait()
+
+    @asynccontextmanager
+    async def write(self):
+        """Exclusive use of the writer connection."""
+        if self._feeder is None:
+            await self._open()
+        granted = asyncio.get_running_loop().create_future()
+        released = asyncio.Event()
+        requested = time.perf_counter()
+        self._requests.put_nowait((granted, released))
+        try:
+            await granted
+        except asyncio.CancelledError:
+            # Give the connection back if it was lent while we were cancelled
+            released.set()
+            raise
+        self.longest_wait = max(self.longest_wait, time.perf_counter() - requested)
+        writer = self._writer
+        try:
+            yield TimedConnection(writer, query_log)
+        except BaseException:
+            if writer.in_transaction:
+                await writer.rollback()
+            raise
+        else:
+            if writer.in_transaction:
+                logger.warning("A write left its transaction open, rolled back")
+                await writer.rollback()
+        finally:
+            released.set()
+
+    def reset_longest_wait(self) -> float:
+        """Return the longest writer wait so far and start measuring anew."""
+        longest, self.longest_wait = self.longest_wait, 0.0
+        return longest
+
+    @asynccontextmanager
+    async def read(self):
+        """A read-only connection, shared with nobody while in use."""
+        if self._feeder is None:
+            await self._open()
+        reader = await self._idle.get()
+        try:
+            yield TimedConnection(reader, query_log)
+        finally:
+            self._idle.put_nowait(reader)
+
+    async def close(self) -> None:
+        """Close all connections; the pool reopens on next use."""
+        if self._feeder is not None:
+            self._feeder.cancel()
+            try:
+                await self._feeder
+            except asyncio.CancelledError:
+                pass
+        for connection in self._connections:
+            await connection.close()
+        self._connections.clear()
+        self._writer = None
+        self._feeder = None
+        self._reset()
+
+
+# One pool per database file, shared by all repositories of that file
+_pools: dict[str, ConnectionPool] = {}
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """The pool of a database file, created on first request."""
+    pool = _pools.get(db_path)
+    if pool is None:
+        pool = _pools[db_path] = ConnectionPool(db_path)
+    return pool
@@ -0,0 +1,161 @@
+"""Statement timing, slow-query log and query-plan capture.
+
+Every statement executed through a repository connection is timed and
+aggregated per SQL text. Statements slower than ``SLOW_QUERY_MS`` are
+logged with the shape of their parameters (types and lengths, never
+values). The first time a statement goes slow its ``EXPLAIN QUERY PLAN``
+is captured, and plans with full table scans or temporary sort B-trees
+(``ORDER BY RANDOM()``, ``LOWER(col) = ?``) are flagged.
+"""
+import logging
+import re
+import time
+from dataclasses import dataclass
+
+import aiosqlite
+
+from config.config import SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+# Plan details that indicate a full scan or an on-the-fly sort
+_PLAN_WARNINGS = ("SCAN ", "USE TEMP B-TREE")
+
+
+@dataclass(slots=True)
+class StatementStats:
+    """Aggregated timings of one SQL statement."""
+    sql: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+    plan: list[str] | None = None
+    flagged: bool = False
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+def _params_shape(params) -> str:
+    if not params:
+        return "()"
+    parts = []
+    for value in params:
+        if isinstance(value, (str, bytes)):
+            parts.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            parts.append(type(value).__name__)
+    return f"({', '.join(parts)})"
+
+
+class QueryLog:
+    """Collects per-statement timings since startup."""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.slow_seconds = slow_ms / 1000
+        self.explain = explain
+        self._stats: dict[str, StatementStats] = {}
+
+    async def record(self, db: aiosqlite.Connection, sql: str, params, elapsed: float) -> None:
+        key = _WHITESPACE.sub(" ", sql).strip()
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = StatementStats(key)
+        stats.count += 1
+        stats.total += elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+        if elapsed < self.slow_seconds:
+            return
+
+        stats.slow += 1
+        logger.warning("Slow query (%.1f ms) %s params=%s", elapsed * 1000, key, _params_shape(params))
+        if self.explain and stats.plan is None and key.upper().startswith(_EXPLAINABLE):
+            await self._capture_plan(db, stats, params)
+
+    async def _capture_plan(self, db: aiosqlite.Connection, stats: StatementStats, params) -> None:
+        try:
+            async with db.execute(f"EXPLAIN QUERY PLAN {stats.sql}", params or ()) as cursor:
+                stats.plan = [row[3] for row in await cursor.fetchall()]
+        except Exception as e:
+            stats.plan = []
+            logger.debug("Failed to explain %s: %s", stats.sql, e)
+            return
+        stats.flagged = any(detail.startswith(_PLAN_WARNINGS) for detail in stats.plan)
+        if stats.flagged:
+            logger.warning("Query plan needs attention: %s -> %s", stats.sql, "; ".join(stats.plan))
+
+    def top(self, limit: int = 10) -> list[StatementStats]:
+        """Slowest statements by maximum duration."""
+        return sorted(self._stats.values(), key=lambda s: s.max, reverse=True)[:limit]
+
+
+class TimedConnection:
+    """Connection proxy that times ``execute``, ``executemany`` and ``executescript``.
+
+    Supports both ``await db.execute(...)`` and
+    ``async with db.execute(...) as cursor``; everything else is delegated.
+    An ``executemany`` batch is timed as a whole and logged with the shape
+    of its first row.
+    """
+
+    def __init__(self, db: aiosqlite.Connection, log: QueryLog):
+        self._db = db
+        self._log = log
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def execute(self, sql: str, parameters=None) -> "_TimedExecute":
+        return _TimedExecute(self, "execute", sql, parameters)
+
+    def executemany(self, sql: str, parameters) -> "_TimedExecute":
+        # Materialized so the first row can be logged after the batch ran
+        return _TimedExecute(self, "executemany", sql, list(parameters))
+
+    def executescript(self, sql_script: str) -> "_TimedExecute":
+        return _TimedExecute(self, "executescript", sql_script, None)
+
+
+class _TimedExecute:
+    __slots__ = ("_conn", "_method", "_sql", "_params", "_cursor")
+
+    def __init__(self, conn: TimedConnection, method: str, sql: str, params):
+        self._conn = conn
+        self._method = method
+        self._sql = sql
+        self._params = params
+        self._cursor = None
+
+    async def _run(self) -> aiosqlite.Cursor:
+        db = self._conn._db
+        started = time.perf_counter()
+        if self._method == "execute":
+            cursor = await db.execute(self._sql, self._params)
+            params = self._params
+        elif self._method == "executemany":
+            cursor = await db.executemany(self._sql, self._params)
+            params = self._params[0] if self._params else None
+        else:
+            cursor = await db.executescript(self._sql)
+            params = None
+        await self._conn._log.record(db, self._sql, params, time.perf_counter() - started)
+        return cursor
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def __aenter__(self) -> aiosqlite.Cursor:
+        self._cursor = await self._run()
+        return self._cursor
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._cursor.close()
+
+
+# Global query log shared by all repositories
+query_log = QueryLog()
@@ -1,18 +1,50 @@
 """Base repository with shared database connection logic."""
-import aiosqlite
-from contextlib import asynccontextmanager
+import functools
+import inspect
+import time
+
 from config.config import DB_PATH
+from data.pool import get_pool
+from utils.metrics import REPOSITORY_LATENCY
+
+
+def _timed(name: str, method):
+    """Wrap a repository coroutine to record its latency."""
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            REPOSITORY_LATENCY.observe(time.perf_counter() - started, name)
+    return wrapper
 
 
 class BaseRepository:
-    """Base class for all repositories."""
+    """Base class for all repositories.
+    
+    Public coroutine methods of subclasses are timed automatically and
+    exported as the ``bot_repository_duration_seconds`` metric; individual
+    statements are timed by the slow-query log.
+    
+    Methods declare their side of the connection pool: ``_read`` for
+    queries, run concurrently on read-only connections, and ``_write`` for
+    anything that changes data, serialized on the single writer.
+    """
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for attr, value in list(vars(cls).items()):
+            if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+                setattr(cls, attr, _timed(f"{cls.__name__}.{attr}", value))
     
     def __init__(self, db_path: str = None):
         self.db_path = db_path or str(DB_PATH)
     
-    @asynccontextmanager
-    async def _get_connection(self):
-        """Get a database connection as async context manager."""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            yield db
+    def _read(self):
+        """A read-only connection from the pool, for methods that only query."""
+        return get_pool(self.db_path).read()
+    
+    def _write(self):
+        """The serialized writer connection, for methods that change data."""
+        return get_pool(self.db_path).write()
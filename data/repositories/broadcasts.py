@@ -0,0 +1,85 @@
+"""Broadcast repository - handles scheduled broadcast targets."""
+from data.repositories.base import BaseRepository
+
+# Columns an admin may change after a target is created
+EDITABLE_FIELDS = ("reply_to", "interval_seconds", "quiet_start", "quiet_end", "enabled")
+
+
+class BroadcastRepository(BaseRepository):
+    """Repository for broadcast targets.
+
+    A target is a chat (optionally a post in it to comment on) that gets a
+    random wish every ``interval_seconds``, except during its quiet hours.
+    ``last_run`` is the time of the last successful send and drives
+    missed-run catch-up after a restart.
+    """
+
+    async def add_target(self, chat_id: int, interval_seconds: int, reply_to: int = None,
+                         quiet_start: int = None, quiet_end: int = None) -> int:
+        """Add a broadcast target. Returns its ID."""
+        async with self._write() as db:
+            cursor = await db.execute(
+                "INSERT INTO broadcast_targets (chat_id, reply_to, interval_seconds, quiet_start, quiet_end) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chat_id, reply_to, interval_seconds, quiet_start, quiet_end)
+            )
+            await db.commit()
+            return cursor.lastrowid
+
+    async def get_targets(self) -> list[dict]:
+        """Get all broadcast targets."""
+        async with self._read() as db:
+            async with db.execute("SELECT * FROM broadcast_targets ORDER BY id") as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def get_target(self, target_id: int) -> dict | None:
+        """Get a broadcast target by ID."""
+        async with self._read() as db:
+            async with db.execute(
+                "SELECT * FROM broadcast_targets WHERE id = ?", (target_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+
+    async def update_target(self, target_id: int, **fields) -> bool:
+        """Update editable fields of a target. Returns False if it doesn't exist."""
+        unknown = set(fields) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Not editable: {', '.join(sorted(unknown))}")
+        if not fields:
+            return True
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        async with self._write() as db:
+            cursor = await db.execute(
+                f"UPDATE broadcast_targets SET {assignments} WHERE id = ?",
+                (*fields.values(), target_id)
+            )
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def set_chat_reply_to(self, chat_id: int, reply_to: int | None) -> list[int]:
+        """Set the post of every target in a chat. Returns the IDs of the changed targets."""
+        async with self._write() as db:
+            async with db.execute(
+                "UPDATE broadcast_targets SET reply_to = ? WHERE chat_id = ? RETURNING id",
+                (reply_to, chat_id)
+            ) as cursor:
+                target_ids = [row[0] for row in await cursor.fetchall()]
+            await db.commit()
+            return target_ids
+
+    async def delete_target(self, target_id: int) -> bool:
+        """Delete a broadcast target."""
+        async with self._write() as db:
+            cursor = await db.execute("DELETE FROM broadcast_targets WHERE id = ?", (target_id,))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def mark_sent(self, target_id: int, timestamp: float):
+        """Record a successful broadcast to the target."""
+        async with self._write() as db:
+            await db.execute(
+                "UPDATE broadcast_targets SET last_run = ? WHERE id = ?",
+                (timestamp, target_id)
+            )
+            await db.commit()
@@ -0,0 +1,173 @@
+"""Event repository - append-only audit log of state-changing operations.
+
+Every event names an actor (the user or admin who caused it, ``None`` for
+the bot itself), an action, an optional target user and ``delta``, the
+change of the target's ticket balance. Summing ``delta`` over a user's
+events gives their balance: the log starts from a ``balance_snapshot``
+event per user taken when the table is created.
+
+Repositories and handlers call the synchronous ``record`` after their own
+transaction has committed; events are buffered in memory and written in
+batches by a background writer, so auditing adds no commit to a request.
+Events still in the buffer are lost if the process dies, and the
+shutdown drain flushes them on a clean stop.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from data.repositories.base import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes of the buffer, and the size that flushes it early
+FLUSH_INTERVAL = 1.0
+FLUSH_SIZE = 500
+
+ACTIONS = (
+    "balance_snapshot",
+    "user_created",
+    "wish_added",
+    "referral_bonus",
+    "tickets_granted",
+    "wish_reset",
+    "referral_revoked",
+    "bulk_reset",
+    "held_wish_approved",
+    "held_wish_rejected",
+    "post_set",
+    "post_cleared",
+    "bot_toggled",
+    "broadcast_target_added",
+    "broadcast_target_updated",
+    "broadcast_target_deleted",
+    "blocklist_added",
+    "blocklist_removed",
+)
+
+
+class EventRepository(BaseRepository):
+    """Repository for the audit log with a buffered batch writer."""
+
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        self._pending: list[tuple] = []
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._writer: asyncio.Task | None = None
+
+    def record(self, actor_id: int | None, action: str, target_id: int | None = None,
+               delta: int = 0, details: dict | None = None) -> None:
+        """Queue an event; it is written by the next flush."""
+        self._pending.append((
+            time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            actor_id,
+            action,
+            target_id,
+            delta,
+            json.dumps(details, ensure_ascii=False) if details else None,
+        ))
+        if len(self._pending) >= FLUSH_SIZE:
+            self._full.set()
+
+    def start(self) -> None:
+        """Start the background writer."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Audit log flush failed, %d event(s) kept for retry: %s", len(self._pending), e)
+
+    async def flush(self) -> int:
+        """Write buffered events in one transaction. Returns the number written."""
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                async with self._write() as db:
+                    await db.execute("BEGIN IMMEDIATE")
+                    try:
+                        await db.executemany(
+                            "INSERT INTO events (created_at, actor_id, action, target_id, delta, details) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            batch
+                        )
+                        await db.execute("COMMIT")
+                    except Exception:
+                        await db.execute("ROLLBACK")
+                        raise
+            except Exception:
+                # Keep the order: the failed batch goes before events queued meanwhile
+                self._pending[:0] = batch
+                raise
+            return len(batch)
+
+    async def close(self) -> None:
+        """Stop the background writer and flush what is left."""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        await self.flush()
+
+    async def snapshot_balances(self) -> int:
+        """Start the log with the current balance of every user. Returns the number of users."""
+        async with self._write() as db:
+            cursor = await db.execute("""
+                INSERT INTO events (actor_id, action, target_id, delta)
+                SELECT NULL, 'balance_snapshot', user_id, tickets FROM users WHERE tickets != 0
+            """)
+            await db.commit()
+            return cursor.rowcount
+
+    async def get_events(self, user_id: int | None = None, action: str | None = None,
+                         limit: int = 50) -> list[dict]:
+        """Latest events, newest first, of a user (as actor or target) and/or of an action."""
+        await self.flush()
+        conditions, params = [], []
+        if user_id is not None:
+            # Two indexed lookups instead of an OR that would scan the table
+            conditions.append(
+                "id IN (SELECT id FROM events WHERE target_id = ? UNION SELECT id FROM events WHERE actor_id = ?)"
+            )
+            params += [user_id, user_id]
+        if action is not None:
+            conditions.append("action = ?")
+            params.append(action)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        async with self._read() as db:
+            async with db.execute(
+                f"SELECT * FROM events {where} ORDER BY id DESC LIMIT ?", (*params, limit)
+            ) as cursor:
+                return [
+                    {**dict(row), 'details': json.loads(row['details']) if row['details'] else None}
+                    for row in await cursor.fetchall()
+                ]
+
+    async def get_ticket_balance(self, user_id: int) -> dict:
+        """Recompute a user's balance from the log next to ``users.tickets``.
+
+        Returns ``{"logged": sum of deltas, "stored": users.tickets or None, "events": count}``.
+        """
+        await self.flush()
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT COALESCE(SUM(delta), 0) AS logged, COUNT(*) AS events,
+                       (SELECT tickets FROM users WHERE user_id = ?) AS stored
+                FROM events WHERE target_id = ?
+            """, (user_id, user_id)) as cursor:
+                return dict(await cursor.fetchone())
@@ -0,0 +1,151 @@
+"""Leaderboard repository - top lists and ranks by tickets and referrals.
+
+Ranks come from an in-memory histogram of scores instead of a
+``COUNT(*) ... WHERE tickets > ?`` per request: the histogram is loaded
+once and kept current by the repositories that change balances, which
+report every (old, new) score pair after committing. Top lists are read
+through the ``tickets``/``referrals`` indexes and cached until a change
+reaches the list.
+"""
+import asyncio
+import bisect
+
+from data.repositories.base import BaseRepository
+
+KINDS = ("tickets", "referrals")
+
+
+class ScoreCounts:
+    """Number of users per score with O(log n) "how many score higher".
+
+    Scores below ``DENSE_LIMIT`` are counted in a Fenwick tree; the rare
+    larger ones (big admin grants) are kept in a sorted list.
+    """
+    DENSE_LIMIT = 4096
+
+    def __init__(self, counts: dict[int, int]):
+        self._tree = [0] * (self.DENSE_LIMIT + 1)
+        self._dense_total = 0
+        self._high: list[int] = []
+        for score, count in counts.items():
+            self.add(score, count)
+
+    def add(self, score: int, delta: int) -> None:
+        """Add ``delta`` users with ``score``."""
+        if score >= self.DENSE_LIMIT:
+            for _ in range(delta):
+                bisect.insort(self._high, score)
+            for _ in range(-delta):
+                del self._high[bisect.bisect_left(self._high, score)]
+            return
+        self._dense_total += delta
+        index = max(score, 0) + 1
+        while index <= self.DENSE_LIMIT:
+            self._tree[index] += delta
+            index += index & -index
+
+    def count_above(self, score: int) -> int:
+        """Number of users with a higher score."""
+        if score >= self.DENSE_LIMIT:
+            return len(self._high) - bisect.bisect_right(self._high, score)
+        at_most, index = 0, max(score, 0) + 1
+        while index:
+            at_most += self._tree[index]
+            index -= index & -index
+        return self._dense_total - at_most + len(self._high)
+
+    def __len__(self) -> int:
+        return self._dense_total + len(self._high)
+
+
+class LeaderboardRepository(BaseRepository):
+    """Repository for leaderboards.
+
+    The bot is the only writer, so the cache is kept current from
+    ``record`` calls; until ``load`` runs they are ignored. Repositories
+    call ``record`` right after their commit, before yielding to the event
+    loop, so ``load`` reads on the writer connection: no commit can land
+    between its snapshot and the histogram taking over, and every earlier
+    one is in the snapshot.
+    """
+
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        self._scores: dict[str, ScoreCounts] | None = None
+        # (kind, limit) -> cached top list
+        self._top: dict[tuple[str, int], list[dict]] = {}
+        # One load at a time; concurrent first get_rank calls share it
+        self._loading = asyncio.Lock()
+
+    async def load(self) -> int:
+        """Load score histograms. Returns the number of users."""
+        async with self._loading:
+            return await self._load()
+
+    async def _load(self) -> int:
+        scores = {}
+        # Holds off writes for two GROUP BY scans, once per start
+        async with self._write() as db:
+            for kind in KINDS:
+                async with db.execute(f"SELECT {kind}, COUNT(*) FROM users GROUP BY {kind}") as cursor:
+                    scores[kind] = ScoreCounts({row[0] or 0: row[1] for row in await cursor.fetchall()})
+            self._scores = scores
+            self._top.clear()
+        return len(scores["tickets"])
+
+    def record(self, changes: list[tuple[str, int | None, int]]) -> None:
+        """Apply committed score changes: (kind, old score or None for a new user, new score)."""
+        if self._scores is None:
+            return
+        for kind, old, new in changes:
+            if old == new:
+                continue
+            counts = self._scores[kind]
+            if old is not None:
+                counts.add(old, -1)
+            counts.add(new, 1)
+            for key in [key for key in self._top if key[0] == kind]:
+                top = self._top[key]
+                # Lists hold positive scores only; shorter lists take any newcomer
+                cutoff = top[-1][kind] if len(top) == key[1] else 1
+                if max(old or 0, new) >= cutoff:
+                    del self._top[key]
+
+    async def get_top(self, kind: str, limit: int) -> list[dict]:
+        """Get users with the highest ``kind`` score (tickets or referrals)."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown leaderboard: {kind}")
+        top = self._top.get((kind, limit))
+        if top is not None:
+            return top
+        async with self._read() as db:
+            async with db.execute(f"""
+                SELECT user_id, username, tickets, referrals
+                FROM users
+                WHERE {kind} > 0
+                ORDER BY {kind} DESC, user_id
+                LIMIT ?
+            """, (limit,)) as cursor:
+                top = [dict(row) for row in await cursor.fetchall()]
+        if self._scores is not None:
+            self._top[(kind, limit)] = top
+        return top
+
+    async def get_rank(self, user_id: int) -> dict | None:
+        """Get a user's places by tickets and referrals (ties share a place)."""
+        if self._scores is None:
+            async with self._loading:
+                if self._scores is None:
+                    await self._load()
+        async with self._read() as db:
+            async with db.execute(
+                "SELECT tickets, referrals FROM users WHERE user_id = ?", (user_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+        if not row:
+            return None
+        return {
+            "tickets": self._scores["tickets"].count_above(row['tickets']) + 1,
+            "referrals": self._scores["referrals"].count_above(row['referrals']) + 1,
+            "total": len(self._scores["tickets"]),
+        }
@@ -0,0 +1,91 @@
+"""Moderation repository - blocklist terms and wishes held for review."""
+import json
+
+from data.repositories.base import BaseRepository
+
+
+class ModerationRepository(BaseRepository):
+    """Repository for the wish blocklist and the review queue."""
+
+    async def get_blocklist_terms(self) -> list[str]:
+        """Get all blocklist terms."""
+        async with self._read() as db:
+            async with db.execute("SELECT term FROM blocklist") as cursor:
+                return [row[0] for row in await cursor.fetchall()]
+
+    async def add_blocklist_terms(self, terms: list[str]) -> int:
+        """Add terms, ignoring existing ones. Returns the number added."""
+        async with self._write() as db:
+            before = db.total_changes
+            await db.executemany(
+                "INSERT OR IGNORE INTO blocklist (term) VALUES (?)",
+                [(term,) for term in terms]
+            )
+            await db.commit()
+            return db.total_changes - before
+
+    async def remove_blocklist_terms(self, terms: list[str]) -> int:
+        """Remove terms. Returns the number removed."""
+        async with self._write() as db:
+            cursor = await db.execute(
+                "DELETE FROM blocklist WHERE term IN (SELECT value FROM json_each(?))",
+                (json.dumps(terms),)
+            )
+            await db.commit()
+            return cursor.rowcount
+
+    async def hold_wish(self, user_id: int, text: str, matches: list[str]) -> int | None:
+        """Put a wish on hold. Returns its ID or None if the user already has one held."""
+        async with self._write() as db:
+            cursor = await db.execute(
+                "INSERT OR IGNORE INTO held_wishes (user_id, text, matches) VALUES (?, ?, ?)",
+                (user_id, text, json.dumps(matches, ensure_ascii=False))
+            )
+            await db.commit()
+            return cursor.lastrowid if cursor.rowcount else None
+
+    async def get_held_wish(self, held_id: int) -> dict | None:
+        """Get a held wish with the author's username."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT h.*, u.username
+                FROM held_wishes h
+                LEFT JOIN users u ON u.user_id = h.user_id
+                WHERE h.id = ?
+            """, (held_id,)) as cursor:
+                row = await cursor.fetchone()
+                return dict(row) if row else None
+
+    async def get_user_held_wish(self, user_id: int):
+        """Get the user's wish waiting for review."""
+        async with self._read() as db:
+            async with db.execute(
+                "SELECT * FROM held_wishes WHERE user_id = ?", (user_id,)
+            ) as cursor:
+                return await cursor.fetchone()
+
+    async def get_held_wishes(self, limit: int) -> list[dict]:
+        """Get the oldest held wishes with authors' usernames."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT h.*, u.username
+                FROM held_wishes h
+                LEFT JOIN users u ON u.user_id = h.user_id
+                ORDER BY h.id
+                LIMIT ?
+            """, (limit,)) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+
+    async def count_held_wishes(self) -> int:
+        """Get the number of wishes waiting for review."""
+        async with self._read() as db:
+            async with db.execute("SELECT COUNT(*) FROM held_wishes") as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else 0
+
+    async def delete_held_wish(self, held_id: int) -> bool:
+        """Remove a wish from the review queue."""
+        async with self._write() as db:
+            cursor = await db.execute("DELETE FROM held_wishes WHERE id = ?", (held_id,))
+            await db.commit()
+            return cursor.rowcount > 0
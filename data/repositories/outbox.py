@@ -0,0 +1,115 @@
+"""Outbox repository - messages to send, queued in the transaction that causes them.
+
+Repositories call ``enqueue`` on their own connection before ``COMMIT``,
+so a message exists if and only if the change it announces does; the
+dispatcher (``utils.outbox``) sends it afterwards, retrying until it is
+delivered or fails for good. Every message has an idempotency key (e.g.
+``wish_post:<wish_id>``): queuing the same key again is a no-op, and sent
+rows are kept for ``SENT_RETENTION`` seconds so late duplicates are still
+recognised.
+
+Delivery is at least once: a message sent right before a crash, whose
+result was not recorded yet, is sent again after the restart.
+"""
+import asyncio
+import json
+import time
+
+from data.repositories.base import BaseRepository
+
+# Sent messages are kept this long to deduplicate keys
+SENT_RETENTION = 7 * 24 * 3600
+
+_ENQUEUE = """
+    INSERT INTO outbox (key, kind, chat_id, payload, created_at, next_attempt_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (key) DO NOTHING
+"""
+
+
+async def enqueue(db, key: str, kind: str, chat_id: int, payload: dict) -> None:
+    """Queue a message on the caller's connection, to commit with its change.
+
+    Call the repository's ``wake`` after the commit to send it right away.
+    """
+    now = time.time()
+    await db.execute(_ENQUEUE, (key, kind, chat_id, json.dumps(payload, ensure_ascii=False), now, now))
+
+
+class OutboxRepository(BaseRepository):
+    """Repository for the outbox of pending messages."""
+
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        # Set after a commit that queued messages; the dispatcher waits on it
+        self.queued = asyncio.Event()
+
+    def wake(self) -> None:
+        """Tell the dispatcher that new messages were committed."""
+        self.queued.set()
+
+    async def get_due(self, limit: int) -> list[dict]:
+        """Pending messages whose next attempt is due, oldest first.
+
+        Chats with a postponed message get nothing until it is due, so
+        messages queued after it don't overtake it.
+        """
+        now = time.time()
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT id, key, kind, chat_id, payload, created_at, attempts FROM outbox
+                WHERE status = 'pending' AND next_attempt_at <= ? AND chat_id NOT IN (
+                    SELECT chat_id FROM outbox WHERE status = 'pending' AND next_attempt_at > ?
+                )
+                ORDER BY next_attempt_at, id LIMIT ?
+            """, (now, now, limit)) as cursor:
+                return [
+                    {**dict(row), 'payload': json.loads(row['payload'])}
+                    for row in await cursor.fetchall()
+                ]
+
+    async def save_results(self, sent: list[int], retries: list[tuple[int, float, str, bool]],
+                           failed: list[tuple[int, str]]) -> None:
+        """Record the outcome of a dispatched batch in one transaction.
+
+        ``retries`` are ``(id, next_attempt_at, error, counts_as_attempt)``;
+        flood control waits don't use up attempts.
+        """
+        now = time.time()
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.executemany(
+                    "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1, error = NULL "
+                    "WHERE id = ?",
+                    [(now, message_id) for message_id in sent]
+                )
+                await db.executemany(
+                    "UPDATE outbox SET next_attempt_at = ?, error = ?, attempts = attempts + ? WHERE id = ?",
+                    [(at, error, int(counted), message_id) for message_id, at, error, counted in retries]
+                )
+                await db.executemany(
+                    "UPDATE outbox SET status = 'failed', attempts = attempts + 1, error = ? WHERE id = ?",
+                    [(error, message_id) for message_id, error in failed]
+                )
+                await db.execute("COMMIT")
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+
+    async def get_counts(self) -> dict:
+        """Number of messages per status: ``{"pending": ..., "sent": ..., "failed": ...}``."""
+        async with self._read() as db:
+            async with db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status") as cursor:
+                counts = {"pending": 0, "sent": 0, "failed": 0}
+                counts.update({row[0]: row[1] for row in await cursor.fetchall()})
+                return counts
+
+    async def purge_sent(self, older_than: float = SENT_RETENTION) -> int:
+        """Delete messages sent more than ``older_than`` seconds ago. Returns the number deleted."""
+        async with self._write() as db:
+            cursor = await db.execute(
+                "DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (time.time() - older_than,)
+            )
+            await db.commit()
+            return cursor.rowcount
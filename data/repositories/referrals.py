@@ -0,0 +1,77 @@
+"""Referral repository - referral graph snapshots and flagged referrers."""
+import json
+
+from data.repositories.base import BaseRepository
+
+# Rows fetched per round trip to the aiosqlite thread while loading the graph
+GRAPH_CHUNK_SIZE = 50_000
+
+
+class ReferralRepository(BaseRepository):
+    """Repository for referral fraud analysis."""
+
+    async def load_graph(self):
+        """Load all users as a ``ReferralGraph`` with one scan in ``user_id`` order."""
+        from utils.referral_graph import ReferralGraph
+
+        graph = ReferralGraph()
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT u.user_id, u.referrer_id,
+                       CAST(ROUND((julianday(u.created_at) - 2440587.5) * 86400) AS INTEGER),
+                       CAST(ROUND((julianday(w.created_at) - julianday(u.created_at)) * 86400) AS INTEGER),
+                       u.username
+                FROM users u
+                LEFT JOIN wishes w ON w.user_id = u.user_id
+                ORDER BY u.user_id
+            """) as cursor:
+                while rows := await cursor.fetchmany(GRAPH_CHUNK_SIZE):
+                    graph.extend(rows)
+            async with db.execute("""
+                SELECT w.user_id, o.user_id
+                FROM wish_signatures s
+                JOIN wishes w ON w.id = s.wish_id
+                JOIN wishes o ON o.id = s.duplicate_of
+                WHERE s.duplicate_of IS NOT NULL
+            """) as cursor:
+                graph.set_duplicate_clusters(await cursor.fetchall())
+        return graph
+
+    async def save_suspicious(self, rows: list[dict]) -> None:
+        """Replace the flagged referrers with a new analysis result."""
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.execute("DELETE FROM suspicious_referrers")
+                await db.executemany("""
+                    INSERT INTO suspicious_referrers (
+                        user_id, score, referrals, wished_referrals, subtree_size, depth,
+                        max_burst, quick_share, signal_share, cluster_id, cluster_size, reasons
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        row['user_id'], row['score'], row['referrals'], row['wished_referrals'],
+                        row['subtree_size'], row['depth'], row['max_burst'], row['quick_share'],
+                        row['signal_share'], row['cluster_id'], row['cluster_size'], json.dumps(row['reasons'])
+                    )
+                    for row in rows
+                ])
+                await db.execute("COMMIT")
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+
+    async def get_suspicious(self, limit: int | None = None) -> list[dict]:
+        """Get flagged referrers with usernames, highest score first."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT s.*, u.username
+                FROM suspicious_referrers s
+                LEFT JOIN users u ON u.user_id = s.user_id
+                ORDER BY s.score DESC, s.referrals DESC
+                LIMIT ?
+            """, (-1 if limit is None else limit,)) as cursor:
+                return [
+                    {**dict(row), 'reasons': json.loads(row['reasons'])}
+                    for row in await cursor.fetchall()
+                ]
@@ -1,33 +1,58 @@
 """Settings repository - handles key-value settings storage."""
 from data.repositories.base import BaseRepository
+from utils.metrics import CACHE
 
 
 class SettingsRepository(BaseRepository):
-    """Repository for bot settings."""
+    """Repository for bot settings.
+    
+    Values are cached in memory after the first read; the bot is the only
+    writer, so the cache is updated on every set/delete.
+    """
+    
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        self._cache: dict[str, str | None] = {}
+    
+    async def load_all(self) -> int:
+        """Load all settings into the cache. Returns the number of rows."""
+        async with self._read() as db:
+            async with db.execute("SELECT key, value FROM settings") as cursor:
+                rows = await cursor.fetchall()
+        self._cache = {row[0]: row[1] for row in rows}
+        return len(rows)
     
     async def get_setting(self, key: str) -> str | None:
         """Get a setting value by key."""
-        async with self._get_connection() as db:
+        if key in self._cache:
+            CACHE.inc("settings", "hit")
+            return self._cache[key]
+        CACHE.inc("settings", "miss")
+        async with self._read() as db:
             async with db.execute(
                 "SELECT value FROM settings WHERE key = ?", (key,)
             ) as cursor:
                 row = await cursor.fetchone()
-                return row[0] if row else None
+                value = row[0] if row else None
+        self._cache[key] = value
+        return value
     
     async def set_setting(self, key: str, value: str):
         """Set a setting value."""
-        async with self._get_connection() as db:
+        async with self._write() as db:
             await db.execute(
                 "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
                 (key, value)
             )
             await db.commit()
+        self._cache[key] = value
     
     async def delete_setting(self, key: str):
         """Delete a setting."""
-        async with self._get_connection() as db:
+        async with self._write() as db:
             await db.execute("DELETE FROM settings WHERE key = ?", (key,))
             await db.commit()
+        self._cache[key] = None
     
     # Convenience methods for common settings
     
@@ -52,12 +77,3 @@ class SettingsRepository(BaseRepository):
     async def set_bot_enabled(self, enabled: bool):
         """Set bot enabled status."""
         await self.set_setting("bot_enabled", "true" if enabled else "false")
-    
-    async def get_last_broadcast_time(self) -> float | None:
-        """Get last broadcast timestamp."""
-        value = await self.get_setting("last_broadcast_time")
-        return float(value) if value else None
-    
-    async def set_last_broadcast_time(self, timestamp: float):
-        """Set last broadcast timestamp."""
-        await self.set_setting("last_broadcast_time", str(timestamp))
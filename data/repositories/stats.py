@@ -1,27 +1,51 @@
 """Stats repository - handles statistics and data export queries."""
 from data.repositories.base import BaseRepository
 
+# Rollup bucket of a DATETIME column or of 'now'
+HOUR_FORMAT = "%Y-%m-%d %H:00:00"
+HOURLY_COLUMNS = ("signups", "wishes", "referral_conversions", "tickets_granted")
+
+_HOURLY_UPSERT = f"""
+    INSERT INTO hourly_stats (hour, signups, wishes, referral_conversions, tickets_granted)
+    VALUES (COALESCE(?, strftime('{HOUR_FORMAT}', 'now')), ?, ?, ?, ?)
+    ON CONFLICT (hour) DO UPDATE SET
+        signups = signups + excluded.signups,
+        wishes = wishes + excluded.wishes,
+        referral_conversions = referral_conversions + excluded.referral_conversions,
+        tickets_granted = tickets_granted + excluded.tickets_granted
+"""
+
+
+async def record_hourly(db, hour: str | None = None, signups: int = 0, wishes: int = 0,
+                        referral_conversions: int = 0, tickets_granted: int = 0) -> None:
+    """Add deltas to an hourly rollup row (the current hour by default).
+    
+    Runs on the caller's connection, so the rollup commits together with
+    the change it counts.
+    """
+    await db.execute(_HOURLY_UPSERT, (hour, signups, wishes, referral_conversions, tickets_granted))
+
 
 class StatsRepository(BaseRepository):
     """Repository for statistics and exports."""
     
     async def get_users_count(self) -> int:
         """Get total user count."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute("SELECT COUNT(*) FROM users") as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
     
     async def get_wishes_count(self) -> int:
         """Get total wishes count."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute("SELECT COUNT(*) FROM wishes") as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
     
     async def get_all_participants_data(self):
         """Get all participants with wishes for export."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             query = """
                 SELECT u.user_id, u.username, w.text, u.tickets
                 FROM users u
@@ -30,3 +54,45 @@ class StatsRepository(BaseRepository):
             """
             async with db.execute(query) as cursor:
                 return await cursor.fetchall()
+    
+    async def get_hourly_stats(self, since: str, until: str) -> list[dict]:
+        """Get hourly rollups for ``since <= hour < until`` (UTC, hours without events omitted)."""
+        async with self._read() as db:
+            async with db.execute(
+                "SELECT * FROM hourly_stats WHERE hour >= ? AND hour < ? ORDER BY hour",
+                (since, until)
+            ) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    
+    async def rebuild_hourly_stats(self) -> int:
+        """Recompute the hourly rollups from users and wishes. Returns the number of hours.
+        
+        Admin ticket grants aren't stored anywhere else, so a rebuild only
+        keeps the tickets awarded for wishes and referrals.
+        """
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.execute("DELETE FROM hourly_stats")
+                await db.execute(f"""
+                    INSERT INTO hourly_stats (hour, signups, wishes, referral_conversions, tickets_granted)
+                    SELECT hour, SUM(signups), SUM(wishes), SUM(conversions), SUM(wishes) + SUM(conversions)
+                    FROM (
+                        SELECT strftime('{HOUR_FORMAT}', created_at) AS hour,
+                               1 AS signups, 0 AS wishes, 0 AS conversions
+                        FROM users
+                        UNION ALL
+                        SELECT strftime('{HOUR_FORMAT}', w.created_at), 0, 1, u.referrer_id IS NOT NULL
+                        FROM wishes w
+                        JOIN users u ON u.user_id = w.user_id
+                    )
+                    WHERE hour IS NOT NULL
+                    GROUP BY hour
+                """)
+                async with db.execute("SELECT COUNT(*) FROM hourly_stats") as cursor:
+                    hours = (await cursor.fetchone())[0]
+                await db.execute("COMMIT")
+                return hours
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
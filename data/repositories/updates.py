@@ -0,0 +1,40 @@
+"""Update journal - updates whose handlers a shutdown cut off.
+
+aiogram confirms an update to Telegram with the next ``getUpdates`` call,
+usually while its handler is still running, so Telegram won't redeliver
+it. When the shutdown deadline expires, ``utils.shutdown`` saves the raw
+updates still being handled here; the next instance takes them back and
+handles them again before polling.
+"""
+import json
+
+from data.repositories.base import BaseRepository
+
+
+class UpdateJournalRepository(BaseRepository):
+    """Repository for unfinished updates handed over between instances."""
+
+    async def save(self, updates: list[dict]) -> None:
+        """Save raw updates (as sent by Telegram); an update saved twice is kept once."""
+        async with self._write() as db:
+            await db.executemany(
+                "INSERT OR REPLACE INTO unfinished_updates (update_id, payload) VALUES (?, ?)",
+                [(update["update_id"], json.dumps(update, ensure_ascii=False)) for update in updates]
+            )
+            await db.commit()
+
+    async def take(self) -> list[dict]:
+        """Remove and return all saved updates, oldest first."""
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                async with db.execute(
+                    "SELECT payload FROM unfinished_updates ORDER BY update_id"
+                ) as cursor:
+                    updates = [json.loads(row[0]) for row in await cursor.fetchall()]
+                await db.execute("DELETE FROM unfinished_updates")
+                await db.execute("COMMIT")
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+            return updates
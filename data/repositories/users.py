@@ -1,14 +1,44 @@
 """User repository - handles all user-related database operations."""
+import time
+from collections import OrderedDict
+
 import aiosqlite
 from data.repositories.base import BaseRepository
+from data.repositories.events import EventRepository
+from data.repositories.leaderboard import LeaderboardRepository
+from data.repositories.outbox import OutboxRepository, enqueue
+from data.repositories.stats import record_hourly
+from utils.metrics import CACHE
+
+# Username search results are cached per prefix for a short time (ticket
+# counts in them may lag by that much); a new or renamed user drops the
+# cached prefixes of their name
+PREFIX_CACHE_TTL = 30.0
+PREFIX_CACHE_SIZE = 256
+
+
+def normalize_username(username: str | None) -> str | None:
+    """Lookup key of a username: without ``@``, lowercase (``users.username_key``)."""
+    if not username:
+        return None
+    return username.strip().lstrip("@").lower() or None
 
 
 class UserRepository(BaseRepository):
     """Repository for user operations."""
     
+    def __init__(self, db_path: str = None, leaderboard: LeaderboardRepository = None,
+                 events: EventRepository = None, outbox: OutboxRepository = None):
+        super().__init__(db_path)
+        self.leaderboard = leaderboard or LeaderboardRepository(self.db_path)
+        self.events = events or EventRepository(self.db_path)
+        self.outbox = outbox or OutboxRepository(self.db_path)
+        # prefix -> (cached at, limit queried with, matching users)
+        self._prefixes: OrderedDict[str, tuple[float, int, list[dict]]] = OrderedDict()
+    
     async def get_user(self, user_id: int):
         """Get user by ID."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute(
                 "SELECT * FROM users WHERE user_id = ?", (user_id,)
             ) as cursor:
@@ -19,7 +49,7 @@ class UserRepository(BaseRepository):
         
         Validates referrer exists before saving.
         """
-        async with self._get_connection() as db:
+        async with self._write() as db:
             # Validate referrer exists
             valid_referrer_id = None
             if referrer_id is not None:
@@ -29,65 +59,132 @@ class UserRepository(BaseRepository):
                     if await cursor.fetchone():
                         valid_referrer_id = referrer_id
             
-            await db.execute(
-                "INSERT OR IGNORE INTO users (user_id, username, referrer_id) VALUES (?, ?, ?)",
-                (user_id, username, valid_referrer_id)
+            cursor = await db.execute(
+                "INSERT OR IGNORE INTO users (user_id, username, username_key, referrer_id) VALUES (?, ?, ?, ?)",
+                (user_id, username, normalize_username(username), valid_referrer_id)
             )
+            if cursor.rowcount:
+                await record_hourly(db, signups=1)
             await db.commit()
+        if cursor.rowcount:
+            self._forget_prefixes(username)
+            self.leaderboard.record([("tickets", None, 0), ("referrals", None, 0)])
+            self.events.record(
+                user_id, "user_created", user_id,
+                details={"referrer_id": valid_referrer_id} if valid_referrer_id else None
+            )
     
     async def update_username(self, user_id: int, username: str):
         """Update user's username."""
-        async with self._get_connection() as db:
+        async with self._write() as db:
             await db.execute(
-                "UPDATE users SET username = ? WHERE user_id = ?",
-                (username, user_id)
+                "UPDATE users SET username = ?, username_key = ? WHERE user_id = ?",
+                (username, normalize_username(username), user_id)
             )
             await db.commit()
+        self._forget_prefixes(username, user_id)
     
     async def find_user_by_username(self, username: str):
-        """Find user by username (case-insensitive, without @)."""
-        clean_username = username.lstrip("@")
-        async with self._get_connection() as db:
+        """Find user by username (case-insensitive, with or without @)."""
+        key = normalize_username(username)
+        if key is None:
+            return None
+        async with self._read() as db:
             async with db.execute(
-                "SELECT * FROM users WHERE LOWER(username) = LOWER(?)", 
-                (clean_username,)
+                "SELECT * FROM users WHERE username_key = ?", (key,)
             ) as cursor:
                 return await cursor.fetchone()
     
-    async def add_tickets_to_user(self, user_id: int, count: int) -> int | None:
-        """Add tickets to user. Returns new ticket count or None if user not found."""
-        async with self._get_connection() as db:
-            async with db.execute(
-                "SELECT * FROM users WHERE user_id = ?", (user_id,)
-            ) as cursor:
-                if not await cursor.fetchone():
+    async def search_by_username_prefix(self, prefix: str, limit: int = 20) -> list[dict]:
+        """Users whose username starts with ``prefix`` (case-insensitive), alphabetically.
+        
+        A range scan of the ``username_key`` index; results are cached per
+        prefix for ``PREFIX_CACHE_TTL`` seconds.
+        """
+        key = normalize_username(prefix)
+        if key is None:
+            return []
+        cached = self._prefixes.get(key)
+        if cached and cached[0] > time.monotonic() - PREFIX_CACHE_TTL and cached[1] >= limit:
+            CACHE.inc("username_prefix", "hit")
+            self._prefixes.move_to_end(key)
+            return cached[2][:limit]
+        CACHE.inc("username_prefix", "miss")
+        # Every key starting with the prefix sorts in [prefix, prefix with its last character bumped)
+        upper = key[:-1] + chr(ord(key[-1]) + 1)
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT user_id, username, tickets, referrals, has_wished FROM users
+                WHERE username_key >= ? AND username_key < ?
+                ORDER BY username_key
+                LIMIT ?
+            """, (key, upper, limit)) as cursor:
+                users = [dict(row) for row in await cursor.fetchall()]
+        self._prefixes[key] = (time.monotonic(), limit, users)
+        self._prefixes.move_to_end(key)
+        if len(self._prefixes) > PREFIX_CACHE_SIZE:
+            self._prefixes.popitem(last=False)
+        return users
+    
+    def _forget_prefixes(self, username: str | None, user_id: int = None) -> None:
+        """Drop cached searches that a new or renamed user appears or would appear in."""
+        key = normalize_username(username) or ""
+        stale = [
+            prefix for prefix, (_, _, users) in self._prefixes.items()
+            if (key and key.startswith(prefix)) or any(user['user_id'] == user_id for user in users)
+        ]
+        for prefix in stale:
+            del self._prefixes[prefix]
+    
+    async def add_tickets_to_user(self, user_id: int, count: int, actor_id: int = None,
+                                  notify_key: str = None, comment: str = None) -> int | None:
+        """Add tickets to user. Returns new ticket count or None if user not found.
+        
+        ``actor_id`` is the admin who granted them, for the audit log. With
+        ``notify_key`` a ``tickets_granted`` notification (``count``, the new
+        ``total`` and the admin's ``comment``) is queued for the user in the
+        same transaction; the key makes a repeated grant request notify once.
+        """
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                async with db.execute(
+                    "UPDATE users SET tickets = tickets + ? WHERE user_id = ? RETURNING tickets",
+                    (count, user_id)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if not row:
+                    await db.execute("ROLLBACK")
                     return None
-            
-            await db.execute(
-                "UPDATE users SET tickets = tickets + ? WHERE user_id = ?",
-                (count, user_id)
-            )
-            await db.commit()
-            
-            async with db.execute(
-                "SELECT tickets FROM users WHERE user_id = ?", (user_id,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return row['tickets'] if row else None
+                
+                await record_hourly(db, tickets_granted=count)
+                if notify_key:
+                    await enqueue(
+                        db, f"tickets_granted:{notify_key}", "tickets_granted", user_id,
+                        {"count": count, "total": row['tickets'], "comment": comment}
+                    )
+                await db.execute("COMMIT")
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+        self.leaderboard.record([("tickets", row['tickets'] - count, row['tickets'])])
+        self.events.record(actor_id, "tickets_granted", user_id, count)
+        if notify_key:
+            self.outbox.wake()
+        return row['tickets']
     
     async def get_referral_count(self, user_id: int) -> int:
         """Get count of referrals who have left a wish (earn tickets)."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute(
-                "SELECT COUNT(*) FROM users WHERE referrer_id = ? AND has_wished = TRUE", 
-                (user_id,)
+                "SELECT referrals FROM users WHERE user_id = ?", (user_id,)
             ) as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
     
     async def get_total_referrals(self, user_id: int) -> int:
         """Get total count of invited users (regardless of wish status)."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute(
                 "SELECT COUNT(*) FROM users WHERE referrer_id = ?", 
                 (user_id,)
@@ -1,18 +1,95 @@
 """Wishes repository - handles all wish-related database operations."""
+import asyncio
+import json
+from dataclasses import asdict, dataclass
+
 import aiosqlite
 from data.repositories.base import BaseRepository
+from data.repositories.events import EventRepository
+from data.repositories.leaderboard import LeaderboardRepository
+from data.repositories.outbox import OutboxRepository, enqueue
+from data.repositories.stats import HOUR_FORMAT, record_hourly
+from data.repositories.users import normalize_username
+from utils.minhash import BANDS, SIMILARITY_THRESHOLD, band_keys, pack, signature, similarity, unpack
+
+# Candidates taken from one LSH bucket; very common wishes fill huge
+# buckets, and the oldest few are enough to link a new copy to them
+BUCKET_SAMPLE = 20
+_CANDIDATES_SQL = " UNION ".join(
+    f"SELECT wish_id FROM (SELECT wish_id FROM wish_lsh WHERE band = ? AND bucket = ? LIMIT {BUCKET_SAMPLE})"
+    for _ in range(BANDS)
+)
+
+
+@dataclass(frozen=True, slots=True)
+class BulkSelection:
+    """Wishes selected for a bulk reset.
+
+    Matches wishes of the listed users (IDs or case-insensitive usernames)
+    and/or wishes created in ``[created_from, created_to)`` (UTC,
+    ``YYYY-MM-DD HH:MM:SS``) by accounts that wished less than
+    ``max_account_age`` seconds after their first ``/start``.
+    """
+    user_ids: tuple[int, ...] = ()
+    usernames: tuple[str, ...] = ()
+    created_from: str | None = None
+    created_to: str | None = None
+    max_account_age: int | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BulkSelection":
+        return cls(**{**data, "user_ids": tuple(data["user_ids"]), "usernames": tuple(data["usernames"])})
+
+    def where(self) -> tuple[str, list]:
+        """SQL condition over ``users u JOIN wishes w`` and its parameters."""
+        if not (self.user_ids or self.usernames or self.created_from or self.created_to):
+            raise ValueError("Bulk selection needs a user list or a time window")
+        conditions = ["u.has_wished"]
+        params = []
+        if self.user_ids or self.usernames:
+            conditions.append(
+                "(u.user_id IN (SELECT value FROM json_each(?)) "
+                "OR u.username_key IN (SELECT value FROM json_each(?)))"
+            )
+            keys = [key for key in map(normalize_username, self.usernames) if key]
+            params += [json.dumps(self.user_ids), json.dumps(keys)]
+        if self.created_from:
+            conditions.append("w.created_at >= ?")
+            params.append(self.created_from)
+        if self.created_to:
+            conditions.append("w.created_at < ?")
+            params.append(self.created_to)
+        if self.max_account_age is not None:
+            conditions.append("(julianday(w.created_at) - julianday(u.created_at)) * 86400 < ?")
+            params.append(self.max_account_age)
+        return " AND ".join(conditions), params
 
 
 class WishRepository(BaseRepository):
     """Repository for wish operations."""
     
-    async def add_wish(self, user_id: int, text: str) -> bool:
+    def __init__(self, db_path: str = None, leaderboard: LeaderboardRepository = None,
+                 events: EventRepository = None, outbox: OutboxRepository = None):
+        super().__init__(db_path)
+        self.leaderboard = leaderboard or LeaderboardRepository(self.db_path)
+        self.events = events or EventRepository(self.db_path)
+        self.outbox = outbox or OutboxRepository(self.db_path)
+    
+    async def add_wish(self, user_id: int, text: str, publish_to: int = None, notify_user: bool = False) -> bool:
         """Add a wish with atomic ticket allocation.
         
         Uses transaction to ensure data consistency.
+        The wish is indexed for near-duplicate search in the same transaction,
+        and the messages it causes are queued in the outbox: a ``wish_post``
+        to the ``publish_to`` chat and, with ``notify_user``, a
+        ``wish_approved`` notification to the author.
         Returns True if wish added, False if user already has a wish.
         """
-        async with self._get_connection() as db:
+        sig = signature(text)
+        async with self._write() as db:
             await db.execute("BEGIN IMMEDIATE")
             
             try:
@@ -30,10 +107,12 @@ class WishRepository(BaseRepository):
                     return False
                 
                 # Save wish
-                await db.execute(
+                cursor = await db.execute(
                     "INSERT INTO wishes (user_id, text) VALUES (?, ?)", 
                     (user_id, text)
                 )
+                wish_id = cursor.lastrowid
+                await self._index_wish(db, wish_id, sig)
                 
                 # Update user tickets and status
                 await db.execute(
@@ -41,15 +120,42 @@ class WishRepository(BaseRepository):
                     (user_id,)
                 )
                 
+                changes = [("tickets", user['tickets'], user['tickets'] + 1)]
+                
                 # Award referrer bonus if exists
                 referrer_id = user['referrer_id']
+                referrer = None
                 if referrer_id:
-                    await db.execute(
-                        "UPDATE users SET tickets = tickets + 1 WHERE user_id = ?", 
+                    async with db.execute(
+                        "UPDATE users SET tickets = tickets + 1, referrals = referrals + 1 "
+                        "WHERE user_id = ? RETURNING tickets, referrals",
                         (referrer_id,)
+                    ) as cursor:
+                        referrer = await cursor.fetchone()
+                    if referrer:
+                        changes += [
+                            ("tickets", referrer['tickets'] - 1, referrer['tickets']),
+                            ("referrals", referrer['referrals'] - 1, referrer['referrals']),
+                        ]
+                
+                converted = 1 if referrer_id else 0
+                await record_hourly(db, wishes=1, referral_conversions=converted, tickets_granted=1 + converted)
+                
+                if publish_to:
+                    await enqueue(
+                        db, f"wish_post:{wish_id}", "wish_post", publish_to,
+                        {"user_id": user_id, "username": user['username'], "text": text}
                     )
+                if notify_user:
+                    await enqueue(db, f"wish_approved:{wish_id}", "wish_approved", user_id, {})
                 
                 await db.execute("COMMIT")
+                self.leaderboard.record(changes)
+                self.events.record(user_id, "wish_added", user_id, 1, {"wish_id": wish_id})
+                if referrer:
+                    self.events.record(user_id, "referral_bonus", referrer_id, 1)
+                if publish_to or notify_user:
+                    self.outbox.wake()
                 return True
                 
             except Exception as e:
@@ -58,7 +164,7 @@ class WishRepository(BaseRepository):
     
     async def get_user_wish(self, user_id: int):
         """Get user's wish."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute(
                 "SELECT * FROM wishes WHERE user_id = ?", (user_id,)
             ) as cursor:
@@ -66,7 +172,7 @@ class WishRepository(BaseRepository):
     
     async def get_random_wish(self):
         """Get a random wish with user info."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute("""
                 SELECT w.text, u.username, u.user_id 
                 FROM wishes w 
@@ -77,15 +183,18 @@ class WishRepository(BaseRepository):
     
     async def find_wish_by_text(self, text: str):
         """Find wish by exact text match."""
-        async with self._get_connection() as db:
+        async with self._read() as db:
             async with db.execute(
                 "SELECT * FROM wishes WHERE text = ?", (text,)
             ) as cursor:
                 return await cursor.fetchone()
     
-    async def reset_wish(self, user_id: int) -> bool:
-        """Reset user's wish and deduct tickets atomically."""
-        async with self._get_connection() as db:
+    async def reset_wish(self, user_id: int, actor_id: int = None) -> bool:
+        """Reset user's wish and deduct tickets atomically.
+        
+        ``actor_id`` is the admin who reset it, for the audit log.
+        """
+        async with self._write() as db:
             await db.execute("BEGIN IMMEDIATE")
             try:
                 async with db.execute(
@@ -97,7 +206,20 @@ class WishRepository(BaseRepository):
                     await db.execute("ROLLBACK")
                     return False
                 
-                # Delete wish
+                async with db.execute(
+                    f"SELECT strftime('{HOUR_FORMAT}', created_at) FROM wishes WHERE user_id = ?", (user_id,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                    wish_hour = row[0] if row else None
+                
+                # Delete wish and its similarity index entries
+                await db.execute(
+                    "DELETE FROM wish_lsh WHERE wish_id IN (SELECT id FROM wishes WHERE user_id = ?)", (user_id,)
+                )
+                await db.execute(
+                    "DELETE FROM wish_signatures WHERE wish_id IN (SELECT id FROM wishes WHERE user_id = ?)",
+                    (user_id,)
+                )
                 await db.execute("DELETE FROM wishes WHERE user_id = ?", (user_id,))
                 
                 # Deduct 1 ticket from user
@@ -106,20 +228,266 @@ class WishRepository(BaseRepository):
                     (user_id,)
                 )
                 
+                changes = [("tickets", user['tickets'], max(0, user['tickets'] - 1))]
+                
                 # Deduct 1 ticket from referrer if exists
+                referrer = None
                 if user['referrer_id']:
-                    await db.execute(
-                        "UPDATE users SET tickets = MAX(0, tickets - 1) WHERE user_id = ?",
-                        (user['referrer_id'],)
+                    async with db.execute(
+                        "SELECT tickets, referrals FROM users WHERE user_id = ?", (user['referrer_id'],)
+                    ) as cursor:
+                        referrer = await cursor.fetchone()
+                    if referrer:
+                        await db.execute(
+                            "UPDATE users SET tickets = MAX(0, tickets - 1), referrals = MAX(0, referrals - 1) "
+                            "WHERE user_id = ?",
+                            (user['referrer_id'],)
+                        )
+                        changes += [
+                            ("tickets", referrer['tickets'], max(0, referrer['tickets'] - 1)),
+                            ("referrals", referrer['referrals'], max(0, referrer['referrals'] - 1)),
+                        ]
+                
+                # Take the wish back out of the hour it was counted in
+                if wish_hour:
+                    converted = 1 if user['referrer_id'] else 0
+                    await record_hourly(
+                        db, wish_hour, wishes=-1, referral_conversions=-converted, tickets_granted=-1 - converted
                     )
                 
                 await db.execute("COMMIT")
+                self.leaderboard.record(changes)
+                self.events.record(actor_id, "wish_reset", user_id, changes[0][2] - changes[0][1])
+                if referrer:
+                    self.events.record(
+                        actor_id, "referral_revoked", user['referrer_id'], changes[1][2] - changes[1][1],
+                        {"referral_id": user_id}
+                    )
                 return True
             except Exception:
                 await db.execute("ROLLBACK")
                 raise
     
-    async def reset_wish_by_username(self, username: str) -> dict | None:
+    async def preview_bulk_reset(self, selection: BulkSelection) -> dict:
+        """Count wishes and referrer tickets a bulk reset would affect."""
+        where, params = selection.where()
+        async with self._read() as db:
+            async with db.execute(f"""
+                SELECT COUNT(*) AS wishes,
+                       COUNT(DISTINCT u.referrer_id) AS referrers,
+                       COUNT(u.referrer_id) AS referrer_tickets
+                FROM users u
+                JOIN wishes w ON w.user_id = u.user_id
+                WHERE {where}
+            """, params) as cursor:
+                return dict(await cursor.fetchone())
+    
+    async def bulk_reset_wishes(self, selection: BulkSelection, actor_id: int = None) -> list[dict]:
+        """Reset all selected wishes in one transaction.
+        
+        Same effect as ``reset_wish`` for every selected user: the wish is
+        deleted, the user and their referrer lose a ticket each and the
+        referrer loses a referral. Every affected user gets one
+        ``bulk_reset`` event with their total change. Returns the reset
+        rows for the report.
+        """
+        where, params = selection.where()
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                await db.execute("""
+                    CREATE TEMP TABLE bulk_reset (
+                        user_id INTEGER PRIMARY KEY,
+                        username TEXT,
+                        referrer_id INTEGER,
+                        user_created_at DATETIME,
+                        wish_created_at DATETIME,
+                        text TEXT
+                    )
+                """)
+                await db.execute(f"""
+                    INSERT INTO temp.bulk_reset
+                    SELECT u.user_id, u.username, u.referrer_id, u.created_at, w.created_at, w.text
+                    FROM users u
+                    JOIN wishes w ON w.user_id = u.user_id
+                    WHERE {where}
+                """, params)
+                await db.execute("""
+                    CREATE TEMP TABLE bulk_referrers (user_id INTEGER PRIMARY KEY, count INTEGER)
+                """)
+                await db.execute("""
+                    INSERT INTO temp.bulk_referrers
+                    SELECT referrer_id, COUNT(*) FROM temp.bulk_reset
+                    WHERE referrer_id IS NOT NULL
+                    GROUP BY referrer_id
+                """)
+                async with db.execute(
+                    "SELECT * FROM temp.bulk_reset ORDER BY wish_created_at"
+                ) as cursor:
+                    rows = [dict(row) for row in await cursor.fetchall()]
+                
+                # Balances before the reset, for the leaderboard
+                await db.execute("""
+                    CREATE TEMP TABLE bulk_scores AS
+                    SELECT user_id, tickets, referrals FROM users
+                    WHERE user_id IN (SELECT user_id FROM temp.bulk_reset UNION SELECT user_id FROM temp.bulk_referrers)
+                """)
+                await db.execute("""
+                    CREATE TEMP TABLE bulk_wish_ids AS
+                    SELECT id FROM wishes WHERE user_id IN (SELECT user_id FROM temp.bulk_reset)
+                """)
+                await db.execute("DELETE FROM wish_lsh WHERE wish_id IN (SELECT id FROM temp.bulk_wish_ids)")
+                await db.execute("DELETE FROM wish_signatures WHERE wish_id IN (SELECT id FROM temp.bulk_wish_ids)")
+                await db.execute("DELETE FROM wishes WHERE id IN (SELECT id FROM temp.bulk_wish_ids)")
+                await db.execute("""
+                    UPDATE users SET tickets = MAX(0, tickets - 1), has_wished = FALSE
+                    WHERE user_id IN (SELECT user_id FROM temp.bulk_reset)
+                """)
+                await db.execute("""
+                    UPDATE users SET (tickets, referrals) = (
+                        SELECT MAX(0, users.tickets - r.count), MAX(0, users.referrals - r.count)
+                        FROM temp.bulk_referrers r WHERE r.user_id = users.user_id
+                    )
+                    WHERE user_id IN (SELECT user_id FROM temp.bulk_referrers)
+                """)
+                await db.execute(f"""
+                    INSERT INTO hourly_stats (hour, wishes, referral_conversions, tickets_granted)
+                    SELECT strftime('{HOUR_FORMAT}', wish_created_at),
+                           -COUNT(*), -COUNT(referrer_id), -COUNT(*) - COUNT(referrer_id)
+                    FROM temp.bulk_reset
+                    WHERE wish_created_at IS NOT NULL
+                    GROUP BY 1
+                    ON CONFLICT (hour) DO UPDATE SET
+                        wishes = wishes + excluded.wishes,
+                        referral_conversions = referral_conversions + excluded.referral_conversions,
+                        tickets_granted = tickets_granted + excluded.tickets_granted
+                """)
+                async with db.execute("""
+                    SELECT s.user_id, s.tickets, u.tickets, s.referrals, u.referrals,
+                           EXISTS (SELECT 1 FROM temp.bulk_reset r WHERE r.user_id = s.user_id)
+                    FROM temp.bulk_scores s
+                    JOIN users u ON u.user_id = s.user_id
+                """) as cursor:
+                    scores = await cursor.fetchall()
+                changes = []
+                for row in scores:
+                    changes += [("tickets", row[1], row[2]), ("referrals", row[3], row[4])]
+                await db.execute("DROP TABLE temp.bulk_reset")
+                await db.execute("DROP TABLE temp.bulk_referrers")
+                await db.execute("DROP TABLE temp.bulk_wish_ids")
+                await db.execute("DROP TABLE temp.bulk_scores")
+                await db.execute("COMMIT")
+                self.leaderboard.record(changes)
+                for user_id, old_tickets, tickets, old_referrals, referrals, wish_reset in scores:
+                    self.events.record(
+                        actor_id, "bulk_reset", user_id, tickets - old_tickets,
+                        {"wish": bool(wish_reset), "referrals": referrals - old_referrals}
+                    )
+                return rows
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+    
+    async def _index_wish(self, db, wish_id: int, sig) -> int | None:
+        """Store a wish's signature and LSH keys.
+        
+        Links the wish to its most similar earlier wish if that one is a
+        near-duplicate. Returns the linked wish ID.
+        """
+        keys = band_keys(sig)
+        async with db.execute(
+            _CANDIDATES_SQL, [value for band, key in enumerate(keys) for value in (band, key)]
+        ) as cursor:
+            candidate_ids = [row[0] for row in await cursor.fetchall() if row[0] < wish_id]
+        
+        duplicate_of, best = None, 0.0
+        if candidate_ids:
+            async with db.execute(
+                f"SELECT wish_id, signature FROM wish_signatures "
+                f"WHERE wish_id IN ({','.join('?' * len(candidate_ids))})",
+                candidate_ids
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    score = similarity(sig, unpack(row[1]))
+                    if score >= SIMILARITY_THRESHOLD and score > best:
+                        duplicate_of, best = row[0], score
+        
+        await db.execute(
+            "INSERT OR REPLACE INTO wish_signatures (wish_id, signature, duplicate_of, similarity) "
+            "VALUES (?, ?, ?, ?)",
+            (wish_id, pack(sig), duplicate_of, best if duplicate_of else None)
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO wish_lsh (band, bucket, wish_id) VALUES (?, ?, ?)",
+            [(band, key, wish_id) for band, key in enumerate(keys)]
+        )
+        return duplicate_of
+    
+    async def index_unsigned_wishes(self, after_id: int, batch_size: int) -> int | None:
+        """Index wishes with ``id > after_id`` that have no signature yet.
+        
+        Backfills the similarity index for wishes saved before it existed.
+        Returns the last scanned wish ID, or None when nothing is left.
+        """
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT w.id, w.text FROM wishes w
+                WHERE w.id > ? AND NOT EXISTS (SELECT 1 FROM wish_signatures s WHERE s.wish_id = w.id)
+                ORDER BY w.id
+                LIMIT ?
+            """, (after_id, batch_size)) as cursor:
+                rows = await cursor.fetchall()
+        if not rows:
+            return None
+        
+        # Signatures are pure CPU work, keep it off the event loop and the writer
+        signatures = await asyncio.to_thread(lambda: [signature(row[1] or "") for row in rows])
+        async with self._write() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                # Skip wishes reset while the signatures were computed
+                async with db.execute(
+                    "SELECT id FROM wishes WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([row[0] for row in rows]),)
+                ) as cursor:
+                    existing = {row[0] for row in await cursor.fetchall()}
+                for row, sig in zip(rows, signatures):
+                    if row[0] in existing:
+                        await self._index_wish(db, row[0], sig)
+                await db.execute("COMMIT")
+            except Exception:
+                await db.execute("ROLLBACK")
+                raise
+            return rows[-1][0]
+    
+    async def get_near_duplicates(self) -> list[dict]:
+        """Get wishes linked to an earlier near-duplicate, with authors and referrers."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT s.wish_id, s.duplicate_of, s.similarity, w.text,
+                       u.user_id, u.username, u.referrer_id, r.username AS referrer_username
+                FROM wish_signatures s
+                JOIN wishes w ON w.id = s.wish_id
+                JOIN users u ON u.user_id = w.user_id
+                LEFT JOIN users r ON r.user_id = u.referrer_id
+                WHERE s.duplicate_of IS NOT NULL
+            """) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    
+    async def get_wishes_by_ids(self, wish_ids: list[int]) -> list[dict]:
+        """Get wishes with authors and referrers by wish IDs."""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT w.id AS wish_id, w.text, u.user_id, u.username, u.referrer_id,
+                       r.username AS referrer_username
+                FROM wishes w
+                JOIN users u ON u.user_id = w.user_id
+                LEFT JOIN users r ON r.user_id = u.referrer_id
+                WHERE w.id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(wish_ids),)) as cursor:
+                return [dict(row) for row in await cursor.fetchall()]
+    
+    async def reset_wish_by_username(self, username: str, actor_id: int = None) -> dict | None:
         """Reset wish by username. Returns user data if successful."""
         from data.repositories.users import UserRepository
         user_repo = UserRepository(self.db_path)
@@ -128,7 +496,7 @@ class WishRepository(BaseRepository):
         if not user:
             return None
         
-        success = await self.reset_wish(user['user_id'])
+        success = await self.reset_wish(user['user_id'], actor_id)
         if success:
             return dict(user)
         return None
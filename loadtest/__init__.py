@@ -0,0 +1,4 @@
+"""End-to-end load testing against a local fake Bot API server.
+
+Run with ``python -m loadtest --help``.
+"""
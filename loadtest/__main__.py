@@ -0,0 +1,47 @@
+"""Command-line entry point for the load test."""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from loadtest.scenario import configure_environment, run_load
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drive simulated users through the bot offline.")
+    parser.add_argument("--users", type=int, default=1000, help="simulated users (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=100, help="users active at once (default: 100)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean fake API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of API calls failing with 500")
+    parser.add_argument("--step-timeout", type=float, default=10.0, help="seconds to wait for each screen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="database file (default: temporary)")
+    parser.add_argument("--json", dest="json_path", help="write the report to this file")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.ERROR, format="%(levelname)s - %(name)s - %(message)s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        configure_environment(args.db or os.path.join(tmp, "loadtest.db"))
+        report = asyncio.run(run_load(
+            users=args.users,
+            concurrency=args.concurrency,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            seed=args.seed,
+            step_timeout=args.step_timeout,
+        ))
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
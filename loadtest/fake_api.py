@@ -0,0 +1,203 @@
+"""Local stand-in for the Telegram Bot API.
+
+Serves ``/bot{token}/{method}`` over HTTP so a real ``Bot`` can be pointed
+at it with ``TelegramAPIServer.from_base``. Updates are queued by the
+load generator and handed out through ``getUpdates``; every message the
+bot sends or edits resolves the waiter of the corresponding chat, which
+lets simulated users wait for their next screen.
+"""
+import asyncio
+import json
+import random
+import time
+from collections import Counter, deque
+from itertools import islice
+
+from aiohttp import web
+
+# Methods whose result is the screen a user sees next
+SCREEN_METHODS = {"sendMessage", "sendPhoto", "sendDocument", "editMessageMedia", "editMessageCaption", "editMessageText"}
+# Methods never subject to injected errors (they drive the harness itself)
+CONTROL_METHODS = {"getUpdates", "getMe"}
+
+
+class FakeBotAPI:
+    """In-memory Bot API with configurable latency and error rate."""
+
+    def __init__(self, token: str, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        self.token = token
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.bot_user = {
+            "id": int(token.split(":", 1)[0]),
+            "is_bot": True,
+            "first_name": "LoadTest",
+            "username": "loadtest_bot",
+        }
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._updates: deque[dict] = deque()
+        self._new_updates = asyncio.Event()
+        self._next_update_id = 1
+        self._next_message_id: Counter[int] = Counter()
+        self._last_message: dict[int, dict] = {}
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._runner: web.AppRunner | None = None
+
+    # === Load generator side ===
+
+    def push_update(self, update: dict) -> int:
+        """Queue an update for getUpdates. Returns its update_id."""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        update["update_id"] = update_id
+        self._updates.append(update)
+        self._new_updates.set()
+        return update_id
+
+    def expect_screen(self, chat_id: int) -> asyncio.Future:
+        """Future resolved with the next message sent or edited in the chat."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id] = future
+        return future
+
+    def last_message(self, chat_id: int) -> dict | None:
+        return self._last_message.get(chat_id)
+
+    @property
+    def api_calls(self) -> int:
+        """Calls made by the bot, excluding polling."""
+        return sum(count for method, count in self.calls.items() if method not in CONTROL_METHODS)
+
+    # === HTTP server ===
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving. Returns the base URL."""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = await self._read_params(request)
+
+        if method not in CONTROL_METHODS:
+            if self.latency:
+                await asyncio.sleep(self.latency * self._random.uniform(0.5, 1.5))
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors[method] += 1
+                return web.json_response(
+                    {"ok": False, "error_code": 500, "description": "Internal Server Error: injected"},
+                    status=500,
+                )
+
+        handler = getattr(self, f"_api_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        form = await request.post()
+        return {key: value for key, value in form.items() if isinstance(value, str)}
+
+    # === Message bookkeeping ===
+
+    def _message(self, chat_id: int, *, text: str | None = None, caption: str | None = None,
+                 photo: bool = False, message_id: int | None = None) -> dict:
+        if message_id is None:
+            self._next_message_id[chat_id] += 1
+            message_id = self._next_message_id[chat_id]
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+            "from": self.bot_user,
+        }
+        if photo:
+            message["photo"] = [{
+                "file_id": f"photo-{message_id}",
+                "file_unique_id": f"u-{message_id}",
+                "width": 800,
+                "height": 600,
+            }]
+            if caption is not None:
+                message["caption"] = caption
+        else:
+            message["text"] = text or ""
+        return message
+
+    def _deliver(self, chat_id: int, message: dict) -> dict:
+        self._last_message[chat_id] = message
+        waiter = self._waiters.pop(chat_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(message)
+        return message
+
+    # === API methods ===
+
+    async def _api_getMe(self, params: dict) -> dict:
+        return self.bot_user
+
+    async def _api_getUpdates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return list(islice(self._updates, limit))
+
+    async def _api_getChatMember(self, params: dict) -> dict:
+        user_id = int(params["user_id"])
+        return {"status": "member", "user": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}}
+
+    async def _api_sendMessage(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        return self._deliver(chat_id, self._message(chat_id, text=params.get("text")))
+
+    async def _api_sendPhoto(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        return self._deliver(chat_id, self._message(chat_id, caption=params.get("caption"), photo=True))
+
+    async def _api_sendDocument(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        return self._deliver(chat_id, self._message(chat_id, text=params.get("caption")))
+
+    async def _api_editMessageMedia(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        media = json.loads(params.get("media") or "{}")
+        message = self._message(
+            chat_id, caption=media.get("caption"), photo=True, message_id=int(params["message_id"])
+        )
+        return self._deliver(chat_id, message)
+
+    async def _api_editMessageCaption(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        message = self._message(
+            chat_id, caption=params.get("caption"), photo=True, message_id=int(params["message_id"])
+        )
+        return self._deliver(chat_id, message)
+
+    async def _api_editMessageText(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        message = self._message(chat_id, text=params.get("text"), message_id=int(params["message_id"]))
+        return self._deliver(chat_id, message)
@@ -0,0 +1,219 @@
+"""Simulated users driving the real dispatcher through the fake Bot API.
+
+Each user goes through ``/start`` (with subscription check) → leave wish →
+send wish → my tickets → main menu, waiting for the bot's screen after
+every step. A share of users arrives through a referral link of an
+earlier user.
+
+The bot modules read their configuration on import, so
+``configure_environment()`` must run before ``run_load()``.
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from loadtest.fake_api import FakeBotAPI
+
+TOKEN = "123456:LOADTEST"
+CHAT_ID = -1001234567890
+FIRST_USER_ID = 10_000_000
+REFERRAL_SHARE = 0.3
+
+WISHES = [
+    "Счастья, здоровья и тепла в новом году! 🎄",
+    "Пусть все мечты сбываются ✨",
+    "Мира и добра каждому дому 🏠❤️",
+    "Happy New Year to everyone! 🎉",
+    "Больше путешествий и ярких впечатлений ✈️🌍",
+    "Пусть 2026 будет лучше, чем 2025 🥂",
+]
+
+
+def configure_environment(db_path: str) -> None:
+    """Point the bot configuration at the fake API setup."""
+    os.environ.update({
+        "BOT_TOKEN": TOKEN,
+        "DB_PATH": db_path,
+        "CHAT_ID": str(CHAT_ID),
+        "REQUIRED_CHANNEL": "@loadtest_channel",
+        "REQUIRED_CHAT": "@loadtest_chat",
+        "METRICS_PORT": "0",
+    })
+
+
+@dataclass
+class LoadStats:
+    """Raw samples collected during a run."""
+    handler_durations: list[float] = field(default_factory=list)
+    step_durations: list[float] = field(default_factory=list)
+    failed_steps: int = 0
+    completed_users: int = 0
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+class SimulatedUser:
+    """One user walking through the main flow."""
+
+    def __init__(self, api: FakeBotAPI, user_id: int, referrer_id: int | None, rng: random.Random,
+                 stats: LoadStats, step_timeout: float):
+        self.api = api
+        self.user_id = user_id
+        self.referrer_id = referrer_id
+        self.rng = rng
+        self.stats = stats
+        self.step_timeout = step_timeout
+        self.user = {
+            "id": user_id,
+            "is_bot": False,
+            "first_name": f"User{user_id}",
+            "username": f"user{user_id}",
+        }
+        self._message_id = 0
+
+    async def _step(self, update: dict) -> bool:
+        waiter = self.api.expect_screen(self.user_id)
+        started = time.perf_counter()
+        self.api.push_update(update)
+        try:
+            await asyncio.wait_for(waiter, self.step_timeout)
+        except asyncio.TimeoutError:
+            self.stats.failed_steps += 1
+            return False
+        self.stats.step_durations.append(time.perf_counter() - started)
+        return True
+
+    def _text(self, text: str) -> dict:
+        self._message_id += 1
+        return {"message": {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": self.user_id, "type": "private"},
+            "from": self.user,
+            "text": text,
+        }}
+
+    def _tap(self, data: str) -> dict:
+        return {"callback_query": {
+            "id": f"{self.user_id}-{data}-{time.monotonic_ns()}",
+            "from": self.user,
+            "chat_instance": str(self.user_id),
+            "data": data,
+            "message": self.api.last_message(self.user_id),
+        }}
+
+    async def run(self) -> None:
+        start = f"/start {self.referrer_id}" if self.referrer_id else "/start"
+        steps = [
+            lambda: self._text(start),
+            lambda: self._tap("leave_wish"),
+            lambda: self._text(self.rng.choice(WISHES)),
+            lambda: self._tap("my_tickets"),
+            lambda: self._tap("leaderboard"),
+            lambda: self._tap("main_menu"),
+        ]
+        for build in steps:
+            if not await self._step(build()):
+                return
+        self.stats.completed_users += 1
+
+
+def _timing_middleware(stats: LoadStats):
+    async def middleware(handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            stats.handler_durations.append(time.perf_counter() - started)
+    return middleware
+
+
+async def run_load(
+    users: int,
+    concurrency: int,
+    latency_ms: float = 0.0,
+    error_rate: float = 0.0,
+    seed: int = 0,
+    step_timeout: float = 10.0,
+) -> dict:
+    """Run the scenario and return the report."""
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from data.database import db
+    from main import build_dispatcher
+    from utils.card_renderer import card_renderer
+    from utils.navigation import drain_background_tasks
+    from utils.outbox import outbox
+    from utils.shutdown import ShutdownCoordinator
+    from utils.warmup import warm_up
+
+    api = FakeBotAPI(TOKEN, latency_ms=latency_ms, error_rate=error_rate, seed=seed)
+    base_url = await api.start()
+    await db.init()
+    db.events.start()
+
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    shutdown = ShutdownCoordinator(timeout=30, journal=db.updates)
+    shutdown.on_drain("background tasks", drain_background_tasks)
+    shutdown.on_drain("outbox", outbox.close)
+    shutdown.on_drain("audit log", db.events.close)
+    dp = build_dispatcher(shutdown)
+    outbox.start(bot)
+    stats = LoadStats()
+    dp.update.outer_middleware(_timing_middleware(stats))
+    await warm_up(bot, budget=10)
+    await card_renderer.start()
+
+    polling = asyncio.create_task(
+        dp.start_polling(bot, polling_timeout=1, handle_signals=False, close_bot_session=False)
+    )
+
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def simulate(index: int) -> None:
+        referrer_id = None
+        if index and rng.random() < REFERRAL_SHARE:
+            referrer_id = FIRST_USER_ID + rng.randrange(index)
+        user = SimulatedUser(api, FIRST_USER_ID + index, referrer_id, rng, stats, step_timeout)
+        async with semaphore:
+            await user.run()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate(i) for i in range(users)))
+    elapsed = time.perf_counter() - started
+
+    await dp.stop_polling()
+    await polling
+    await shutdown.shutdown(bot)
+    await card_renderer.close()
+    await db.close()
+    await api.stop()
+
+    updates = len(stats.handler_durations)
+    return {
+        "users": users,
+        "completed_users": stats.completed_users,
+        "failed_steps": stats.failed_steps,
+        "updates": updates,
+        "elapsed_seconds": round(elapsed, 3),
+        "updates_per_second": round(updates / elapsed, 1) if elapsed else 0.0,
+        "handler_p50_ms": round(_percentile(stats.handler_durations, 50) * 1000, 2),
+        "handler_p99_ms": round(_percentile(stats.handler_durations, 99) * 1000, 2),
+        "step_p50_ms": round(_percentile(stats.step_durations, 50) * 1000, 2),
+        "step_p99_ms": round(_percentile(stats.step_durations, 99) * 1000, 2),
+        "api_calls_per_update": round(api.api_calls / updates, 2) if updates else 0.0,
+        "api_calls": dict(api.calls),
+        "api_errors": dict(api.errors),
+    }
@@ -1,21 +1,69 @@
 import asyncio
 import logging
-import sys
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
-from config.config import BOT_TOKEN
+from config.config import (
+    BOT_TOKEN, SHUTDOWN_TIMEOUT, METRICS_HOST, METRICS_PORT, WARMUP_BUDGET,
+    LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, LOG_SAMPLING,
+)
 from data.database import db
 from apps.handlers import common, wishes, tickets
 from apps.handlers.admin import router as admin_router
-from utils.scheduler import setup_scheduler, check_and_run_missed_broadcast
-from utils.middlewares import ErrorHandlerMiddleware
+from utils.scheduler import broadcaster, setup_scheduler, wait_for_jobs
+from utils.middlewares import (
+    ErrorHandlerMiddleware,
+    LogContextMiddleware,
+    ThrottlingMiddleware,
+    SingleFlightMiddleware,
+    MetricsMiddleware,
+    BotApiMetricsMiddleware,
+)
+from utils.blocklist import blocklist
+from utils.card_renderer import card_renderer
+from utils.logs import setup_logging
+from utils.metrics import IN_FLIGHT, start_metrics_server
+from utils.navigation import drain_background_tasks
+from utils.outbox import outbox
+from utils.shutdown import ShutdownCoordinator
+from utils.warmup import warm_up
+
+def build_dispatcher(shutdown: ShutdownCoordinator) -> Dispatcher:
+    """Create the dispatcher with all routers and middlewares registered."""
+    dp = Dispatcher(storage=MemoryStorage())
+
+    # Register routers
+    dp.include_router(common.router)
+    dp.include_router(wishes.router)
+    dp.include_router(tickets.router)
+    dp.include_router(admin_router)
+
+    # Register middleware (in-flight tracking must be the outermost one)
+    metrics = MetricsMiddleware()
+    log_context = LogContextMiddleware()
+    dp.update.outer_middleware(shutdown.middleware)
+    dp.update.outer_middleware(log_context)
+    dp.update.outer_middleware(metrics)
+    dp.update.outer_middleware(ErrorHandlerMiddleware())
+    dp.update.outer_middleware(ThrottlingMiddleware())
+    single_flight = SingleFlightMiddleware()
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(log_context)
+        observer.middleware(metrics)
+        observer.middleware(single_flight)
+
+    return dp
+
+
+async def index_wish_backlog(batch_size: int = 500) -> None:
+    """Backfill the near-duplicate index for wishes saved before it existed."""
+    last_id = 0
+    while (last_id := await db.wishes.index_unsigned_wishes(last_id, batch_size)) is not None:
+        await asyncio.sleep(0.05)
+    logging.info("Near-duplicate index is up to date")
+
 
 async def main():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-        stream=sys.stdout
-    )
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_LEVELS, LOG_SAMPLING)
 
     if not BOT_TOKEN:
         logging.error("BOT_TOKEN is not set!")
@@ -23,33 +71,54 @@ async def main():
 
     # Initialize database
     await db.init()
+    db.events.start()
+    blocklist.load(await db.moderation.get_blocklist_terms())
 
     # Initialize bot and dispatcher
     bot = Bot(token=BOT_TOKEN)
-    dp = Dispatcher(storage=MemoryStorage())
+    bot.session.middleware(BotApiMetricsMiddleware())
+    shutdown = ShutdownCoordinator(timeout=SHUTDOWN_TIMEOUT, journal=db.updates)
+    # Scheduled jobs first: broadcasts and backups still use the database
+    shutdown.on_drain("scheduler jobs", wait_for_jobs)
+    shutdown.on_drain("background tasks", drain_background_tasks)
+    shutdown.on_drain("outbox", outbox.close)
+    shutdown.on_drain("audit log", db.events.close)
+    dp = build_dispatcher(shutdown)
+    IN_FLIGHT.set_function(lambda: shutdown.in_flight)
 
-    # Register routers
-    dp.include_router(common.router)
-    dp.include_router(wishes.router)
-    dp.include_router(tickets.router)
-    dp.include_router(admin_router)
+    # Start metrics endpoint
+    if METRICS_PORT:
+        metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+        shutdown.on_close("metrics server", metrics_runner.cleanup)
+    shutdown.on_close("database", db.close)
+    shutdown.on_close("ticket cards", card_renderer.close)
 
-    # Register middleware
-    dp.update.outer_middleware(ErrorHandlerMiddleware())
+    # Warm caches before accepting updates
+    await warm_up(bot, WARMUP_BUDGET)
+    await card_renderer.start()
 
-    # Setup and start scheduler
+    # Setup and start scheduler (missed broadcasts run on the first tick)
+    await broadcaster.load()
     scheduler = setup_scheduler(bot)
     scheduler.start()
-    
-    # Check for missed broadcasts
-    await check_and_run_missed_broadcast(bot)
 
-    # Start polling
+    # Deliver queued messages, including those left over from the last run
+    outbox.start(bot)
+
+    # Index wishes saved before the near-duplicate index existed
+    index_backlog = asyncio.create_task(index_wish_backlog())
+
+    # Finish updates the last shutdown cut off, then start polling
+    await shutdown.replay(dp, bot)
     logging.info("Starting bot...")
     try:
-        await dp.start_polling(bot)
+        await dp.start_polling(bot, close_bot_session=False)
     finally:
-        scheduler.shutdown()
+        # Stop intake of new jobs, then drain what was already accepted
+        scheduler.pause()
+        index_backlog.cancel()
+        await shutdown.shutdown(bot)
+        scheduler.shutdown(wait=False)
 
 if __name__ == "__main__":
     try:
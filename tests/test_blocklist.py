@@ -0,0 +1,93 @@
+"""Blocklist normalization and incremental automaton levels."""
+import random
+
+import pytest
+
+from utils.blocklist import Automaton, Blocklist, normalize
+
+
+# Distinct words that stay distinct after normalization
+WORDS = [f"{a}а{b}о" for a in "бвгдклмнпрстфхц" for b in "бвгдклмнпрстфхц"]
+
+
+def level_sizes(blocklist: Blocklist) -> list[int]:
+    return [len(level.patterns) for level in blocklist._levels]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Х.У.У.Й", " хуи "),
+    ("xyй", " хуи "),
+    ("Ёлка  ", " елка "),
+    ("Прииивет,  мир!!!", " привет мир "),
+    ("X0P0Ш0", " хорошо "),
+])
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+
+def test_automaton_finds_overlapping_patterns():
+    automaton = Automaton({"he", "she", "his", "hers"})
+    assert automaton.find("ushers") == {"he", "she", "hers"}
+    assert automaton.find("nothing") == set()
+
+
+def test_substring_and_whole_word_terms():
+    blocklist = Blocklist()
+    blocklist.load(["спам", "=кот"])
+    assert blocklist.match("Купи СПАМ!!!") == ["спам"]
+    assert blocklist.match("антиспамовый") == ["спам"]
+    assert blocklist.match("мой кот") == ["=кот"]
+    assert blocklist.match("котлета") == []
+
+
+def test_single_additions_merge_into_doubling_levels():
+    blocklist = Blocklist()
+    for number in range(1, 12):
+        blocklist.add([WORDS[number]])
+        sizes = level_sizes(blocklist)
+        # Levels mirror the binary representation of the term count
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes == [1 << bit for bit in reversed(range(number.bit_length())) if number >> bit & 1]
+    assert len(blocklist) == 11
+
+
+def test_removed_terms_stop_matching_before_the_rebuild():
+    blocklist = Blocklist()
+    blocklist.add(["альфа", "бета", "гамма", "дельта"])
+    blocklist.remove(["бета"])
+    assert level_sizes(blocklist) == [4]
+    assert blocklist.match("альфа бета") == ["альфа"]
+    # Re-adding a stale term reuses its compiled pattern
+    blocklist.add(["бета"])
+    assert level_sizes(blocklist) == [4]
+    assert blocklist.match("альфа бета") == ["альфа", "бета"]
+
+
+def test_rebuild_once_half_is_stale():
+    blocklist = Blocklist()
+    blocklist.add(WORDS[:6])
+    blocklist.add(WORDS[6:8])
+    blocklist.remove(WORDS[:2])
+    assert level_sizes(blocklist) == [6, 2]
+    blocklist.remove(WORDS[2:3])
+    assert level_sizes(blocklist) == [5]
+    assert blocklist.terms() == sorted(WORDS[3:8])
+
+
+def test_incremental_edits_match_a_fresh_load():
+    rng = random.Random(7)
+    vocabulary = WORDS[:60] + [f"={word}" for word in WORDS[60:80]]
+    blocklist, terms = Blocklist(), set()
+    for _ in range(300):
+        batch = rng.sample(vocabulary, rng.randint(1, 5))
+        if rng.random() < 0.6:
+            blocklist.add(batch)
+            terms.update(batch)
+        else:
+            blocklist.remove(batch)
+            terms.difference_update(batch)
+        text = " ".join(rng.sample([term.lstrip("=") for term in vocabulary], 10))
+        fresh = Blocklist()
+        fresh.load(sorted(terms))
+        assert blocklist.match(text) == fresh.match(text)
+        assert blocklist.terms() == sorted(terms)
@@ -0,0 +1,72 @@
+"""Ticket cards are valid PNGs that carry a readable QR code of the link."""
+import struct
+import zlib
+
+from utils import cards
+from utils.qr import encode
+
+LINK = "https://t.me/wish_bot?start=123456789"
+
+
+def read_png(data: bytes) -> tuple[int, int, bytes]:
+    """Check the structure of an 8-bit RGB PNG and return (width, height, pixels)."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    position, chunks = 8, []
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind = data[position + 4:position + 8]
+        body = data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + body), kind
+        chunks.append((kind, body))
+        position += 12 + length
+    assert position == len(data)
+    assert chunks[0][0] == b"IHDR" and chunks[-1] == (b"IEND", b"")
+    width, height, depth, color_type, compression, filtering, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    assert (depth, color_type, compression, filtering, interlace) == (8, 2, 0, 0, 0)
+
+    raw = zlib.decompress(b"".join(body for kind, body in chunks if kind == b"IDAT"))
+    stride = width * 3
+    assert len(raw) == height * (stride + 1)
+    # Cards use filter type 0 only, so scanlines are the pixels as they are
+    assert all(raw[y * (stride + 1)] == 0 for y in range(height))
+    pixels = b"".join(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)] for y in range(height))
+    return width, height, pixels
+
+
+def test_card_is_a_valid_png():
+    width, height, pixels = read_png(cards.render_ticket_card(42, 10, 7, LINK))
+    assert (width, height) == (cards.WIDTH, cards.HEIGHT)
+    assert pixels[:3] == bytes(cards.STRIPE)
+
+
+def test_card_contains_the_qr_code():
+    width, _, pixels = read_png(cards.render_ticket_card(1, 0, 0, LINK))
+    modules = encode(LINK)
+    count = len(modules) + 2 * cards.QR_QUIET_ZONE
+    module = cards.QR_SIZE // count
+    left = cards.WIDTH - cards.MARGIN - cards.QR_SIZE
+    top = (cards.HEIGHT - cards.QR_SIZE) // 2
+    offset = (cards.QR_SIZE - module * count) // 2 + cards.QR_QUIET_ZONE * module
+
+    def pixel(x: int, y: int) -> bytes:
+        start = (y * width + x) * 3
+        return pixels[start:start + 3]
+
+    # Module centres, plus the quiet zone just outside the symbol
+    for row, line in enumerate(modules):
+        for column, dark in enumerate(line):
+            x = left + offset + column * module + module // 2
+            y = top + offset + row * module + module // 2
+            assert pixel(x, y) == bytes(cards.DARK if dark else cards.WHITE)
+    assert pixel(left + offset - module // 2, top + offset - module // 2) == bytes(cards.WHITE)
+
+
+def test_cards_are_deterministic():
+    assert cards.render_ticket_card(5, 3, 2, LINK) == cards.render_ticket_card(5, 3, 2, LINK)
+    assert cards.render_ticket_card(5, 3, 2, LINK) != cards.render_ticket_card(6, 3, 2, LINK)
+
+
+def test_large_numbers_fit():
+    width, height, _ = read_png(cards.render_ticket_card(10 ** 12, 10 ** 9, 10 ** 9, LINK))
+    assert (width, height) == (cards.WIDTH, cards.HEIGHT)
@@ -0,0 +1,66 @@
+"""Score histogram of the leaderboard and its loading under concurrent writes."""
+import asyncio
+import random
+
+from data.database import Database
+from data.repositories.leaderboard import ScoreCounts
+
+
+def test_score_counts_match_a_plain_list():
+    rng = random.Random(11)
+    limit = ScoreCounts.DENSE_LIMIT
+    scores = [rng.choice([0, 0, 1, 2, rng.randrange(limit), limit + rng.randrange(50)]) for _ in range(500)]
+    counts = ScoreCounts({})
+    for score in scores:
+        counts.add(score, 1)
+    for _ in range(2000):
+        i = rng.randrange(len(scores))
+        new = max(0, scores[i] + rng.choice([-3, -1, 1, 1, 5, limit]))
+        counts.add(scores[i], -1)
+        counts.add(new, 1)
+        scores[i] = new
+    assert len(counts) == len(scores)
+    for probe in [0, 1, 2, 7, limit - 1, limit, limit + 1, limit + 25, 10 * limit]:
+        assert counts.count_above(probe) == sum(score > probe for score in scores), probe
+
+
+def test_score_counts_from_histogram():
+    counts = ScoreCounts({0: 5, 3: 2, 10_000: 1})
+    assert len(counts) == 8
+    assert counts.count_above(0) == 3
+    assert counts.count_above(3) == 1
+    assert counts.count_above(9_999) == 1
+    assert counts.count_above(10_000) == 0
+
+
+def test_concurrent_first_ranks_load_once_and_keep_writes(tmp_path):
+    async def scenario():
+        db = Database(str(tmp_path / "bot.db"))
+        await db.init()
+        try:
+            for user_id in range(1, 101):
+                await db.users.create_user(user_id, f"user{user_id}")
+            loads = 0
+            load = db.leaderboard._load
+
+            async def counted_load():
+                nonlocal loads
+                loads += 1
+                return await load()
+
+            db.leaderboard._load = counted_load
+
+            async def signups():
+                for user_id in range(101, 151):
+                    await db.users.create_user(user_id, f"user{user_id}")
+                await db.users.add_tickets_to_user(7, 5)
+
+            await asyncio.gather(signups(), *(db.leaderboard.get_rank(1) for _ in range(10)))
+            assert loads == 1
+            rank = await db.leaderboard.get_rank(7)
+            assert rank == {"tickets": 1, "referrals": 1, "total": 150}
+            assert (await db.leaderboard.get_rank(1))["tickets"] == 2
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+"""MinHash signatures, their similarity estimate and LSH band keys."""
+import random
+
+from utils import minhash
+
+WISH = "Желаю всем счастья, здоровья и исполнения всех желаний в новом году!"
+
+
+def jaccard(a: str, b: str) -> float:
+    x, y = minhash.shingles(a), minhash.shingles(b)
+    return len(x & y) / len(x | y)
+
+
+def test_signature_shape_and_determinism():
+    sig = minhash.signature(WISH)
+    assert sig.typecode == "Q" and len(sig) == minhash.NUM_HASHES
+    assert minhash.signature(WISH) == sig
+
+
+def test_obfuscated_copy_has_the_same_signature():
+    copy = "ЖЕЛАЮ всем счастьяяя, здоровья и исполнения всех желаний в новом году!!! 🎄"
+    assert minhash.signature(copy) == minhash.signature(WISH)
+    assert minhash.similarity(minhash.signature(copy), minhash.signature(WISH)) == 1.0
+
+
+def test_similarity_estimates_jaccard():
+    rng = random.Random(3)
+    words = WISH.split()
+    for _ in range(20):
+        edited = words[:]
+        for _ in range(rng.randint(1, 6)):
+            edited[rng.randrange(len(edited))] = rng.choice(["мира", "добра", "тепла", "улыбок"])
+        text = " ".join(edited)
+        estimate = minhash.similarity(minhash.signature(WISH), minhash.signature(text))
+        # Standard error of a 64-value estimate is at most 1/16
+        assert abs(estimate - jaccard(WISH, text)) < 0.25
+
+
+def test_unrelated_texts_are_dissimilar():
+    other = minhash.signature("Хочу новый велосипед и много снега на каникулах")
+    assert minhash.similarity(minhash.signature(WISH), other) < 0.2
+
+
+def test_empty_bins_are_densified():
+    # A single shingle fills one bin; all others borrow its value
+    sig = minhash.signature("да")
+    assert len({value & minhash._VALUE_MASK for value in sig}) == 1
+    assert len({value >> minhash._VALUE_BITS for value in sig}) == minhash.NUM_HASHES
+    assert minhash.similarity(sig, minhash.signature("Да!")) == 1.0
+
+
+def test_band_keys():
+    sig = minhash.signature(WISH)
+    keys = minhash.band_keys(sig)
+    assert len(keys) == minhash.BANDS
+    assert all(-2 ** 63 <= key < 2 ** 63 for key in keys)
+    # A change in one band's values changes that band's key only
+    changed = minhash.unpack(minhash.pack(sig))
+    changed[0] ^= 1
+    assert [a == b for a, b in zip(keys, minhash.band_keys(changed))] == [False] + [True] * (minhash.BANDS - 1)
+
+
+def test_pack_round_trip():
+    sig = minhash.signature(WISH)
+    packed = minhash.pack(sig)
+    assert len(packed) == 8 * minhash.NUM_HASHES
+    assert minhash.unpack(packed) == sig
@@ -0,0 +1,125 @@
+"""QR encoder checked against ISO/IEC 18004 vectors and by decoding its output."""
+import pytest
+
+from utils import qr
+
+# Format information of level M for masks 0-7 (ISO/IEC 18004, table C.1)
+FORMAT_M = [
+    0b101010000010010, 0b101000100100101, 0b101111001111100, 0b101101101001011,
+    0b100010111111001, 0b100000011001110, 0b100111110010111, 0b100101010100000,
+]
+# Mask conditions in (row i, column j) terms as the standard writes them
+MASKS = (
+    lambda i, j: (i + j) % 2 == 0,
+    lambda i, j: i % 2 == 0,
+    lambda i, j: j % 3 == 0,
+    lambda i, j: (i + j) % 3 == 0,
+    lambda i, j: (i // 2 + j // 3) % 2 == 0,
+    lambda i, j: i * j % 2 + i * j % 3 == 0,
+    lambda i, j: (i * j % 2 + i * j % 3) % 2 == 0,
+    lambda i, j: ((i + j) % 2 + i * j % 3) % 2 == 0,
+)
+
+
+def read_format(modules: list[list[bool]]) -> int:
+    """Format bits next to the top-left finder, least significant first."""
+    cells = [(i, 8) for i in range(6)] + [(7, 8), (8, 8), (8, 7)] + [(8, 14 - i) for i in range(9, 15)]
+    return sum(modules[row][column] << bit for bit, (row, column) in enumerate(cells))
+
+
+def decode(modules: list[list[bool]]) -> bytes:
+    """Read a level M, byte mode symbol back into its data."""
+    size = len(modules)
+    version = (size - 17) // 4
+    mask = FORMAT_M.index(read_format(modules))
+    function = qr._Symbol(version).function
+
+    bits = []
+    right = size - 1
+    while right >= 1:
+        if right == 6:
+            right = 5
+        upward = (right + 1) & 2 == 0
+        for step in range(size):
+            row = size - 1 - step if upward else step
+            for column in (right, right - 1):
+                if not function[row][column]:
+                    bits.append(modules[row][column] ^ MASKS[mask](row, column))
+        right -= 2
+    codewords = [int("".join("1" if bit else "0" for bit in bits[i:i + 8]), 2) for i in range(0, len(bits) - 7, 8)]
+
+    ec_size, groups = qr._BLOCKS[version]
+    sizes = [block_size for count, block_size in groups for _ in range(count)]
+    blocks = [[] for _ in sizes]
+    position = 0
+    for i in range(max(sizes)):
+        for block, block_size in zip(blocks, sizes):
+            if i < block_size:
+                block.append(codewords[position])
+                position += 1
+    ec = [[] for _ in sizes]
+    for _ in range(ec_size):
+        for block_ec in ec:
+            block_ec.append(codewords[position])
+            position += 1
+    divisor = qr._rs_divisor(ec_size)
+    for block, block_ec in zip(blocks, ec):
+        assert qr._rs_remainder(block, divisor) == block_ec
+
+    stream = "".join(format(byte, "08b") for block in blocks for byte in block)
+    assert stream[:4] == "0100"
+    count_bits = 8 if version < 10 else 16
+    length = int(stream[4:4 + count_bits], 2)
+    start = 4 + count_bits
+    return bytes(int(stream[start + 8 * i:start + 8 * i + 8], 2) for i in range(length))
+
+
+def test_reed_solomon_matches_standard_example():
+    # "01234567" at 1-M, ISO/IEC 18004 annex I
+    data = [0x10, 0x20, 0x0C, 0x56, 0x61, 0x80, 0xEC, 0x11, 0xEC, 0x11, 0xEC, 0x11, 0xEC, 0x11, 0xEC, 0x11]
+    assert qr._rs_remainder(data, qr._rs_divisor(10)) == [0xA5, 0x24, 0xD4, 0xC1, 0xED, 0x36, 0xC7, 0x87, 0x2C, 0x55]
+
+
+@pytest.mark.parametrize("mask", range(8))
+def test_format_information(mask):
+    symbol = qr._Symbol(1)
+    symbol.draw_format(mask)
+    assert read_format(symbol.modules) == FORMAT_M[mask]
+
+
+def test_version_information():
+    symbol = qr._Symbol(7)
+    size = symbol.size
+    # Bottom-left block, 6 columns of 3 rows, least significant bit first
+    bits = [symbol.modules[size - 11 + i % 3][i // 3] for i in range(18)]
+    assert sum(bit << i for i, bit in enumerate(bits)) == 0x07C94
+
+
+@pytest.mark.parametrize("length, version", [(1, 1), (14, 1), (15, 2), (106, 6), (107, 7), (213, 10)])
+def test_smallest_version_is_used(length, version):
+    modules = qr.encode(b"x" * length)
+    assert len(modules) == 17 + 4 * version
+    assert all(len(row) == len(modules) for row in modules)
+
+
+def test_too_long_data_is_rejected():
+    with pytest.raises(ValueError):
+        qr.encode(b"x" * 214)
+
+
+def test_finder_patterns():
+    modules = qr.encode("https://t.me/bot?start=1")
+    size = len(modules)
+    pattern = [[max(abs(dx), abs(dy)) != 2 for dx in range(-3, 4)] for dy in range(-3, 4)]
+    for top, left in ((0, 0), (0, size - 7), (size - 7, 0)):
+        assert [row[left:left + 7] for row in modules[top:top + 7]] == pattern
+
+
+@pytest.mark.parametrize("data", [
+    "https://t.me/wish_bot?start=123456789",
+    "https://t.me/some_quite_long_bot_username_bot?start=ref_9876543210_" + "x" * 60,
+    "Пожелание: счастья!",
+    "w" * 213,
+])
+def test_round_trip(data):
+    assert decode(qr.encode(data)) == data.encode("utf-8")
@@ -0,0 +1,105 @@
+"""Referral fraud analysis on small hand-built graphs."""
+from utils.referral_graph import (
+    BURST_THRESHOLD, BURST_WINDOW, CHAIN_LENGTH, MIN_REFERRALS, QUICK_WISH_SECONDS,
+    ReferralGraph, analyze, username_stem,
+)
+
+START = 1_700_000_000
+DAY = 24 * 60 * 60
+
+
+def build(rows: list[tuple], duplicates: list[tuple[int, int]] = ()) -> ReferralGraph:
+    """Graph of (user_id, referrer_id, created, wish_delay, username) rows."""
+    graph = ReferralGraph()
+    graph.extend(sorted(rows))
+    graph.set_duplicate_clusters(list(duplicates))
+    return graph
+
+
+def referrals(referrer_id: int, first_id: int, count: int, spacing: int, delay=None, name=None) -> list[tuple]:
+    return [
+        (first_id + i, referrer_id, START + i * spacing, delay, name and f"{name}_{i:03d}")
+        for i in range(count)
+    ]
+
+
+def by_user(result: list[dict]) -> dict[int, dict]:
+    return {row["user_id"]: row for row in result}
+
+
+def test_username_stem():
+    assert username_stem("Promo_Bot_017") == "promo_bot"
+    assert username_stem("ab12") is None
+    assert username_stem(None) is None
+
+
+def test_empty_and_honest_graphs():
+    assert analyze(ReferralGraph()) == []
+    rows = [(1, None, START, None, "alice")] + referrals(1, 100, MIN_REFERRALS * 2, DAY, delay=DAY)
+    assert analyze(build(rows)) == []
+
+
+def test_cycle():
+    rows = [(1, 3, START, None, None), (2, 1, START, None, None), (3, 2, START, None, None), (4, 1, START, None, None)]
+    result = by_user(analyze(build(rows)))
+    assert set(result) == {1, 2, 3}
+    assert all(row["reasons"] == ["cycle"] for row in result.values())
+
+
+def test_burst_within_the_window_only():
+    rows = [(1, None, START, None, None), (2, None, START, None, None)]
+    rows += referrals(1, 100, BURST_THRESHOLD, BURST_WINDOW // (BURST_THRESHOLD + 1))
+    rows += referrals(2, 1000, BURST_THRESHOLD, BURST_WINDOW // 2)
+    result = by_user(analyze(build(rows)))
+    assert set(result) == {1}
+    assert result[1]["reasons"] == ["burst"]
+    assert result[1]["max_burst"] == BURST_THRESHOLD
+    assert result[1]["referrals"] == BURST_THRESHOLD
+
+
+def test_quick_wishes():
+    rows = [(1, None, START, None, None)] + referrals(1, 100, MIN_REFERRALS, DAY, delay=QUICK_WISH_SECONDS // 2)
+    result = by_user(analyze(build(rows)))
+    assert result[1]["reasons"] == ["quick_wishes"]
+    assert result[1]["quick_share"] == 1.0
+    assert result[1]["wished_referrals"] == MIN_REFERRALS
+
+
+def test_chain_is_reported_at_its_top():
+    length = CHAIN_LENGTH + 2
+    rows = [(1, None, START, None, None)] + [(i, i - 1, START + i * DAY, None, None) for i in range(2, length + 1)]
+    result = analyze(build(rows))
+    assert [(row["user_id"], row["reasons"]) for row in result] == [(1, ["chain"])]
+    assert result[0]["subtree_size"] == length - 1
+
+
+def test_shared_signals_link_referrers():
+    rows = [(1, None, START, None, None), (2, None, START, None, None), (3, None, START, None, None)]
+    rows += referrals(1, 100, MIN_REFERRALS, DAY, name="promo_bot")
+    rows += referrals(2, 200, MIN_REFERRALS, DAY, name="promo_bot")
+    rows += [(300 + i, 3, START + i * DAY, None, name) for i, name in enumerate(
+        ["anna", "boris", "vera", "gleb", "dasha", "egor", "zhenya", "zoya", "ivan", "kira"]
+    )]
+    result = by_user(analyze(build(rows)))
+    assert set(result) == {1, 2}
+    for user_id in (1, 2):
+        assert result[user_id]["reasons"] == ["shared_signals", "linked_referrers"]
+        assert result[user_id]["cluster_size"] == 2
+    assert result[1]["cluster_id"] == result[2]["cluster_id"]
+
+
+def test_duplicate_wishes_count_as_a_signal():
+    rows = [(1, None, START, None, None)] + referrals(1, 100, MIN_REFERRALS, DAY, delay=DAY)
+    duplicates = [(100 + i, 100) for i in range(1, MIN_REFERRALS)]
+    result = by_user(analyze(build(rows, duplicates)))
+    assert result[1]["reasons"] == ["shared_signals"]
+    assert result[1]["signal_share"] == 1.0
+
+
+def test_sorted_by_score():
+    rows = [(1, None, START, None, None), (2, None, START, None, None)]
+    rows += referrals(1, 100, MIN_REFERRALS, DAY, delay=1)
+    rows += referrals(2, 200, BURST_THRESHOLD * 2, 1, delay=1)
+    result = analyze(build(rows))
+    assert [row["user_id"] for row in result] == [2, 1]
+    assert result[0]["score"] > result[1]["score"]
@@ -0,0 +1,76 @@
+"""Timer wheel of the broadcaster and quiet-hour arithmetic."""
+import random
+
+from utils.scheduler import TimerWheel, in_quiet_hours
+
+
+def fire_times(wheel: TimerWheel, until: float) -> dict[int, float]:
+    """Advance one tick at a time and note when each key fires."""
+    fired = {}
+    now = wheel.position
+    while now <= until:
+        for key in wheel.advance(now):
+            fired[key] = now
+        now += wheel.tick
+    return fired
+
+
+def test_fires_at_the_first_tick_at_or_after_due():
+    wheel = TimerWheel(tick=1.0, slots=8, now=100.0)
+    wheel.schedule(1, 100.0)
+    wheel.schedule(2, 103.0)
+    wheel.schedule(3, 103.5)
+    wheel.schedule(4, 90.0)
+    assert fire_times(wheel, 110.0) == {1: 100.0, 2: 103.0, 3: 104.0, 4: 100.0}
+
+
+def test_due_times_beyond_one_revolution():
+    wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+    wheel.schedule(1, 2.0)
+    wheel.schedule(2, 6.0)
+    wheel.schedule(3, 14.0)
+    assert fire_times(wheel, 20.0) == {1: 2.0, 2: 6.0, 3: 14.0}
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+    wheel.schedule(1, 3.0)
+    wheel.schedule(2, 3.0)
+    wheel.cancel(1)
+    wheel.cancel(99)
+    wheel.schedule(2, 9.0)
+    assert fire_times(wheel, 12.0) == {2: 9.0}
+
+
+def test_advance_catches_up_missed_ticks():
+    wheel = TimerWheel(tick=1.0, slots=4, now=0.0)
+    for key in range(10):
+        wheel.schedule(key, key * 1.5)
+    assert sorted(wheel.advance(9.0)) == [0, 1, 2, 3, 4, 5, 6]
+    assert wheel.position == 10.0
+    assert sorted(wheel.advance(20.0)) == [7, 8, 9]
+
+
+def test_matches_a_sorted_schedule():
+    rng = random.Random(5)
+    wheel = TimerWheel(tick=5.0, slots=16, now=0.0)
+    due = {}
+    for key in range(200):
+        due[key] = rng.uniform(0, 1000)
+        wheel.schedule(key, due[key])
+    for key in rng.sample(range(200), 50):
+        due[key] = rng.uniform(0, 1000)
+        wheel.schedule(key, due[key])
+    fired = fire_times(wheel, 1005.0)
+    assert fired.keys() == due.keys()
+    for key, at in fired.items():
+        assert due[key] <= at < due[key] + wheel.tick
+
+
+def test_quiet_hours():
+    assert not in_quiet_hours(3, None, 8)
+    assert not in_quiet_hours(3, 5, 5)
+    assert in_quiet_hours(5, 5, 8) and not in_quiet_hours(8, 5, 8)
+    # Overnight window
+    assert in_quiet_hours(23, 22, 7) and in_quiet_hours(0, 22, 7)
+    assert not in_quiet_hours(7, 22, 7) and not in_quiet_hours(12, 22, 7)
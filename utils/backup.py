@@ -0,0 +1,151 @@
+"""Online backups of the bot database.
+
+The database is copied with the SQLite online backup API while the bot
+keeps running. The source connection holds one read transaction for the
+whole copy, so under WAL the backup is a consistent snapshot that never
+restarts and never blocks writers, while pages are copied in small steps
+with a pause in between so the copy doesn't hog the disk or the GIL.
+
+The copy is checked with ``PRAGMA quick_check``, gzipped into
+``BACKUP_DIR`` and the oldest archives beyond ``BACKUP_KEEP`` are
+deleted. The writer stall is the longest time a write request waited
+for the pool's writer connection while the copy ran; a probe asks for
+the writer every ``PROBE_INTERVAL`` so quiet periods are sampled too.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from config.config import BACKUP_DIR, BACKUP_KEEP
+from data.database import db
+from data.pool import ConnectionPool, get_pool
+from utils.metrics import BACKUP_DURATION, BACKUP_STALL
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step (4 KiB each) and the pause between steps
+STEP_PAGES = 256
+STEP_PAUSE = 0.005
+# Fastest gzip level: ~3x faster than the default for ~10% larger archives
+COMPRESS_LEVEL = 1
+# Interval of the writer stall probe
+PROBE_INTERVAL = 0.1
+
+# Serializes backups (scheduled job and admin requests)
+_lock = asyncio.Lock()
+
+
+def copy_database(source_path: str, target_path: Path) -> dict:
+    """Copy a snapshot of the database page by page. Blocking: run it in a thread."""
+    steps = 0
+    source = sqlite3.connect(source_path, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        # Pin a snapshot for all steps; under WAL writers carry on meanwhile
+        source.execute("BEGIN")
+        source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            nonlocal steps
+            steps += 1
+            if remaining:
+                time.sleep(STEP_PAUSE)
+
+        source.backup(target, pages=STEP_PAGES, progress=progress)
+        source.execute("COMMIT")
+        pages = target.execute("PRAGMA page_count").fetchone()[0]
+        # The copy is a single self-contained file
+        target.execute("PRAGMA journal_mode = DELETE")
+        check = target.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+    return {"pages": pages, "steps": steps, "check": check}
+
+
+def compress(source: Path, target: Path) -> None:
+    """Gzip ``source`` into ``target``. Blocking: run it in a thread."""
+    with open(source, "rb") as raw, gzip.open(target, "wb", compresslevel=COMPRESS_LEVEL) as packed:
+        shutil.copyfileobj(raw, packed, 1024 * 1024)
+
+
+def rotate(directory: Path, stem: str, keep: int) -> list[Path]:
+    """Delete all but the ``keep`` newest archives. Returns the deleted files."""
+    archives = sorted(directory.glob(f"{stem}-*.db.gz"))
+    expired = archives[:-keep] if keep > 0 else []
+    for path in expired:
+        path.unlink(missing_ok=True)
+    return expired
+
+
+async def _probe_writer_stall(pool: ConnectionPool, done: asyncio.Event) -> float:
+    """Longest wait for the pool writer (by any request) while ``done`` is not set."""
+    pool.reset_longest_wait()
+    while not done.is_set():
+        # An empty turn in the writer queue, behind the bot's own writes
+        async with pool.write():
+            pass
+        try:
+            await asyncio.wait_for(done.wait(), PROBE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+    return pool.reset_longest_wait()
+
+
+async def run_backup() -> dict:
+    """Back up the database into ``BACKUP_DIR`` and rotate old archives."""
+    async with _lock:
+        source = Path(db.db_path)
+        directory = Path(BACKUP_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"{source.stem}-{time.strftime('%Y%m%d-%H%M%S', time.gmtime())}"
+        copy_path = directory / f"{name}.db.tmp"
+        archive = directory / f"{name}.db.gz"
+
+        started = time.perf_counter()
+        done = asyncio.Event()
+        probe = asyncio.create_task(_probe_writer_stall(get_pool(db.db_path), done))
+        try:
+            copied = await asyncio.to_thread(copy_database, str(source), copy_path)
+        finally:
+            done.set()
+            stall = await probe
+        copy_seconds = time.perf_counter() - started
+        try:
+            if copied["check"] != "ok":
+                raise RuntimeError(f"Backup copy failed quick_check: {copied['check']}")
+            size = copy_path.stat().st_size
+            await asyncio.to_thread(compress, copy_path, archive)
+        except Exception:
+            archive.unlink(missing_ok=True)
+            raise
+        finally:
+            copy_path.unlink(missing_ok=True)
+        duration = time.perf_counter() - started
+        expired = await asyncio.to_thread(rotate, directory, source.stem, BACKUP_KEEP)
+
+        BACKUP_DURATION.observe(duration)
+        BACKUP_STALL.observe(stall)
+        summary = {
+            "at": time.time(),
+            "path": str(archive),
+            "size": size,
+            "compressed_size": archive.stat().st_size,
+            "pages": copied["pages"],
+            "steps": copied["steps"],
+            "copy_seconds": round(copy_seconds, 3),
+            "seconds": round(duration, 3),
+            "max_stall_ms": round(stall * 1000, 1),
+            "deleted": len(expired),
+        }
+        await db.settings.set_setting("last_backup", json.dumps(summary))
+        logger.info(
+            "Backup %s: %d pages in %d steps, %.1fs (copy %.1fs), longest writer stall %.1f ms",
+            archive.name, summary['pages'], summary['steps'], duration, copy_seconds, summary['max_stall_ms']
+        )
+        return summary
@@ -0,0 +1,174 @@
+"""Blocklist matching for incoming wishes.
+
+Terms and texts go through the same normalization, so obfuscated spellings
+fold onto the term: case and Unicode compatibility forms, ``ё`` → ``е``
+and ``й`` → ``и``, Latin look-alikes and leetspeak digits → Cyrillic
+letters, punctuation inside words dropped and repeated letters collapsed
+("Х.У.У.Й" and "xyй" both become "хуи"). A term matches anywhere in the normalized text;
+a term prefixed with ``=`` matches whole words only.
+
+Matching uses Aho-Corasick automata, so its cost depends on the text length
+and not on the number of terms. To keep edits cheap the terms are split
+into levels of automata with sizes doubling (Bentley-Saxe): adding terms
+builds a small automaton and merges equal-sized levels, so every term is
+rebuilt O(log n) times overall; removed terms are filtered out until they
+make up half of the list, then everything is rebuilt once.
+"""
+import logging
+import re
+import time
+import unicodedata
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Latin look-alikes, leetspeak and accented letters folded to one alphabet
+_FOLD = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м", "o": "о",
+    "p": "р", "t": "т", "x": "х", "y": "у",
+    "ё": "е", "й": "и",
+    "0": "о", "3": "з", "4": "ч", "6": "б", "8": "в", "@": "а",
+})
+_NON_WORD = re.compile(r"[^\w\s]|_")
+_SPACES = re.compile(r"\s+")
+_REPEATS = re.compile(r"(.)\1+")
+_COMBINING = re.compile(r"[\u0300-\u036f]")
+
+
+def normalize(text: str) -> str:
+    """Fold a text (or a term) to the form used for matching."""
+    text = unicodedata.normalize("NFKC", text).lower().translate(_FOLD)
+    # Drop combining marks left after decomposing accented letters
+    text = _COMBINING.sub("", unicodedata.normalize("NFD", text))
+    text = _NON_WORD.sub("", text)
+    text = _REPEATS.sub(r"\1", text)
+    return f" {_SPACES.sub(' ', text).strip()} "
+
+
+def normalize_term(term: str) -> str:
+    """Normalized pattern of a blocklist term, or "" if nothing is left."""
+    whole_word = term.startswith("=")
+    pattern = normalize(term.lstrip("="))
+    if not pattern.strip():
+        return ""
+    return pattern if whole_word else pattern.strip()
+
+
+class Automaton:
+    """Aho-Corasick automaton over a fixed set of patterns."""
+    __slots__ = ("patterns", "_goto", "_fail", "_out")
+
+    def __init__(self, patterns: set[str]):
+        self.patterns = patterns
+        self._goto: list[dict[str, int]] = [{}]
+        self._out: list[tuple[str, ...]] = [()]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (pattern,)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0) if state else 0
+                self._out[child] += self._out[self._fail[child]]
+
+    def find(self, text: str) -> set[str]:
+        """Patterns occurring in a normalized text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class Blocklist:
+    """Admin-editable term list with incremental automaton rebuilds."""
+
+    def __init__(self):
+        self._levels: list[Automaton] = []
+        # Normalized pattern -> term as entered by the admin
+        self._terms: dict[str, str] = {}
+        # Patterns removed from the list but still present in some level
+        self._stale: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def load(self, terms: list[str]) -> None:
+        """Replace the whole list."""
+        started = time.perf_counter()
+        self._terms = {}
+        for term in terms:
+            pattern = normalize_term(term)
+            if pattern:
+                self._terms[pattern] = term
+        self._stale.clear()
+        self._levels = [Automaton(set(self._terms))] if self._terms else []
+        logger.info("Blocklist loaded: %d terms in %.3fs", len(self._terms), time.perf_counter() - started)
+
+    def add(self, terms: list[str]) -> None:
+        """Add terms as a new level, merging levels of up to the same size."""
+        batch = set()
+        for term in terms:
+            pattern = normalize_term(term)
+            if not pattern or pattern in self._terms:
+                continue
+            self._terms[pattern] = term
+            if pattern in self._stale:
+                # Still compiled into an older level
+                self._stale.discard(pattern)
+            else:
+                batch.add(pattern)
+        if not batch:
+            return
+        while self._levels and len(self._levels[-1].patterns) <= len(batch):
+            merged = self._levels.pop().patterns
+            self._stale -= merged
+            batch |= merged & self._terms.keys()
+        self._levels.append(Automaton(batch))
+
+    def remove(self, terms: list[str]) -> None:
+        """Remove terms, rebuilding everything once half of the patterns is stale."""
+        for term in terms:
+            pattern = normalize_term(term)
+            if self._terms.pop(pattern, None) is not None:
+                self._stale.add(pattern)
+        if len(self._stale) * 2 > len(self._terms):
+            self.load(list(self._terms.values()))
+
+    def match(self, text: str) -> list[str]:
+        """Blocklist terms found in a text, sorted."""
+        if not self._levels:
+            return []
+        normalized = normalize(text)
+        found = set()
+        for level in self._levels:
+            found |= level.find(normalized)
+        return sorted(self._terms[pattern] for pattern in found if pattern in self._terms)
+
+    def terms(self) -> list[str]:
+        """All terms as entered, sorted."""
+        return sorted(self._terms.values())
+
+
+# Global blocklist, loaded from the database at startup
+blocklist = Blocklist()
@@ -0,0 +1,171 @@
+"""Ticket card service - renders personal cards off the event loop.
+
+Cards (``utils.cards``) are drawn in a ``ProcessPoolExecutor`` of
+``TICKET_CARD_WORKERS`` processes, so rendering neither blocks the event
+loop nor competes with it for the GIL. Each user's latest card is cached
+by its numbers (tickets, invited friends, friends who left a wish):
+
+- the first showing uploads the PNG and the cache keeps the ``file_id``
+  Telegram assigns to it, so the card is reused until a number changes;
+- a user opening the screen twice while their card renders waits for the
+  same render;
+- when ``TICKET_CARD_MAX_PENDING`` renders are already in progress (the
+  workers are saturated) or a render fails, the screen gets the static
+  image instead; so it does when the card isn't ready within
+  ``RENDER_WAIT``, and the card finishes in the background for the next
+  showing.
+
+Workers are started with ``spawn``: forking the bot would copy its
+threads' locks (database connections, the log listener) in whatever
+state they are in. They run at a lower CPU priority (``WORKER_NICENESS``)
+so on a host with few cores the event loop still gets the CPU first and
+cards are drawn in its idle time.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from aiogram.types import BufferedInputFile
+
+from config.config import TICKET_CARD_MAX_PENDING, TICKET_CARD_WORKERS
+from utils.cards import render_ticket_card
+from utils.metrics import CACHE, TICKET_CARD_RENDER, TICKET_CARDS
+from utils.screens import GeneratedPhoto
+
+logger = logging.getLogger(__name__)
+
+# Users whose latest card (file_id, or PNG until uploaded) is kept
+CACHE_SIZE = 10_000
+
+# Added to the workers' nice value
+WORKER_NICENESS = 10
+# Longest wait for a card before the static image is shown
+RENDER_WAIT = 0.5
+
+# (tickets, total referrals, active referrals)
+Numbers = tuple[int, int, int]
+
+
+def _lower_priority() -> None:
+    """Worker initializer: yield the CPU to the bot process."""
+    try:
+        os.nice(WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class CardRenderer:
+    """Process pool for ticket cards with a per-user cache."""
+
+    def __init__(self, workers: int = TICKET_CARD_WORKERS, max_pending: int = TICKET_CARD_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: ProcessPoolExecutor | None = None
+        # user_id -> (numbers, file_id or PNG), least recently shown first
+        self._cards: OrderedDict[int, tuple[Numbers, str | bytes]] = OrderedDict()
+        self._rendering: dict[tuple[int, Numbers], asyncio.Future] = {}
+
+    async def start(self) -> None:
+        """Start the worker processes and wait until each has imported the renderer."""
+        if self.workers <= 0 or self._pool is not None:
+            return
+        self._pool = self._new_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, render_ticket_card, 0, 0, 0, "") for _ in range(self.workers)
+        ))
+
+    async def get(self, user_id: int, tickets: int, total_referrals: int, active_referrals: int,
+                  link: str) -> GeneratedPhoto | None:
+        """The user's card, or ``None`` if the static image has to do."""
+        if self._pool is None:
+            return None
+        numbers = (tickets, total_referrals, active_referrals)
+        cached = self._cards.get(user_id)
+        if cached is not None and cached[0] == numbers:
+            CACHE.inc("ticket_card", "hit")
+            self._cards.move_to_end(user_id)
+            return self._photo(user_id, numbers, cached[1])
+        CACHE.inc("ticket_card", "miss")
+
+        key = (user_id, numbers)
+        render = self._rendering.get(key)
+        if render is None:
+            if len(self._rendering) >= self.max_pending:
+                TICKET_CARDS.inc("saturated")
+                return None
+            render = self._rendering[key] = asyncio.ensure_future(self._render(key, link))
+        try:
+            # Shielded: giving up on the wait must not cancel the render
+            png = await asyncio.wait_for(asyncio.shield(render), RENDER_WAIT)
+        except asyncio.TimeoutError:
+            TICKET_CARDS.inc("late")
+            return None
+        if png is None:
+            return None
+        return self._photo(user_id, numbers, png)
+
+    async def _render(self, key: tuple[int, Numbers], link: str) -> bytes | None:
+        user_id, numbers = key
+        try:
+            with TICKET_CARD_RENDER.time():
+                png = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, render_ticket_card, *numbers, link
+                )
+        except Exception as e:
+            logger.warning("Ticket card of %s failed to render: %s", user_id, e)
+            TICKET_CARDS.inc("failed")
+            if isinstance(e, BrokenProcessPool):
+                # A worker died; replace the pool for later renders
+                self._restart()
+            return None
+        finally:
+            del self._rendering[key]
+        TICKET_CARDS.inc("rendered")
+        self._store(user_id, numbers, png)
+        return png
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_lower_priority
+        )
+
+    def _restart(self) -> None:
+        broken, self._pool = self._pool, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    def _store(self, user_id: int, numbers: Numbers, media: str | bytes) -> None:
+        self._cards[user_id] = (numbers, media)
+        self._cards.move_to_end(user_id)
+        if len(self._cards) > CACHE_SIZE:
+            self._cards.popitem(last=False)
+
+    def _uploaded(self, user_id: int, numbers: Numbers, file_id: str) -> None:
+        # Only if the card still shows the latest numbers
+        cached = self._cards.get(user_id)
+        if cached is not None and cached[0] == numbers:
+            self._cards[user_id] = (numbers, file_id)
+
+    def _photo(self, user_id: int, numbers: Numbers, media: str | bytes) -> GeneratedPhoto:
+        if isinstance(media, str):
+            return GeneratedPhoto(media)
+        return GeneratedPhoto(
+            BufferedInputFile(media, "tickets.png"),
+            lambda file_id: self._uploaded(user_id, numbers, file_id)
+        )
+
+    async def close(self) -> None:
+        """Stop the worker processes."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+
+# Global renderer; ``main`` starts its workers
+card_renderer = CardRenderer()
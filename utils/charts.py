@@ -0,0 +1,85 @@
+"""Dependency-free bar charts rendered straight to PNG.
+
+The bot has no plotting library, and a chart of a few hourly series only
+needs filled rectangles: panels are drawn into an RGB byte buffer and
+encoded with ``zlib``. There is no text in the image; captions carry the
+numbers. Rendering is CPU work, call it through ``asyncio.to_thread``.
+"""
+import struct
+import zlib
+
+Color = tuple[int, int, int]
+
+BACKGROUND: Color = (255, 255, 255)
+GRID: Color = (225, 228, 232)
+DAY_LINE: Color = (190, 195, 202)
+
+WIDTH = 960
+PANEL_HEIGHT = 120
+PADDING = 12
+
+
+class Canvas:
+    """RGB pixel buffer with rectangle filling."""
+
+    def __init__(self, width: int, height: int, background: Color = BACKGROUND):
+        self.width = width
+        self.height = height
+        self.pixels = bytearray(bytes(background) * (width * height))
+
+    def fill(self, x: int, y: int, width: int, height: int, color: Color) -> None:
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        row = bytes(color) * (x1 - x0)
+        for line in range(y0, y1):
+            start = (line * self.width + x0) * 3
+            self.pixels[start:start + len(row)] = row
+
+    def to_png(self) -> bytes:
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        stride = self.width * 3
+        # Filter type 0 (none) before every scanline
+        raw = b"".join(b"\x00" + self.pixels[y * stride:(y + 1) * stride] for y in range(self.height))
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b"")
+        )
+
+
+def render_series(panels: list[tuple[list[int], Color]], day_starts: list[int] = ()) -> bytes:
+    """Stacked bar-chart panels, one per series, sharing the time axis.
+
+    Each panel is scaled to its own maximum. ``day_starts`` are indexes
+    of the values that begin a new day, marked with vertical lines.
+    """
+    count = max((len(values) for values, _ in panels), default=0) or 1
+    plot_width = WIDTH - 2 * PADDING
+    height = len(panels) * (PANEL_HEIGHT + PADDING) + PADDING
+    canvas = Canvas(WIDTH, height)
+
+    def column(index: int) -> int:
+        return PADDING + index * plot_width // count
+
+    for number, (values, color) in enumerate(panels):
+        top = PADDING + number * (PANEL_HEIGHT + PADDING)
+        for quarter in range(5):
+            canvas.fill(PADDING, top + quarter * (PANEL_HEIGHT - 1) // 4, plot_width, 1, GRID)
+        for index in day_starts:
+            canvas.fill(column(index), top, 1, PANEL_HEIGHT, DAY_LINE)
+        peak = max(values, default=0)
+        if peak <= 0:
+            continue
+        for index, value in enumerate(values):
+            bar = max(value, 0) * PANEL_HEIGHT // peak
+            if bar:
+                x = column(index)
+                bar_width = max(column(index + 1) - x - (1 if count <= plot_width // 3 else 0), 1)
+                canvas.fill(x, top + PANEL_HEIGHT - bar, bar_width, bar, color)
+    return canvas.to_png()
@@ -1,10 +1,18 @@
+"""Inline keyboards.
+
+Static keyboards are built once at import time and shared between updates,
+so handlers don't construct new pydantic trees on every call. The returned
+markups must not be mutated.
+"""
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 
-def get_main_menu() -> InlineKeyboardMarkup:
-    """Главное меню бота."""
+def _build_main_menu() -> InlineKeyboardMarkup:
     buttons = [
-        [InlineKeyboardButton(text="🎫 Мои билеты", callback_data="my_tickets")],
+        [
+            InlineKeyboardButton(text="🎫 Мои билеты", callback_data="my_tickets"),
+            InlineKeyboardButton(text="🏆 Лидеры", callback_data="leaderboard")
+        ],
         [
             InlineKeyboardButton(text="✨ Оставить пожелание", callback_data="leave_wish"),
             InlineKeyboardButton(text="📜 Правила", callback_data="rules")
@@ -13,15 +21,13 @@ def get_main_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
-def get_back_button() -> InlineKeyboardMarkup:
-    """Кнопка возврата в главное меню."""
+def _build_back_button() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="⬅️ Назад", callback_data="main_menu")]
     ])
 
 
-def get_admin_menu(bot_enabled: bool = True) -> InlineKeyboardMarkup:
-    """Главное меню админ-панели с красивой компоновкой."""
+def _build_admin_menu(bot_enabled: bool) -> InlineKeyboardMarkup:
     toggle_text = "🟢 Бот ВКЛ" if bot_enabled else "🔴 Бот ВЫКЛ"
     toggle_data = "admin_toggle_bot"
     
@@ -33,18 +39,30 @@ def get_admin_menu(bot_enabled: bool = True) -> InlineKeyboardMarkup:
             InlineKeyboardButton(text="📁 Экспорт", callback_data="admin_export"),
             InlineKeyboardButton(text="📨 Установить пост", callback_data="admin_set_post")
         ],
-        # Выдача билетов - на всю ширину
-        [InlineKeyboardButton(text="🎁 Выдать билеты", callback_data="admin_give_tickets")],
+        # Выдача билетов и рассылки - в 2 колонки
+        [
+            InlineKeyboardButton(text="🎁 Выдать билеты", callback_data="admin_give_tickets"),
+            InlineKeyboardButton(text="📢 Рассылки", callback_data="admin_broadcasts")
+        ],
         # Управление пожеланиями и очистка поста - в 2 колонки
         [
             InlineKeyboardButton(text="🗑 Удалить пожелание", callback_data="admin_reset_wish"),
             InlineKeyboardButton(text="❌ Убрать пост", callback_data="admin_clear_post")
+        ],
+        # Массовая модерация и лидеры - в 2 колонки
+        [
+            InlineKeyboardButton(text="🧹 Массовое удаление", callback_data="admin_bulk_reset"),
+            InlineKeyboardButton(text="🏆 Лидеры", callback_data="admin_top:tickets")
+        ],
+        # Аналитика и проверка рефералов - в 2 колонки
+        [
+            InlineKeyboardButton(text="📈 Статистика", callback_data="admin_stats"),
+            InlineKeyboardButton(text="🕵️ Подозрительные", callback_data="admin_fraud")
         ]
     ])
 
 
-def get_admin_export_menu() -> InlineKeyboardMarkup:
-    """Меню экспорта данных для админа."""
+def _build_admin_export_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(text="📊 CSV", callback_data="export_csv"),
@@ -54,9 +72,139 @@ def get_admin_export_menu() -> InlineKeyboardMarkup:
     ])
 
 
+def _build_admin_cancel_button() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="❌ Отменить", callback_data="admin_cancel_input")]
+    ])
+
+
+def _build_admin_user_search() -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🔍 Найти пользователя", switch_inline_query_current_chat="user:")],
+        [InlineKeyboardButton(text="❌ Отменить", callback_data="admin_cancel_input")]
+    ])
+
+
+MAIN_MENU = _build_main_menu()
+BACK_BUTTON = _build_back_button()
+ADMIN_MENU_ENABLED = _build_admin_menu(True)
+ADMIN_MENU_DISABLED = _build_admin_menu(False)
+ADMIN_EXPORT_MENU = _build_admin_export_menu()
+ADMIN_CANCEL_BUTTON = _build_admin_cancel_button()
+ADMIN_USER_SEARCH = _build_admin_user_search()
+
+
+def get_main_menu() -> InlineKeyboardMarkup:
+    """Главное меню бота."""
+    return MAIN_MENU
+
+
+def get_back_button() -> InlineKeyboardMarkup:
+    """Кнопка возврата в главное меню."""
+    return BACK_BUTTON
+
+
+def get_admin_menu(bot_enabled: bool = True) -> InlineKeyboardMarkup:
+    """Главное меню админ-панели с красивой компоновкой."""
+    return ADMIN_MENU_ENABLED if bot_enabled else ADMIN_MENU_DISABLED
+
+
+def get_admin_export_menu() -> InlineKeyboardMarkup:
+    """Меню экспорта данных для админа."""
+    return ADMIN_EXPORT_MENU
+
+
 def get_admin_cancel_button() -> InlineKeyboardMarkup:
     """Кнопка отмены для админ-панели."""
+    return ADMIN_CANCEL_BUTTON
+
+
+def get_admin_user_search() -> InlineKeyboardMarkup:
+    """Поиск пользователя по началу username (inline-режим) и кнопка отмены."""
+    return ADMIN_USER_SEARCH
+
+
+
+def get_admin_broadcasts_menu(targets: list[dict]) -> InlineKeyboardMarkup:
+    """Список целей рассылки со ссылками на их настройки."""
+    buttons = [
+        [InlineKeyboardButton(
+            text=f"{'🟢' if target['enabled'] else '⏸'} {target['chat_id']}",
+            callback_data=f"bt_view:{target['id']}"
+        )]
+        for target in targets
+    ]
+    buttons.append([InlineKeyboardButton(text="➕ Добавить чат", callback_data="bt_add")])
+    buttons.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_back")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_admin_broadcast_target_menu(target: dict) -> InlineKeyboardMarkup:
+    """Настройки одной цели рассылки."""
+    target_id = target["id"]
+    toggle_text = "⏸ Приостановить" if target["enabled"] else "▶️ Включить"
     return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=toggle_text, callback_data=f"bt_toggle:{target_id}")],
+        [
+            InlineKeyboardButton(text="⏱ Интервал", callback_data=f"bt_edit:{target_id}:interval"),
+            InlineKeyboardButton(text="🌙 Тихие часы", callback_data=f"bt_edit:{target_id}:quiet")
+        ],
+        [
+            InlineKeyboardButton(text="💬 Пост", callback_data=f"bt_edit:{target_id}:post"),
+            InlineKeyboardButton(text="🗑 Удалить", callback_data=f"bt_delete:{target_id}")
+        ],
+        [InlineKeyboardButton(text="⬅️ К рассылкам", callback_data="admin_broadcasts")]
+    ])
+
+
+def get_admin_bulk_confirm_menu(count: int) -> InlineKeyboardMarkup:
+    """Подтверждение массового удаления пожеланий."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"🗑 Удалить {count}", callback_data="bulk_reset_confirm")],
         [InlineKeyboardButton(text="❌ Отменить", callback_data="admin_cancel_input")]
     ])
 
+
+def get_admin_held_wish_menu(held_id: int) -> InlineKeyboardMarkup:
+    """Решение по пожеланию на модерации."""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="✅ Опубликовать", callback_data=f"held_approve:{held_id}"),
+        InlineKeyboardButton(text="❌ Отклонить", callback_data=f"held_reject:{held_id}")
+    ]])
+
+
+def get_admin_leaderboard_menu(kind: str) -> InlineKeyboardMarkup:
+    """Переключение между рейтингами по билетам и по рефералам."""
+    switch = (
+        InlineKeyboardButton(text="👥 По рефералам", callback_data="admin_top:referrals")
+        if kind == "tickets" else
+        InlineKeyboardButton(text="🎫 По билетам", callback_data="admin_top:tickets")
+    )
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [switch],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_back")]
+    ])
+
+
+def get_admin_fraud_menu() -> InlineKeyboardMarkup:
+    """Отчёт о подозрительных реферерах."""
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="🔄 Пересчитать", callback_data="admin_fraud_run"),
+            InlineKeyboardButton(text="📄 CSV", callback_data="admin_fraud_csv")
+        ],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin_back")]
+    ])
+
+
+def get_admin_stats_menu(hours: int) -> InlineKeyboardMarkup:
+    """Выбор периода графика и выгрузка CSV."""
+    periods = ((24, "24 ч"), (7 * 24, "7 дней"), (30 * 24, "30 дней"))
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text=f"• {label} •" if value == hours else label,
+                                 callback_data=f"stats_period:{value}")
+            for value, label in periods
+        ],
+        [InlineKeyboardButton(text="📄 CSV", callback_data=f"stats_csv:{hours}")]
+    ])
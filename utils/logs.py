@@ -0,0 +1,160 @@
+"""Non-blocking structured logging.
+
+The event loop never writes log output itself: the root logger has a
+single ``QueueHandler`` that puts records on an in-process queue, and a
+``QueueListener`` thread formats them and writes to stdout. Records are
+queued as is, so ``%``-style arguments are only formatted in the listener
+thread; pass immutable values (ids, strings, numbers) as arguments.
+
+Before a record is queued it is stamped with the update context set by
+``LogContextMiddleware`` (``user_id``, ``update_id``, ``handler``) and
+passed through sampling: INFO and lower records of loggers listed in
+``LOG_SAMPLING`` are kept with the configured probability.
+
+Output is one JSON object per line (``LOG_FORMAT=json``) or the classic
+text format (``LOG_FORMAT=text``).
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Fields of the update being handled, added to every record logged during it
+CONTEXT_FIELDS = ("user_id", "update_id", "handler")
+log_context: ContextVar[dict | None] = ContextVar("log_context", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """Parse ``"aiogram.event=WARNING,data.query_log=ERROR"`` into logger levels."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def parse_rates(spec: str) -> dict[str, float]:
+    """Parse ``"apps.handlers.common=0.1"`` into sampling rates."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the current update context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = log_context.get()
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field) if context else None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a share of INFO and lower records per logger (longest prefix wins)."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefix = max(
+                (key for key in self.rates if name == key or name.startswith(key + ".")),
+                key=len,
+                default=None
+            )
+            rate = self._resolved[name] = self.rates[prefix] if prefix else 1.0
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _PassThroughQueueHandler(QueueHandler):
+    """Queue records unformatted; formatting happens in the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with the update context and ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", levels: str = "", sampling: str = "") -> QueueListener:
+    """Route all logging through a background listener thread.
+
+    ``levels`` and ``sampling`` are ``logger=value`` lists as in
+    ``LOG_LEVELS`` and ``LOG_SAMPLING``. The listener is stopped (and the
+    queue drained) at interpreter exit.
+    """
+    # Neither format prints call sites, threads or processes: skip collecting
+    # them for every record (the switches from the logging HOWTO "Optimization")
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    handler = _PassThroughQueueHandler(records)
+    handler.addFilter(SamplingFilter(parse_rates(sampling)))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(logging.getLevelName(level.upper()))
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = QueueListener(records, output)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
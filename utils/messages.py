@@ -49,18 +49,48 @@ class Messages:
         "Приглашай друзей, чтобы увеличить свои шансы!"
     )
     
+    WISH_POST = (
+        "🎄 Новогоднее пожелание от {username}:\n"
+        "<blockquote>{wish_text}</blockquote>"
+    )
+    
+    WISH_HELD = (
+        "🛡 <b>Пожелание отправлено на модерацию</b>\n\n"
+        "Мы проверим его и сообщим результат. Билет начислим после одобрения 🎫"
+    )
+    
+    WISH_APPROVED = (
+        "✅ <b>Ваше пожелание одобрено и опубликовано!</b>\n\n"
+        "Вы получили +1 билет 🎫"
+    )
+    
+    WISH_REJECTED = (
+        "❌ <b>Ваше пожелание не прошло модерацию.</b>\n\n"
+        "Вы можете оставить другое пожелание в меню бота."
+    )
+    
     WISH_ERROR = "❌ Произошла ошибка или вы уже оставляли пожелание."
     WISH_TEXT_REQUIRED = "❌ Пожалуйста, пришлите текстовое пожелание."
     
     # === Tickets ===
     TICKETS_INFO = (
         "🎫 <b>Ваши билеты:</b> {tickets}\n"
+        "🏆 <b>Место в рейтинге:</b> {rank} из {total}\n"
         "👥 <b>Приглашено друзей:</b> {total_referrals} ({active_referrals} оставили пожелание)\n\n"
         "🔗 <b>Ваша реферальная ссылка:</b>\n<code>{link}</code>\n\n"
         "Отправьте её друзьям! За каждого приглашённого друга, "
         "который оставит пожелание, вы получите +1 билет 🎁"
     )
     
+    # === Leaderboard ===
+    LEADERBOARD = (
+        "🏆 <b>Топ-{size} по билетам</b>\n{tickets_top}\n\n"
+        "👥 <b>Топ-{size} по приглашённым друзьям</b>\n{referrals_top}\n\n"
+        "📍 <b>Ваше место:</b> {tickets_rank} по билетам, {referrals_rank} по друзьям (из {total})"
+    )
+    LEADERBOARD_EMPTY = "Пока никого — станьте первым!"
+    LEADERBOARD_ANONYMOUS = "Участник"
+    
     # === Subscription ===
     SUBSCRIPTION_REQUIRED = "📋 <b>Для участия в розыгрыше нужно подписаться:</b>"
     SUBSCRIPTION_CHECK_FAILED = "❌ Вы не подписаны на все каналы!"
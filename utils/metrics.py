@@ -0,0 +1,206 @@
+"""Lightweight Prometheus metrics.
+
+Counters, gauges and histograms are kept in plain dicts keyed by label
+values and rendered in the Prometheus text exposition format on a local
+``/metrics`` HTTP endpoint (served by aiohttp, which aiogram already
+depends on). Recording a sample is a dict lookup plus a bisect, cheap
+enough to stay on in production.
+"""
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        REGISTRY.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float] | None = None):
+        super().__init__(name, documentation)
+        self._function = function
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def render(self) -> list[str]:
+        if self._function is None:
+            return []
+        return self.header() + [f"{self.name} {self._function()}"]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            cumulative += series[-2]
+            le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+# Commands the bot handles; other "/text" a user sends is labelled "other"
+COMMANDS = frozenset({
+    "/start", "/admin", "/backup", "/block", "/blocklist", "/dupes", "/events", "/export", "/held",
+    "/slowsql", "/unblock",
+})
+
+
+def action_label(action: str) -> str:
+    """Bounded ``action`` label of a callback_data or command.
+
+    Callback data is cut at the first ``:`` so IDs don't become labels
+    (``held_approve:12`` -> ``held_approve``).
+    """
+    if action.startswith("/"):
+        return action if action in COMMANDS else "other"
+    return action.split(":", 1)[0]
+
+
+UPDATES = Counter("bot_updates_total", "Updates received.", ("type",))
+ERRORS = Counter("bot_handler_errors_total", "Unhandled handler exceptions.", ("type",))
+THROTTLED = Counter("bot_throttled_total", "Updates dropped by anti-flood throttling.", ("action",))
+COALESCED = Counter("bot_coalesced_total", "Duplicate callbacks coalesced by single-flight.", ("action",))
+CACHE = Counter("bot_cache_total", "Cache lookups.", ("cache", "result"))
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds", "Handler latency.", ("router", "handler", "action")
+)
+REPOSITORY_LATENCY = Histogram(
+    "bot_repository_duration_seconds", "Repository method latency.", ("method",)
+)
+API_LATENCY = Histogram(
+    "bot_api_duration_seconds", "Bot API request latency.", ("method",)
+)
+API_ERRORS = Counter("bot_api_errors_total", "Failed Bot API requests.", ("method",))
+IN_FLIGHT = Gauge("bot_in_flight_handlers", "Updates currently being handled.")
+BACKUP_DURATION = Histogram(
+    "bot_backup_duration_seconds", "Online backup duration, copy and compression.",
+    buckets=(1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+BACKUP_STALL = Histogram("bot_backup_writer_stall_seconds", "Longest wait for the database writer during a backup.")
+OUTBOX = Counter("bot_outbox_total", "Outbox delivery attempts.", ("kind", "result"))
+OUTBOX_LAG = Histogram(
+    "bot_outbox_lag_seconds", "Time from queuing an outbox message to its delivery.", ("kind",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 3600.0)
+)
+
+TICKET_CARDS = Counter("bot_ticket_cards_total", "Ticket card renders by outcome.", ("result",))
+TICKET_CARD_RENDER = Histogram("bot_ticket_card_render_seconds", "Ticket card render time, queueing included.")
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` on the given address. Returns the runner to clean up."""
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics available at http://%s:%d/metrics", host, port)
+    return runner
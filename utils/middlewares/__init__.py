@@ -1,4 +1,15 @@
 """Middlewares package."""
 from utils.middlewares.error_handler import ErrorHandlerMiddleware
+from utils.middlewares.log_context import LogContextMiddleware
+from utils.middlewares.metrics import MetricsMiddleware, BotApiMetricsMiddleware
+from utils.middlewares.single_flight import SingleFlightMiddleware
+from utils.middlewares.throttling import ThrottlingMiddleware
 
-__all__ = ["ErrorHandlerMiddleware"]
+__all__ = [
+    "ErrorHandlerMiddleware",
+    "LogContextMiddleware",
+    "MetricsMiddleware",
+    "BotApiMetricsMiddleware",
+    "SingleFlightMiddleware",
+    "ThrottlingMiddleware",
+]
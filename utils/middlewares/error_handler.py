@@ -5,6 +5,8 @@ from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Update
 
+from utils.metrics import ERRORS
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,6 +26,8 @@ class ErrorHandlerMiddleware(BaseMiddleware):
         try:
             return await handler(event, data)
         except Exception as e:
+            ERRORS.inc(event.event_type if isinstance(event, Update) else type(event).__name__)
+            
             # Get user info for logging if available
             user_id = None
             chat_id = None
@@ -37,7 +41,7 @@ class ErrorHandlerMiddleware(BaseMiddleware):
                     chat_id = event.callback_query.message.chat.id if event.callback_query.message else None
             
             logger.error(
-                f"Unhandled exception in handler: {e}",
+                "Unhandled exception in handler: %s", e,
                 exc_info=True,
                 extra={
                     "user_id": user_id,
@@ -0,0 +1,34 @@
+"""Logging context middleware - tags log records with the update being handled."""
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from utils.logs import log_context
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Set ``user_id``/``update_id`` (outer on ``update``) and ``handler`` (inner on events).
+
+    Everything logged while the update is handled, in any module, carries
+    these fields; see ``utils.logs``.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Update):
+            user: User | None = data.get("event_from_user")
+            context = {"update_id": event.update_id, "user_id": user.id if user else None}
+        else:
+            callback = getattr(data.get("handler"), "callback", None)
+            name = f"{getattr(callback, '__module__', 'unknown')}.{getattr(callback, '__name__', 'unknown')}"
+            context = {**(log_context.get() or {}), "handler": name}
+        token = log_context.set(context)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
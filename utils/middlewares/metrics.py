@@ -0,0 +1,70 @@
+"""Metrics middlewares for updates, handlers and Bot API requests."""
+import time
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject, Update, CallbackQuery, Message
+
+from utils.metrics import UPDATES, HANDLER_LATENCY, API_LATENCY, API_ERRORS, action_label
+
+
+def _event_action(event: TelegramObject) -> str:
+    if isinstance(event, CallbackQuery):
+        return action_label(event.data or "")
+    if isinstance(event, Message):
+        text = event.text or ""
+        return action_label(text.split(maxsplit=1)[0].split("@", 1)[0]) if text.startswith("/") else "message"
+    return type(event).__name__
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Count updates (outer on ``update``) and time handlers (inner on events).
+
+    Handler latency is labelled by the handler's module (its router),
+    function name and the callback_data prefix or command that triggered
+    it (see ``action_label``).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Update):
+            UPDATES.inc(event.event_type)
+            return await handler(event, data)
+
+        handler_object = data.get("handler")
+        callback = getattr(handler_object, "callback", None)
+        router = getattr(callback, "__module__", "unknown")
+        name = getattr(callback, "__name__", "unknown")
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - started, router, name, _event_action(event))
+
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Time every Bot API request by method name."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception:
+            API_ERRORS.inc(api_method)
+            raise
+        finally:
+            API_LATENCY.observe(time.perf_counter() - started, api_method)
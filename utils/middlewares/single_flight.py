@@ -0,0 +1,99 @@
+"""Single-flight middleware for duplicate and concurrent user updates.
+
+Double taps deliver the same callback twice; both copies would run the
+full subscription check, DB reads and sends in parallel. While a
+``(user, callback_data)`` handler is in flight, identical callbacks are
+acknowledged and dropped.
+
+Handlers that take an ``FSMContext`` are additionally serialized per user,
+so e.g. two wishes sent at once can't race inside ``process_wish``. If the
+user's FSM state changed while an update waited for its turn, the update
+is dropped because the filters it passed were checked against the old
+state.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, CallbackQuery
+
+from utils.metrics import COALESCED, action_label
+
+logger = logging.getLogger(__name__)
+
+
+class _UserLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class SingleFlightMiddleware(BaseMiddleware):
+    """Coalesce duplicate callbacks and serialize FSM handlers per user.
+
+    Register as an inner middleware on ``message`` and ``callback_query``
+    so the matched handler is known.
+    """
+
+    def __init__(self):
+        self._in_flight: set[tuple[int, str]] = set()
+        self._locks: dict[int, _UserLock] = {}
+
+    async def _run_serialized(
+        self,
+        user_id: int,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        entry = self._locks.get(user_id)
+        if entry is None:
+            entry = self._locks[user_id] = _UserLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                state = data.get("state")
+                if state is not None and await state.get_state() != data.get("raw_state"):
+                    logger.debug("Dropping stale update for user %s", user_id)
+                    return None
+                return await handler(event, data)
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del self._locks[user_id]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        handler_object = data.get("handler")
+        uses_state = handler_object is not None and "state" in handler_object.params
+
+        key = None
+        if isinstance(event, CallbackQuery):
+            key = (user.id, event.data or "")
+            if key in self._in_flight:
+                COALESCED.inc(action_label(key[1]))
+                try:
+                    await event.answer()
+                except Exception:
+                    pass
+                return None
+            self._in_flight.add(key)
+
+        try:
+            if uses_state:
+                return await self._run_serialized(user.id, handler, event, data)
+            return await handler(event, data)
+        finally:
+            if key is not None:
+                self._in_flight.discard(key)
@@ -0,0 +1,160 @@
+"""Anti-flood middleware with per-user token buckets.
+
+Every user gets one global bucket plus one bucket per throttled action
+(callback_data or command). Actions without an explicit limit share a
+single ``default`` bucket, so memory per active user is bounded by the
+number of configured limits. Idle users are evicted in LRU order.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config.config import ADMIN_IDS
+from utils.metrics import THROTTLED
+
+logger = logging.getLogger(__name__)
+
+# (rate per second, burst size)
+Limit = tuple[float, float]
+
+DEFAULT_ACTION_LIMITS: dict[str, Limit] = {
+    # Heavy actions: subscription checks, DB reads and photo uploads
+    "/start": (0.5, 2),
+    "check_subscription": (0.5, 2),
+    "my_tickets": (0.5, 3),
+    "leaderboard": (0.5, 3),
+    "leave_wish": (0.5, 3),
+    "default": (2.0, 5),
+}
+DEFAULT_USER_LIMIT: Limit = (3.0, 10)
+IDLE_TTL_SECONDS = 300
+
+
+class _Bucket:
+    """Token bucket refilled lazily on access."""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def consume(self, rate: float, burst: float, now: float) -> bool:
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _UserState:
+    __slots__ = ("total", "actions", "last_seen")
+
+    def __init__(self, burst: float, now: float):
+        self.total = _Bucket(burst, now)
+        self.actions: dict[str, _Bucket] = {}
+        self.last_seen = now
+
+
+def get_update_action(update: Update) -> tuple[int | None, str | None, Any]:
+    """Extract (user_id, action, event) from an update.
+
+    The action is the callback_data for callback queries, the command
+    for ``/commands`` and ``message`` for any other text.
+    """
+    if update.callback_query:
+        query = update.callback_query
+        return query.from_user.id, query.data, query
+    if update.message and update.message.from_user:
+        message = update.message
+        text = message.text or ""
+        action = text.split(maxsplit=1)[0].split("@", 1)[0] if text.startswith("/") else "message"
+        return message.from_user.id, action, message
+    return None, None, None
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Drop updates from users exceeding their rate limits.
+
+    Throttled callback queries get an empty ``callback.answer()`` so the
+    client stops its loading spinner; throttled messages are ignored.
+    Administrators are never throttled. Drops are exported as the
+    ``bot_throttled_total`` metric.
+    """
+
+    def __init__(
+        self,
+        action_limits: dict[str, Limit] | None = None,
+        user_limit: Limit = DEFAULT_USER_LIMIT,
+        idle_ttl: float = IDLE_TTL_SECONDS,
+    ):
+        self.action_limits = action_limits or DEFAULT_ACTION_LIMITS
+        self.user_limit = user_limit
+        self.idle_ttl = idle_ttl
+        self._users: OrderedDict[int, _UserState] = OrderedDict()
+
+    def _evict_idle(self, now: float) -> None:
+        users = self._users
+        while users:
+            user_id, state = next(iter(users.items()))
+            if now - state.last_seen < self.idle_ttl:
+                break
+            del users[user_id]
+
+    def _limit_key(self, action: str | None) -> str:
+        """The bucket of an action: its own if it has a limit, else ``default``."""
+        return action if action in self.action_limits else "default"
+
+    def _allow(self, user_id: int, key: str, now: float) -> bool:
+        state = self._users.get(user_id)
+        if state is None:
+            state = self._users[user_id] = _UserState(self.user_limit[1], now)
+        else:
+            self._users.move_to_end(user_id)
+            state.last_seen = now
+
+        rate, burst = self.action_limits[key]
+        bucket = state.actions.get(key)
+        if bucket is None:
+            bucket = state.actions[key] = _Bucket(burst, now)
+        if not bucket.consume(rate, burst, now):
+            return False
+        return state.total.consume(self.user_limit[0], self.user_limit[1], now)
+
+    @property
+    def active_users(self) -> int:
+        """Number of users currently tracked."""
+        return len(self._users)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        user_id, action, inner = get_update_action(event)
+        if user_id is None or user_id in ADMIN_IDS:
+            return await handler(event, data)
+
+        now = time.monotonic()
+        self._evict_idle(now)
+        key = self._limit_key(action)
+        if self._allow(user_id, key, now):
+            return await handler(event, data)
+
+        # Labelled by bucket: the action itself is user-controlled text or callback data
+        THROTTLED.inc(key)
+        logger.debug("Throttled user %s on %s", user_id, action)
+        if event.callback_query:
+            try:
+                await inner.answer()
+            except Exception:
+                pass
+        return None
@@ -0,0 +1,83 @@
+"""MinHash signatures and LSH band keys for near-duplicate wishes.
+
+A wish is normalized like blocklist input (case, look-alike letters,
+punctuation, emoji and repeated letters don't matter), split into
+character 5-gram shingles and summarized by a 64-value MinHash signature.
+Signatures use one-permutation hashing with rotation densification: each
+shingle is hashed once and lands in one of 64 bins, so a signature costs
+O(shingles) rather than O(shingles × 64).
+
+The fraction of equal signature values estimates the Jaccard similarity of
+the shingle sets. For candidate search the signature is cut into 16 bands
+of 4 values; two wishes share at least one band key with probability
+1 - (1 - J^4)^16, i.e. ~99% at J = 0.7 and ~12% at J = 0.3.
+"""
+import hashlib
+from array import array
+
+from utils.blocklist import normalize
+
+SHINGLE_SIZE = 5
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+# Estimated Jaccard similarity from which a wish counts as a near-duplicate
+SIMILARITY_THRESHOLD = 0.7
+
+_BIN_BITS = 6  # 2 ** 6 == NUM_HASHES bins
+_VALUE_BITS = 64 - _BIN_BITS
+_VALUE_MASK = (1 << _VALUE_BITS) - 1
+_EMPTY = 1 << 64
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def shingles(text: str) -> set[str]:
+    """Character shingles of a normalized text."""
+    text = normalize(text)
+    return {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+
+
+def signature(text: str) -> array:
+    """MinHash signature of a text (``NUM_HASHES`` unsigned 64-bit values)."""
+    bins = [_EMPTY] * NUM_HASHES
+    for shingle in shingles(text):
+        value = _hash64(shingle.encode())
+        index = value >> _VALUE_BITS
+        value &= _VALUE_MASK
+        if value < bins[index]:
+            bins[index] = value
+    # Empty bins borrow the next non-empty bin's value, tagged with the distance
+    result = array("Q", bytes(8 * NUM_HASHES))
+    for index in range(NUM_HASHES):
+        distance = 0
+        while bins[(index + distance) % NUM_HASHES] == _EMPTY:
+            distance += 1
+        result[index] = (distance << _VALUE_BITS) | bins[(index + distance) % NUM_HASHES]
+    return result
+
+
+def band_keys(sig: array) -> list[int]:
+    """One signed 64-bit bucket key per band (fits an SQLite INTEGER)."""
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def pack(sig: array) -> bytes:
+    return sig.tobytes()
+
+
+def unpack(data: bytes) -> array:
+    sig = array("Q")
+    sig.frombytes(data)
+    return sig
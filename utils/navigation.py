@@ -0,0 +1,162 @@
+"""Screen navigation helpers.
+
+Screens are switched by editing the existing bot message in place
+(``edit_message_media`` / ``edit_message_caption`` / ``edit_message_text``)
+instead of deleting it and sending a new one. Resending is only used when
+the message type cannot be converted by editing. Uploaded photos are
+remembered by ``file_id`` so each asset is uploaded to Telegram only once;
+generated photos hand their ``file_id`` to their own cache.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Coroutine, Any
+
+from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, InputFile, InputMediaPhoto
+
+from utils.metrics import CACHE
+from utils.screens import GeneratedPhoto, Screen
+
+logger = logging.getLogger(__name__)
+
+# Telegram limit for photo captions
+CAPTION_LIMIT = 1024
+
+# Uploaded asset path -> Telegram file_id
+_file_ids: dict[str, str] = {}
+
+# Strong references to fire-and-forget tasks (asyncio keeps only weak ones)
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _on_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        logger.debug("Background task failed: %r", task.exception())
+
+
+def spawn(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """Run a non-critical coroutine in the background."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
+
+
+async def drain_background_tasks() -> None:
+    """Wait for all pending background tasks to finish."""
+    while _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+
+
+async def _safe_delete(message: types.Message) -> None:
+    try:
+        await message.delete()
+    except Exception:
+        pass
+
+
+def delete_later(message: types.Message) -> None:
+    """Delete a message without waiting for the API call."""
+    spawn(_safe_delete(message))
+
+
+def get_photo(path: Path | GeneratedPhoto) -> str | InputFile:
+    """Return a cached file_id for the asset or a file to upload."""
+    if isinstance(path, GeneratedPhoto):
+        return path.media
+    file_id = _file_ids.get(str(path))
+    if file_id:
+        CACHE.inc("photo_file_id", "hit")
+        return file_id
+    CACHE.inc("photo_file_id", "miss")
+    return FSInputFile(path)
+
+
+def remember_photo(path: Path | GeneratedPhoto, sent: types.Message | bool | None) -> None:
+    """Cache the file_id of an uploaded asset from the sent message."""
+    if not (isinstance(sent, types.Message) and sent.photo):
+        return
+    if isinstance(path, GeneratedPhoto):
+        if path.uploaded is not None:
+            path.uploaded(sent.photo[-1].file_id)
+    else:
+        _file_ids.setdefault(str(path), sent.photo[-1].file_id)
+
+
+def preload_photo(path: Path, file_id: str) -> None:
+    """Register a known file_id for an asset (used by the startup warm-up)."""
+    _file_ids[str(path)] = file_id
+
+
+def _is_not_modified(error: TelegramBadRequest) -> bool:
+    return "message is not modified" in str(error)
+
+
+async def send_screen(message: types.Message, screen: Screen) -> types.Message:
+    """Send a screen as a new message, with photo if it has one."""
+    if screen.photo is not None and len(screen.text) <= CAPTION_LIMIT:
+        sent = await message.answer_photo(
+            get_photo(screen.photo),
+            caption=screen.text,
+            parse_mode="HTML",
+            reply_markup=screen.keyboard
+        )
+        remember_photo(screen.photo, sent)
+        return sent
+    return await message.answer(screen.text, parse_mode="HTML", reply_markup=screen.keyboard)
+
+
+async def _edit_screen(message: types.Message, screen: Screen) -> bool:
+    """Try to switch the screen in place. Returns False if not possible."""
+    if message.photo:
+        if len(screen.text) > CAPTION_LIMIT:
+            return False
+        if screen.photo is not None:
+            edited = await message.edit_media(
+                InputMediaPhoto(media=get_photo(screen.photo), caption=screen.text, parse_mode="HTML"),
+                reply_markup=screen.keyboard
+            )
+            remember_photo(screen.photo, edited)
+        else:
+            # Text-only screen on top of a photo: keep the picture, swap the caption
+            await message.edit_caption(caption=screen.text, parse_mode="HTML", reply_markup=screen.keyboard)
+        return True
+
+    if message.text and screen.photo is None:
+        await message.edit_text(screen.text, parse_mode="HTML", reply_markup=screen.keyboard)
+        return True
+
+    return False
+
+
+async def show_screen(callback: types.CallbackQuery, screen: Screen) -> None:
+    """Switch the callback's message to another screen.
+
+    Edits the message in place when possible; otherwise sends a new
+    message and deletes the old one in the background.
+    """
+    message = callback.message
+    if isinstance(message, types.Message):
+        try:
+            if await _edit_screen(message, screen):
+                return
+        except TelegramBadRequest as e:
+            if _is_not_modified(e):
+                return
+            logger.debug("In-place edit failed, resending screen: %s", e)
+        delete_later(message)
+        await send_screen(message, screen)
+    else:
+        # Message is too old to be edited or deleted
+        bot, chat_id = callback.bot, callback.from_user.id
+        if screen.photo is not None and len(screen.text) <= CAPTION_LIMIT:
+            sent = await bot.send_photo(
+                chat_id, get_photo(screen.photo), caption=screen.text,
+                parse_mode="HTML", reply_markup=screen.keyboard
+            )
+            remember_photo(screen.photo, sent)
+        else:
+            await bot.send_message(chat_id, screen.text, parse_mode="HTML", reply_markup=screen.keyboard)
@@ -0,0 +1,173 @@
+"""Outbox dispatcher - delivers messages queued in ``OutboxRepository``.
+
+Handlers no longer wait for Telegram: the repositories queue the message
+in the transaction of the change it announces, and a background task
+sends due messages in batches of ``BATCH_SIZE``:
+
+- the text is built when sending by the renderer registered for the
+  message kind (``@outbox.renderer("wish_post")``);
+- messages to one chat go out in queue order, different chats concurrently
+  (at most ``MAX_CONCURRENT_SENDS`` requests at a time);
+- flood control postpones the rest of the chat's batch by ``retry_after``;
+  other transient errors postpone it with exponential backoff, up to
+  ``MAX_ATTEMPTS`` of the failing message; blocked bots, missing chats and
+  bad requests fail at once;
+- results of a batch are written in one transaction.
+
+The task is woken right after a commit that queued something and also
+polls every ``POLL_INTERVAL`` for retries that became due, so messages
+left over from a previous run are sent after a restart. ``close`` lets the
+batch in progress finish: a batch cut off mid-way would leave its sent
+messages pending, to be sent again after the restart.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+
+from data.database import db
+from utils.metrics import OUTBOX, OUTBOX_LAG
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+POLL_INTERVAL = 5.0
+MAX_CONCURRENT_SENDS = 10
+MAX_ATTEMPTS = 8
+# Backoff of the n-th retry: RETRY_BASE * 2**n seconds, at most RETRY_MAX
+RETRY_BASE = 2.0
+RETRY_MAX = 600.0
+# Sent messages older than the retention are purged this often
+PURGE_INTERVAL = 3600
+
+# Errors that won't go away by retrying
+PERMANENT_ERRORS = (TelegramForbiddenError, TelegramBadRequest, TelegramNotFound)
+
+# Payload -> ``send_message`` keyword arguments (``text``, ``parse_mode``, ...)
+Renderer = Callable[[dict], Awaitable[dict]]
+
+
+class OutboxDispatcher:
+    """Background sender of outbox messages."""
+
+    def __init__(self):
+        self._renderers: dict[str, Renderer] = {}
+        self._sends = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        self._bot: Bot | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._next_retry = float("inf")
+
+    def renderer(self, kind: str) -> Callable[[Renderer], Renderer]:
+        """Register the renderer of a message kind (decorator)."""
+        def register(render: Renderer) -> Renderer:
+            self._renderers[kind] = render
+            return render
+        return register
+
+    def start(self, bot: Bot) -> None:
+        """Start sending in the background."""
+        self._bot = bot
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        purged_at = 0.0
+        while True:
+            try:
+                # When closing, the batch in progress (or one more) is the last
+                while await self.dispatch() == BATCH_SIZE and not self._closing:
+                    pass
+                if not self._closing and time.monotonic() - purged_at > PURGE_INTERVAL:
+                    purged_at = time.monotonic()
+                    await db.outbox.purge_sent()
+            except Exception as e:
+                logger.warning("Outbox dispatch failed: %s", e)
+            if self._closing:
+                return
+            # Sleep until woken, the poll or the earliest retry; a wake-up that
+            # finds nothing due (its chat is postponed) keeps the retry time
+            timeout = min(POLL_INTERVAL, max(self._next_retry - time.time(), 0.0))
+            if not timeout:
+                self._next_retry = float("inf")
+            try:
+                await asyncio.wait_for(db.outbox.queued.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            db.outbox.queued.clear()
+
+    async def dispatch(self) -> int:
+        """Send one batch of due messages. Returns the number of messages handled."""
+        messages = await db.outbox.get_due(BATCH_SIZE)
+        if not messages:
+            return 0
+        by_chat: dict[int, list[dict]] = {}
+        # By id: a postponed message is due later than the ones queued after it
+        for message in sorted(messages, key=lambda message: message['id']):
+            by_chat.setdefault(message['chat_id'], []).append(message)
+        sent, retries, failed = [], [], []
+        await asyncio.gather(*(
+            self._send_chat(chat_messages, sent, retries, failed) for chat_messages in by_chat.values()
+        ))
+        await db.outbox.save_results(sent, retries, failed)
+        if retries:
+            self._next_retry = min(self._next_retry, min(retry[1] for retry in retries))
+        return len(messages)
+
+    async def _send_chat(self, messages: list[dict], sent: list, retries: list, failed: list) -> None:
+        for index, message in enumerate(messages):
+            kind = message['kind']
+            try:
+                render = self._renderers.get(kind)
+                if render is None:
+                    raise LookupError(f"No renderer for outbox messages of kind {kind!r}")
+                async with self._sends:
+                    await self._bot.send_message(message['chat_id'], **await render(message['payload']))
+            except TelegramRetryAfter as e:
+                # Flood control: nothing else goes to this chat until it is over
+                logger.warning("Flood control in %s, outbox retries in %ss", message['chat_id'], e.retry_after)
+                retry_at = time.time() + e.retry_after
+                retries.extend((rest['id'], retry_at, str(e), False) for rest in messages[index:])
+                OUTBOX.inc(kind, "flood")
+                return
+            except (*PERMANENT_ERRORS, LookupError) as e:
+                logger.warning("Outbox message %s to %s failed: %s", message['key'], message['chat_id'], e)
+                failed.append((message['id'], str(e)))
+                OUTBOX.inc(kind, "failed")
+            except Exception as e:
+                attempts = message['attempts'] + 1
+                if attempts >= MAX_ATTEMPTS:
+                    logger.error("Outbox message %s gave up after %d attempts: %s", message['key'], attempts, e)
+                    failed.append((message['id'], str(e)))
+                    OUTBOX.inc(kind, "failed")
+                else:
+                    # Like flood control, the rest of the chat waits to keep queue order
+                    retry_at = time.time() + min(RETRY_BASE * 2 ** message['attempts'], RETRY_MAX)
+                    retries.append((message['id'], retry_at, str(e), True))
+                    retries.extend(
+                        (rest['id'], retry_at, f"Waiting for {message['key']}", False) for rest in messages[index + 1:]
+                    )
+                    OUTBOX.inc(kind, "retried")
+                    return
+            else:
+                sent.append(message['id'])
+                OUTBOX.inc(kind, "sent")
+                OUTBOX_LAG.observe(time.time() - message['created_at'], kind)
+
+    async def close(self) -> None:
+        """Finish the batch in progress, or send what is due one last time, and stop."""
+        if self._task is None:
+            return
+        self._closing = True
+        db.outbox.queued.set()
+        # Shielded: if the drain deadline expires, the batch still completes
+        await asyncio.shield(self._task)
+        self._task = None
+
+
+# Global dispatcher; handlers register renderers, ``main`` starts it
+outbox = OutboxDispatcher()
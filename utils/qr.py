@@ -0,0 +1,283 @@
+"""Dependency-free QR code encoder.
+
+Encodes bytes in byte mode at error correction level M, which is all a
+referral link needs: versions 1-10 hold up to 213 bytes. The result is
+the module matrix (``True`` is dark) without the quiet zone; drawing it
+is up to the caller. The construction follows ISO/IEC 18004: data and
+Reed-Solomon codewords are interleaved over the blocks of the version,
+placed in the zigzag order around the function patterns, and the mask
+with the lowest penalty score is kept.
+"""
+import re
+
+# Version -> (EC codewords per block, [(number of blocks, data codewords per block), ...]) at level M
+_BLOCKS = {
+    1: (10, [(1, 16)]),
+    2: (16, [(1, 28)]),
+    3: (26, [(1, 44)]),
+    4: (18, [(2, 32)]),
+    5: (24, [(2, 43)]),
+    6: (16, [(4, 27)]),
+    7: (18, [(4, 31)]),
+    8: (22, [(2, 38), (2, 39)]),
+    9: (22, [(3, 36), (2, 37)]),
+    10: (26, [(4, 43), (1, 44)]),
+}
+# Version -> centre coordinates of the alignment patterns
+_ALIGNMENT = {
+    1: [], 2: [6, 18], 3: [6, 22], 4: [6, 26], 5: [6, 30],
+    6: [6, 34], 7: [6, 22, 38], 8: [6, 24, 42], 9: [6, 26, 46], 10: [6, 28, 50],
+}
+MAX_VERSION = max(_BLOCKS)
+# Error correction level M in the format information
+_FORMAT_LEVEL = 0b00
+
+_MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+# (version, mask) -> data modules the mask inverts
+_mask_cells: dict[tuple[int, int], list[tuple[int, int]]] = {}
+# Runs of five or more modules of one colour, penalised by rule 1
+_LONG_RUN = re.compile(r"0{5,}|1{5,}")
+# Finder-like runs (1:1:3:1:1 with 4 light modules on one side), penalised by rule 3
+_FINDER_LIKE = re.compile(r"(?=10111010000|00001011101)")
+
+# Exponent and logarithm tables of GF(2^8) modulo x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 510
+_LOG = [0] * 256
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _EXP[_power + 255] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+
+
+def _gf_multiply(x: int, y: int) -> int:
+    """Product in GF(2^8)."""
+    if x == 0 or y == 0:
+        return 0
+    return _EXP[_LOG[x] + _LOG[y]]
+
+
+def _rs_divisor(degree: int) -> list[int]:
+    """Generator polynomial coefficients, highest power first, leading 1 omitted."""
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_multiply(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_multiply(root, 0x02)
+    return result
+
+
+def _rs_remainder(data: list[int], divisor: list[int]) -> list[int]:
+    result = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        for i, coefficient in enumerate(divisor):
+            result[i] ^= _gf_multiply(coefficient, factor)
+    return result
+
+
+def _capacity(version: int) -> int:
+    """Data codewords of a version."""
+    return sum(count * size for count, size in _BLOCKS[version][1])
+
+
+def _codewords(data: bytes, version: int) -> list[int]:
+    """Data bits with padding, split into blocks with their EC codewords, interleaved."""
+    count_bits = 8 if version < 10 else 16
+    bits = "0100" + format(len(data), f"0{count_bits}b") + "".join(format(byte, "08b") for byte in data)
+    capacity = _capacity(version) * 8
+    bits += "0" * min(4, capacity - len(bits))
+    bits += "0" * (-len(bits) % 8)
+    codewords = [int(bits[i:i + 8], 2) for i in range(0, len(bits), 8)]
+    pad = (0xEC, 0x11)
+    codewords += [pad[i % 2] for i in range(capacity // 8 - len(codewords))]
+
+    ec_size, groups = _BLOCKS[version]
+    divisor = _rs_divisor(ec_size)
+    blocks, position = [], 0
+    for count, size in groups:
+        for _ in range(count):
+            block = codewords[position:position + size]
+            position += size
+            blocks.append((block, _rs_remainder(block, divisor)))
+    result = []
+    for i in range(max(len(block) for block, _ in blocks)):
+        result += [block[i] for block, _ in blocks if i < len(block)]
+    for i in range(ec_size):
+        result += [ec[i] for _, ec in blocks]
+    return result
+
+
+class _Symbol:
+    """Module matrix of one version under construction."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.size = version * 4 + 17
+        self.modules = [[False] * self.size for _ in range(self.size)]
+        self.function = [[False] * self.size for _ in range(self.size)]
+        self._draw_function_patterns()
+
+    def _set(self, x: int, y: int, dark: bool) -> None:
+        self.modules[y][x] = dark
+        self.function[y][x] = True
+
+    def _draw_function_patterns(self) -> None:
+        size = self.size
+        for i in range(size):
+            self._set(6, i, i % 2 == 0)
+            self._set(i, 6, i % 2 == 0)
+        for x, y in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    if 0 <= x + dx < size and 0 <= y + dy < size:
+                        self._set(x + dx, y + dy, max(abs(dx), abs(dy)) not in (2, 4))
+        positions = _ALIGNMENT[self.version]
+        last = len(positions) - 1
+        for i, x in enumerate(positions):
+            for j, y in enumerate(positions):
+                # Corners taken by the finder patterns
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self._set(x + dx, y + dy, max(abs(dx), abs(dy)) != 1)
+        self.draw_format(0)
+        self._draw_version()
+
+    def draw_format(self, mask: int) -> None:
+        data = _FORMAT_LEVEL << 3 | mask
+        remainder = data
+        for _ in range(10):
+            remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+        bits = (data << 10 | remainder) ^ 0x5412
+        size = self.size
+
+        def bit(i: int) -> bool:
+            return (bits >> i) & 1 == 1
+
+        for i in range(6):
+            self._set(8, i, bit(i))
+        self._set(8, 7, bit(6))
+        self._set(8, 8, bit(7))
+        self._set(7, 8, bit(8))
+        for i in range(9, 15):
+            self._set(14 - i, 8, bit(i))
+        for i in range(8):
+            self._set(size - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self._set(8, size - 15 + i, bit(i))
+        # Always dark
+        self._set(8, size - 8, True)
+
+    def _draw_version(self) -> None:
+        if self.version < 7:
+            return
+        remainder = self.version
+        for _ in range(12):
+            remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+        bits = self.version << 12 | remainder
+        for i in range(18):
+            dark = (bits >> i) & 1 == 1
+            a, b = self.size - 11 + i % 3, i // 3
+            self._set(a, b, dark)
+            self._set(b, a, dark)
+
+    def draw_codewords(self, codewords: list[int]) -> None:
+        """Place codewords in two-column zigzags from the bottom right; remainder bits stay light."""
+        size = self.size
+        total = len(codewords) * 8
+        i = 0
+        right = size - 1
+        while right >= 1:
+            # The vertical timing pattern is skipped as a whole column
+            if right == 6:
+                right = 5
+            upward = (right + 1) & 2 == 0
+            for vertical in range(size):
+                y = size - 1 - vertical if upward else vertical
+                for x in (right, right - 1):
+                    if not self.function[y][x] and i < total:
+                        self.modules[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1 == 1
+                        i += 1
+            right -= 2
+
+    def apply_mask(self, mask: int) -> None:
+        """Invert data modules selected by the mask (applying it twice undoes it)."""
+        cells = _mask_cells.get((self.version, mask))
+        if cells is None:
+            condition = _MASKS[mask]
+            cells = _mask_cells[self.version, mask] = [
+                (x, y) for y, row in enumerate(self.function)
+                for x, function in enumerate(row) if not function and condition(x, y)
+            ]
+        modules = self.modules
+        for x, y in cells:
+            modules[y][x] = not modules[y][x]
+
+    def penalty(self) -> int:
+        size = self.size
+        rows = ["".join("1" if dark else "0" for dark in row) for row in self.modules]
+        columns = ["".join(column) for column in zip(*rows)]
+        score = 0
+        for line in rows + columns:
+            # Rule 1: runs of five or more modules of one colour
+            score += sum(len(run) - 2 for run in _LONG_RUN.findall(line))
+            # Rule 3: finder-like patterns
+            score += 40 * len(_FINDER_LIKE.findall(line))
+        # Rule 2: 2x2 blocks of one colour; bit x of ``same`` is set where
+        # modules x and x + 1 of both rows are equal
+        bits = [int(row, 2) for row in rows]
+        width = (1 << (size - 1)) - 1
+        for upper, lower in zip(bits, bits[1:]):
+            vertical = ~(upper ^ lower)
+            same = vertical & (vertical >> 1) & ~(upper ^ (upper >> 1)) & width
+            score += 3 * bin(same).count("1")
+        # Rule 4: share of dark modules away from 50%
+        dark = sum(row.count("1") for row in rows)
+        score += abs(dark * 20 - size * size * 10) // (size * size) * 10
+        return score
+
+
+def encode(data: bytes | str) -> list[list[bool]]:
+    """QR code of ``data``: rows of modules, ``True`` is dark.
+
+    Raises ``ValueError`` if the data doesn't fit in version 10.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    for version in range(1, MAX_VERSION + 1):
+        count_bits = 8 if version < 10 else 16
+        if 4 + count_bits + len(data) * 8 <= _capacity(version) * 8:
+            break
+    else:
+        raise ValueError(f"{len(data)} bytes don't fit in a version {MAX_VERSION} QR code")
+
+    symbol = _Symbol(version)
+    symbol.draw_codewords(_codewords(data, version))
+    best_mask, best_score = 0, None
+    for mask in range(len(_MASKS)):
+        symbol.apply_mask(mask)
+        symbol.draw_format(mask)
+        score = symbol.penalty()
+        if best_score is None or score < best_score:
+            best_mask, best_score = mask, score
+        symbol.apply_mask(mask)
+    symbol.apply_mask(best_mask)
+    symbol.draw_format(best_mask)
+    return symbol.modules
@@ -0,0 +1,309 @@
+"""Referral graph analysis for fraud detection.
+
+``users.referrer_id`` forms a referral forest. The whole graph is loaded
+with a single scan into flat arrays indexed by the position of a user in
+``user_ids`` order, so a million users cost a few dozen MB and no per-user
+queries. Children are laid out in CSR form (``offsets`` + ``children``),
+which gives:
+
+- depth and subtree size of every user from one BFS order over the forest;
+  users the BFS never reaches sit on (or hang off) referral cycles;
+- fan-out bursts: the most referrals a user got within ``BURST_WINDOW``;
+- quick wishes: referrals that left a wish within ``QUICK_WISH_SECONDS``
+  of their first ``/start`` (freshly created, wish-once accounts);
+- shared-signal clusters: referrals with the same username stem or a
+  near-duplicate wish; referrers whose referrals share a signal are
+  linked into clusters with union-find.
+
+A referrer is flagged with one or more reasons and a score used to sort
+the admin report.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+
+from data.database import db
+
+logger = logging.getLogger(__name__)
+
+# Referrals a referrer needs before ratios (quick wishes, shared signals) count
+MIN_REFERRALS = 10
+BURST_WINDOW = 60 * 60
+BURST_THRESHOLD = 30
+QUICK_WISH_SECONDS = 60
+QUICK_WISH_SHARE = 0.8
+SHARED_SIGNAL_SHARE = 0.5
+# Referrals with one signal that link a referrer to others with the same signal
+SIGNAL_MIN_REFERRALS = 3
+# Signals seen under more referrers than this are too common to mean anything
+SIGNAL_MAX_REFERRERS = 20
+CHAIN_LENGTH = 10
+
+REASON_WEIGHTS = {
+    "cycle": 5.0,
+    "burst": 3.0,
+    "quick_wishes": 1.0,
+    "shared_signals": 2.0,
+    "linked_referrers": 1.0,
+    "chain": 2.0,
+}
+
+# Serializes analysis runs (scheduled job and admin requests)
+_lock = asyncio.Lock()
+
+
+def username_stem(username: str | None) -> str | None:
+    """Username without trailing digits: 'promo_bot_017' -> 'promo_bot'."""
+    if not username:
+        return None
+    stem = username.lower().rstrip("0123456789_")
+    return stem if len(stem) >= 3 else None
+
+
+@dataclass(slots=True)
+class ReferralGraph:
+    """Referral graph as flat arrays, one slot per user in ``user_ids`` order."""
+    user_ids: array = field(default_factory=lambda: array("q"))
+    # Referrer's user ID, 0 for none
+    referrer_ids: array = field(default_factory=lambda: array("q"))
+    # Signup time, Unix seconds
+    created: array = field(default_factory=lambda: array("q"))
+    # Seconds from signup to the wish, -1 without a wish
+    wish_delays: array = field(default_factory=lambda: array("q"))
+    # Hash of the username stem, 0 without one
+    stems: array = field(default_factory=lambda: array("q"))
+    # Near-duplicate wish cluster (user ID of its earliest author), 0 for none
+    duplicate_clusters: array = field(default_factory=lambda: array("q"))
+
+    def extend(self, rows: list[tuple]) -> None:
+        """Append (user_id, referrer_id, created, wish_delay, username) rows."""
+        if not rows:
+            return
+        user_ids, referrer_ids, created, wish_delays, usernames = zip(*rows)
+        self.user_ids.extend(user_ids)
+        self.referrer_ids.extend([referrer_id or 0 for referrer_id in referrer_ids])
+        self.created.extend(created)
+        self.wish_delays.extend([-1 if delay is None else delay for delay in wish_delays])
+        self.stems.extend([hash(stem) if (stem := username_stem(name)) else 0 for name in usernames])
+
+    def set_duplicate_clusters(self, pairs: list[tuple[int, int]]) -> None:
+        """Group authors of near-duplicate wishes: (user_id, user_id of the earlier wish) pairs."""
+        parent: dict[int, int] = {}
+
+        def find(user_id: int) -> int:
+            root = user_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while user_id != root:
+                parent[user_id], user_id = root, parent[user_id]
+            return root
+
+        for user_id, original_id in pairs:
+            # Both authors belong to the cluster, the original one included
+            parent.setdefault(user_id, user_id)
+            parent.setdefault(original_id, original_id)
+            a, b = find(user_id), find(original_id)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        self.duplicate_clusters = array("q", bytes(8 * len(self.user_ids)))
+        for user_id in parent:
+            index = bisect.bisect_left(self.user_ids, user_id)
+            if index < len(self.user_ids) and self.user_ids[index] == user_id:
+                self.duplicate_clusters[index] = find(user_id)
+
+
+def analyze(graph: ReferralGraph) -> list[dict]:
+    """Flag suspicious referrers. CPU-bound: run it in a thread."""
+    user_ids = graph.user_ids
+    n = len(user_ids)
+
+    # Parent positions, resolved by binary search over the sorted user IDs
+    parent = array("q", [-1]) * n
+    for i, referrer_id in enumerate(graph.referrer_ids):
+        if referrer_id:
+            j = bisect.bisect_left(user_ids, referrer_id)
+            if j < n and user_ids[j] == referrer_id and j != i:
+                parent[i] = j
+
+    # CSR children lists
+    offsets = array("q", [0]) * (n + 1)
+    for p in parent:
+        if p >= 0:
+            offsets[p + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    fill = array("q", offsets[:n])
+    children = array("q", [0]) * offsets[n]
+    for i, p in enumerate(parent):
+        if p >= 0:
+            children[fill[p]] = i
+            fill[p] += 1
+
+    # Depth from a BFS over the forest, then subtree sizes and heights bottom-up
+    depth = array("q", [0]) * n
+    order = array("q", (i for i in range(n) if parent[i] < 0))
+    head = 0
+    while head < len(order):
+        v = order[head]
+        head += 1
+        for c in children[offsets[v]:offsets[v + 1]]:
+            depth[c] = depth[v] + 1
+            order.append(c)
+    size = array("q", [1]) * n
+    height = array("q", [0]) * n
+    for v in reversed(order):
+        p = parent[v]
+        if p >= 0:
+            size[p] += size[v]
+            if height[v] + 1 > height[p]:
+                height[p] = height[v] + 1
+
+    # Users on referral cycles: not reachable from any root
+    in_cycle = set()
+    if len(order) < n:
+        reached = bytearray(n)
+        for v in order:
+            reached[v] = 1
+        for start in range(n):
+            if reached[start]:
+                continue
+            path, v = {}, start
+            while v >= 0 and not reached[v] and v not in path:
+                path[v] = len(path)
+                v = parent[v]
+            if v in path:
+                in_cycle.update(list(path)[path[v]:])
+            for u in path:
+                reached[u] = 1
+
+    created, wish_delays = graph.created, graph.wish_delays
+    stems, duplicates = graph.stems, graph.duplicate_clusters
+    candidates = {
+        v for v in range(n)
+        if offsets[v + 1] - offsets[v] >= MIN_REFERRALS
+        or (height[v] >= CHAIN_LENGTH and size[v] <= 2 * height[v])
+    } | in_cycle
+
+    flagged: dict[int, dict] = {}
+    signal_referrers: dict[tuple[str, int], list[int]] = {}
+    for v in candidates:
+        kids = children[offsets[v]:offsets[v + 1]]
+        referrals = len(kids)
+        wished = sum(1 for c in kids if wish_delays[c] >= 0)
+        quick = sum(1 for c in kids if 0 <= wish_delays[c] <= QUICK_WISH_SECONDS)
+
+        # Most referrals within one window, two pointers over signup times
+        times = sorted(created[c] for c in kids)
+        max_burst, left = 0, 0
+        for right, t in enumerate(times):
+            while t - times[left] >= BURST_WINDOW:
+                left += 1
+            max_burst = max(max_burst, right - left + 1)
+
+        signals = Counter()
+        for c in kids:
+            if stems[c]:
+                signals[("stem", stems[c])] += 1
+            if duplicates[c]:
+                signals[("wish", duplicates[c])] += 1
+        top_signal = signals.most_common(1)[0][1] if signals else 0
+        for key, count in signals.items():
+            if count >= SIGNAL_MIN_REFERRALS:
+                signal_referrers.setdefault(key, []).append(v)
+
+        reasons = []
+        if v in in_cycle:
+            reasons.append("cycle")
+        if max_burst >= BURST_THRESHOLD:
+            reasons.append("burst")
+        if referrals >= MIN_REFERRALS and quick >= QUICK_WISH_SHARE * referrals:
+            reasons.append("quick_wishes")
+        if referrals >= MIN_REFERRALS and top_signal >= SHARED_SIGNAL_SHARE * referrals:
+            reasons.append("shared_signals")
+        p = parent[v]
+        if height[v] >= CHAIN_LENGTH and size[v] <= 2 * height[v] and not (
+            p >= 0 and height[p] >= CHAIN_LENGTH and size[p] <= 2 * height[p]
+        ):
+            reasons.append("chain")
+        flagged[v] = {
+            "user_id": user_ids[v],
+            "referrals": referrals,
+            "wished_referrals": wished,
+            "subtree_size": size[v] - 1,
+            "depth": depth[v],
+            "max_burst": max_burst,
+            "quick_share": quick / referrals if referrals else 0.0,
+            "signal_share": top_signal / referrals if referrals else 0.0,
+            "cluster_id": None,
+            "cluster_size": 1,
+            "reasons": reasons,
+        }
+
+    # Link referrers whose referrals share a signal
+    cluster_parent: dict[int, int] = {}
+
+    def find(v: int) -> int:
+        root = v
+        while cluster_parent.get(root, root) != root:
+            root = cluster_parent[root]
+        while v != root:
+            cluster_parent[v], v = root, cluster_parent[v]
+        return root
+
+    for referrers in signal_referrers.values():
+        if 2 <= len(referrers) <= SIGNAL_MAX_REFERRERS:
+            for v in referrers:
+                cluster_parent.setdefault(v, v)
+            root = find(referrers[0])
+            for v in referrers[1:]:
+                other = find(v)
+                if other != root:
+                    cluster_parent[other] = root
+    clusters = Counter(find(v) for v in cluster_parent)
+    for v in cluster_parent:
+        root = find(v)
+        row = flagged[v]
+        row["cluster_id"] = user_ids[root]
+        row["cluster_size"] = clusters[root]
+        row["reasons"].append("linked_referrers")
+
+    result = []
+    for row in flagged.values():
+        if not row["reasons"]:
+            continue
+        score = sum(REASON_WEIGHTS[reason] for reason in row["reasons"])
+        if "burst" in row["reasons"]:
+            score += row["max_burst"] / BURST_THRESHOLD - 1
+        row["score"] = round(score, 2)
+        result.append(row)
+    result.sort(key=lambda row: (-row["score"], -row["referrals"]))
+    return result
+
+
+async def run_referral_analysis() -> dict:
+    """Load the graph, flag suspicious referrers and store the result."""
+    async with _lock:
+        started = time.perf_counter()
+        graph = await db.referrals.load_graph()
+        loaded = time.perf_counter()
+        rows = await asyncio.to_thread(analyze, graph)
+        analyzed = time.perf_counter()
+        await db.referrals.save_suspicious(rows)
+        summary = {
+            "at": time.time(),
+            "users": len(graph.user_ids),
+            "flagged": len(rows),
+            "load_seconds": round(loaded - started, 3),
+            "analyze_seconds": round(analyzed - loaded, 3),
+        }
+        await db.settings.set_setting("referral_analysis", json.dumps(summary))
+        logger.info(
+            "Referral analysis: %d of %d users flagged (load %ss, analysis %ss)",
+            summary['flagged'], summary['users'], summary['load_seconds'], summary['analyze_seconds']
+        )
+        return summary
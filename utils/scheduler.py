@@ -1,102 +1,307 @@
 """Scheduler module for periodic wish broadcasting.
 
-Uses APScheduler for robust job scheduling with:
-- Persistent job tracking via database
-- Graceful handling of missed jobs
-- Proper async support
+Every broadcast target (see ``BroadcastRepository``) has its own interval
+and quiet hours. Instead of one APScheduler job per target, a single job
+ticks a hashed timer wheel and sends to all targets due in that tick
+concurrently:
+
+- scheduling and cancelling a target is O(1), a tick only looks at one slot;
+- sends to the same chat are spaced by ``CHAT_SEND_INTERVAL`` and
+  ``RetryAfter`` is honoured, total concurrency is capped;
+- a target whose ``last_run`` is older than its interval is sent to once
+  right after startup (missed-run catch-up), unless in quiet hours;
+- a failed or skipped send (no wishes, bot disabled) is retried a full
+  interval later, not on every tick.
+
+The same scheduler runs the periodic referral fraud analysis
+(``utils.referral_graph``) and online backups (``utils.backup``). On
+shutdown the scheduler is paused and ``wait_for_jobs`` lets running jobs
+finish before the database closes: APScheduler's asyncio executor cancels
+them even with ``shutdown(wait=True)``.
 """
+import asyncio
+import functools
 import logging
+import math
 import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
-from config.config import CHAT_ID
+from config.config import BACKUP_DIR, BACKUP_INTERVAL, BROADCAST_TZ, REFERRAL_ANALYSIS_INTERVAL
 from data.database import db
+from utils.messages import M
+from utils.backup import run_backup
+from utils.referral_graph import run_referral_analysis
 
 logger = logging.getLogger(__name__)
 
-BROADCAST_INTERVAL_SECONDS = 60 * 60  # 1 hour
-
-
-async def broadcast_random_wish(bot: Bot) -> None:
-    """Publish a random wish to the chat (or as a comment to a post)."""
-    # Check if bot is enabled
-    if not await db.get_bot_enabled():
-        logger.info("Bot is disabled, skipping broadcast")
-        return
-    
-    if not CHAT_ID:
-        logger.warning("CHAT_ID not set, skipping broadcast")
-        return
-    
-    wish = await db.get_random_wish()
-    if not wish:
-        logger.info("No wishes to broadcast")
-        return
-
-    username = f"@{wish['username']}" if wish['username'] else f"ID: {wish['user_id']}"
-    text = (
-        f"🎄 Новогоднее пожелание от {username}:\n"
-        f"<blockquote>{wish['text']}</blockquote>"
-    )
-    
-    # Get reply message ID for comments
-    reply_to = await db.get_reply_message_id()
-    
-    try:
-        if reply_to:
-            await bot.send_message(
-                CHAT_ID, 
-                text, 
-                parse_mode="HTML",
-                reply_to_message_id=reply_to
-            )
-            logger.info(f"Published wish from {username} as comment to post {reply_to}")
+WHEEL_TICK_SECONDS = 30
+WHEEL_SLOTS = 120  # one revolution = 1 hour
+MIN_INTERVAL_SECONDS = 60
+MAX_CONCURRENT_SENDS = 10
+# Telegram allows about 20 messages per minute in a group
+CHAT_SEND_INTERVAL = 3.0
+
+try:
+    TIMEZONE = ZoneInfo(BROADCAST_TZ)
+except (ZoneInfoNotFoundError, ValueError):
+    logger.warning("Unknown BROADCAST_TZ %r, quiet hours use UTC", BROADCAST_TZ)
+    TIMEZONE = ZoneInfo("UTC")
+
+
+class TimerWheel:
+    """Hashed timing wheel keyed by target ID.
+
+    Slot ``cursor`` covers the time ``position``; a key due ``n`` ticks
+    later goes to slot ``cursor + n`` with ``n // slots`` full rounds left.
+    """
+
+    def __init__(self, tick: float, slots: int, now: float):
+        self.tick = tick
+        self._slots: list[dict[int, int]] = [{} for _ in range(slots)]
+        self._where: dict[int, int] = {}
+        self._cursor = 0
+        self.position = now
+
+    def schedule(self, key: int, due: float) -> None:
+        """(Re)schedule ``key`` to fire at the first tick at or after ``due``."""
+        self.cancel(key)
+        ticks = max(0, math.ceil((due - self.position) / self.tick))
+        rounds, offset = divmod(ticks, len(self._slots))
+        slot = (self._cursor + offset) % len(self._slots)
+        self._slots[slot][key] = rounds
+        self._where[key] = slot
+
+    def cancel(self, key: int) -> None:
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self, now: float) -> list[int]:
+        """Process all slots up to ``now``. Returns the keys that fired."""
+        fired = []
+        while self.position <= now:
+            slot = self._slots[self._cursor]
+            for key, rounds in list(slot.items()):
+                if rounds:
+                    slot[key] = rounds - 1
+                else:
+                    del slot[key]
+                    del self._where[key]
+                    fired.append(key)
+            self._cursor = (self._cursor + 1) % len(self._slots)
+            self.position += self.tick
+        return fired
+
+
+def in_quiet_hours(hour: int, quiet_start: int | None, quiet_end: int | None) -> bool:
+    """Check whether a local hour falls into [quiet_start, quiet_end)."""
+    if quiet_start is None or quiet_end is None or quiet_start == quiet_end:
+        return False
+    if quiet_start < quiet_end:
+        return quiet_start <= hour < quiet_end
+    return hour >= quiet_start or hour < quiet_end
+
+
+def next_allowed_time(timestamp: float, quiet_start: int | None, quiet_end: int | None) -> float:
+    """Move a timestamp out of quiet hours to the moment they end."""
+    local = datetime.fromtimestamp(timestamp, TIMEZONE)
+    if not in_quiet_hours(local.hour, quiet_start, quiet_end):
+        return timestamp
+    end = local.replace(hour=quiet_end, minute=0, second=0, microsecond=0)
+    if end <= local:
+        end += timedelta(days=1)
+    return end.timestamp()
+
+
+class Broadcaster:
+    """Send random wishes to all enabled broadcast targets."""
+
+    def __init__(self):
+        self._wheel = TimerWheel(WHEEL_TICK_SECONDS, WHEEL_SLOTS, time.time())
+        self._targets: dict[int, dict] = {}
+        self._due: dict[int, float] = {}
+        self._sends = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+        self._chat_locks: dict[int, asyncio.Lock] = {}
+        self._chat_sent_at: dict[int, float] = {}
+
+    def next_run(self, target_id: int) -> float | None:
+        """Scheduled time of the next send to a target."""
+        return self._due.get(target_id)
+
+    async def load(self) -> None:
+        """Load targets from the database and schedule them."""
+        # Start the wheel now so overdue targets fire on the first tick
+        now = time.time()
+        self._wheel = TimerWheel(WHEEL_TICK_SECONDS, WHEEL_SLOTS, now)
+        self._targets.clear()
+        self._due.clear()
+        for target in await db.broadcasts.get_targets():
+            self._schedule(target, now)
+        logger.info("Broadcast targets scheduled: %d", len(self._targets))
+
+    async def refresh(self, target_id: int) -> None:
+        """Reschedule a target after it was added, changed or deleted."""
+        target = await db.broadcasts.get_target(target_id)
+        if target:
+            self._schedule(target)
+        else:
+            self._unschedule(target_id)
+
+    def _schedule(self, target: dict, now: float = None, postpone: bool = False) -> None:
+        if not target["enabled"]:
+            self._unschedule(target["id"])
+            return
+        now = now or time.time()
+        if target["last_run"] is None or postpone:
+            # First runs and retries after a failed or skipped send wait a full interval
+            due = now + target["interval_seconds"]
         else:
-            await bot.send_message(CHAT_ID, text, parse_mode="HTML")
-            logger.info(f"Published wish from {username}")
-        
-        # Save broadcast time
-        await db.set_last_broadcast_time(time.time())
-    except Exception as e:
-        logger.error(f"Error broadcasting wish: {e}")
+            # Overdue targets get a single catch-up send
+            due = max(target["last_run"] + target["interval_seconds"], now)
+        due = next_allowed_time(due, target["quiet_start"], target["quiet_end"])
+        self._targets[target["id"]] = target
+        self._due[target["id"]] = due
+        self._wheel.schedule(target["id"], due)
+
+    def _unschedule(self, target_id: int) -> None:
+        self._wheel.cancel(target_id)
+        self._targets.pop(target_id, None)
+        self._due.pop(target_id, None)
+
+    async def tick(self, bot: Bot) -> None:
+        """Send to every target that became due since the last tick."""
+        due = [self._targets[target_id] for target_id in self._wheel.advance(time.time())
+               if target_id in self._targets]
+        if not due:
+            return
+        if not await db.get_bot_enabled():
+            logger.info("Bot is disabled, skipping broadcast")
+            for target in due:
+                self._schedule(target, postpone=True)
+            return
+        await asyncio.gather(*(self._broadcast(bot, target) for target in due))
+
+    async def _broadcast(self, bot: Bot, target: dict) -> None:
+        sent = False
+        try:
+            wish = await db.get_random_wish()
+            if not wish:
+                logger.info("No wishes to broadcast")
+                return
+            username = f"@{wish['username']}" if wish['username'] else f"ID: {wish['user_id']}"
+            text = M.WISH_POST.format(username=username, wish_text=wish['text'])
+            await self._send(bot, target["chat_id"], text, target["reply_to"])
+            sent_at = time.time()
+            await db.broadcasts.mark_sent(target["id"], sent_at)
+            target["last_run"] = sent_at
+            sent = True
+            logger.info("Published wish from %s to %s", username, target['chat_id'])
+        except Exception as e:
+            logger.error("Error broadcasting wish to %s: %s", target['chat_id'], e)
+        finally:
+            # The target may have been changed or deleted while sending
+            if self._targets.get(target["id"]) is target:
+                self._schedule(target, postpone=not sent)
+
+    async def _send(self, bot: Bot, chat_id: int, text: str, reply_to: int | None) -> None:
+        lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+        async with lock, self._sends:
+            wait = self._chat_sent_at.get(chat_id, 0) + CHAT_SEND_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await bot.send_message(chat_id, text, parse_mode="HTML", reply_to_message_id=reply_to)
+            except TelegramRetryAfter as e:
+                logger.warning("Flood control in %s, retrying in %ss", chat_id, e.retry_after)
+                await asyncio.sleep(e.retry_after)
+                await bot.send_message(chat_id, text, parse_mode="HTML", reply_to_message_id=reply_to)
+            finally:
+                self._chat_sent_at[chat_id] = time.monotonic()
+
+
+# Global broadcaster shared by the scheduler job and admin handlers
+broadcaster = Broadcaster()
+
+# Tasks of the scheduler jobs running right now
+_running_jobs: set[asyncio.Task] = set()
+
+
+def _tracked(job):
+    """Wrap a job coroutine so ``wait_for_jobs`` can wait for it."""
+    @functools.wraps(job)
+    async def wrapper(*args, **kwargs):
+        task = asyncio.current_task()
+        _running_jobs.add(task)
+        try:
+            return await job(*args, **kwargs)
+        finally:
+            _running_jobs.discard(task)
+    return wrapper
+
+
+async def wait_for_jobs() -> None:
+    """Wait until the running scheduler jobs finish; pause the scheduler first."""
+    if _running_jobs:
+        logger.info("Waiting for %d scheduler job(s)...", len(_running_jobs))
+        # asyncio.wait, unlike gather, doesn't cancel the jobs if the drain deadline expires
+        await asyncio.wait(list(_running_jobs))
 
 
 def setup_scheduler(bot: Bot) -> AsyncIOScheduler:
     """Create and configure the APScheduler instance.
-    
+
+    Call ``broadcaster.load()`` first; the first tick runs immediately so
+    missed broadcasts are caught up on startup.
+
     Returns:
         AsyncIOScheduler: Configured scheduler instance (not started).
     """
     scheduler = AsyncIOScheduler()
-    
-    # Add the hourly broadcast job
+
     scheduler.add_job(
-        broadcast_random_wish,
-        trigger=IntervalTrigger(seconds=BROADCAST_INTERVAL_SECONDS),
+        _tracked(broadcaster.tick),
+        trigger=IntervalTrigger(seconds=WHEEL_TICK_SECONDS),
         args=[bot],
-        id="hourly_wish_broadcast",
-        name="Broadcast Random Wish",
+        id="broadcast_wheel",
+        name="Broadcast Timer Wheel",
         replace_existing=True,
-        misfire_grace_time=300,  # 5 minutes grace for missed jobs
+        next_run_time=datetime.now(),
+        coalesce=True,
+        misfire_grace_time=WHEEL_TICK_SECONDS,
     )
-    
-    logger.info(f"Scheduler configured: wish broadcast every {BROADCAST_INTERVAL_SECONDS // 60} minutes")
-    
-    return scheduler
 
+    logger.info("Scheduler configured: broadcast wheel ticks every %s seconds", WHEEL_TICK_SECONDS)
+
+    if REFERRAL_ANALYSIS_INTERVAL > 0:
+        scheduler.add_job(
+            _tracked(run_referral_analysis),
+            trigger=IntervalTrigger(seconds=REFERRAL_ANALYSIS_INTERVAL),
+            id="referral_analysis",
+            name="Referral Fraud Analysis",
+            replace_existing=True,
+            # Leave startup to polling and the wish index backfill
+            next_run_time=datetime.now() + timedelta(minutes=5),
+            coalesce=True,
+            max_instances=1,
+        )
+        logger.info("Referral analysis scheduled every %s seconds", REFERRAL_ANALYSIS_INTERVAL)
 
-async def check_and_run_missed_broadcast(bot: Bot) -> None:
-    """Check if a broadcast was missed and run it immediately if needed."""
-    last_broadcast = await db.get_last_broadcast_time()
-    current_time = time.time()
-    
-    if last_broadcast:
-        elapsed = current_time - last_broadcast
-        if elapsed >= BROADCAST_INTERVAL_SECONDS:
-            logger.info("Missed broadcast detected, running now...")
-            await broadcast_random_wish(bot)
-    else:
-        # First run - don't broadcast immediately, wait for first interval
-        logger.info("First run detected, waiting for first scheduled broadcast")
+    if BACKUP_INTERVAL > 0:
+        scheduler.add_job(
+            _tracked(run_backup),
+            trigger=IntervalTrigger(seconds=BACKUP_INTERVAL),
+            id="backup",
+            name="Online Database Backup",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+        logger.info("Backups scheduled every %s seconds into %s", BACKUP_INTERVAL, BACKUP_DIR)
+
+    return scheduler
@@ -0,0 +1,124 @@
+"""Screen registry.
+
+All user-facing screens are assembled once at startup from
+``utils/messages.py`` and the static keyboards: captions are pre-rendered,
+channel links resolved and asset paths checked a single time. Screens that
+depend on the user (tickets, existing wish) are kept as templates and only
+formatted per call.
+"""
+import html
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup
+
+from config.config import (
+    MAIN_IMAGE, RULES_IMAGE, TICKETS_IMAGE, CONGRAT_IMAGE,
+    REQUIRED_CHANNEL, REQUIRED_CHAT, CHANNEL_INVITE_LINK, CHAT_INVITE_LINK,
+)
+from utils.keyboards.inline import MAIN_MENU, BACK_BUTTON
+from utils.messages import M
+from utils.subscription import get_channel_url, get_chat_url, get_subscription_keyboard
+
+
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+@dataclass(frozen=True, slots=True)
+class GeneratedPhoto:
+    """A per-user image: a ``file_id`` of an earlier upload or the image to upload.
+
+    ``uploaded`` receives the ``file_id`` Telegram assigns to the upload.
+    """
+    media: str | BufferedInputFile
+    uploaded: Callable[[str], None] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Screen:
+    """A rendered screen: caption, keyboard and optional photo."""
+    text: str
+    keyboard: InlineKeyboardMarkup | None = None
+    photo: Path | GeneratedPhoto | None = None
+
+
+def _existing(path: Path) -> Path | None:
+    return path if path.exists() else None
+
+
+def _leaders(top: list[dict], kind: str) -> str:
+    if not top:
+        return M.LEADERBOARD_EMPTY
+    lines = []
+    for place, row in enumerate(top, 1):
+        name = f"@{html.escape(row['username'])}" if row['username'] else M.LEADERBOARD_ANONYMOUS
+        lines.append(f"{MEDALS.get(place, f'{place}.')} {name} — {row[kind]}")
+    return "\n".join(lines)
+
+
+def _link(invite_link: str, target: str, url: str, fallback: str) -> str:
+    if invite_link:
+        return f'<a href="{invite_link}">{fallback}</a>'
+    if target.startswith('@'):
+        return f'<a href="{url}">{target}</a>'
+    return fallback
+
+
+class ScreenRegistry:
+    """Pre-built screens shared by all handlers."""
+
+    def __init__(self):
+        main_photo = _existing(MAIN_IMAGE)
+        self.tickets_photo = _existing(TICKETS_IMAGE)
+
+        self.welcome = Screen(M.WELCOME, MAIN_MENU, main_photo)
+        self.main_menu = Screen(M.MAIN_MENU, MAIN_MENU, main_photo)
+        self.rules = Screen(
+            M.RULES_TEMPLATE.format(
+                channel_link=_link(CHANNEL_INVITE_LINK, REQUIRED_CHANNEL, get_channel_url(), "канал"),
+                chat_link=_link(CHAT_INVITE_LINK, REQUIRED_CHAT, get_chat_url(), "чат"),
+            ),
+            BACK_BUTTON,
+            _existing(RULES_IMAGE),
+        )
+        self.wish_prompt = Screen(M.WISH_PROMPT, BACK_BUTTON)
+        self.wish_saved = Screen(M.WISH_SAVED, BACK_BUTTON, _existing(CONGRAT_IMAGE))
+        self.wish_held = Screen(M.WISH_HELD, BACK_BUTTON)
+
+    def tickets(self, tickets: int, total_referrals: int, active_referrals: int, link: str,
+                rank: dict, card: GeneratedPhoto | None = None) -> Screen:
+        """Tickets screen for a user, with their card or the static image."""
+        text = M.TICKETS_INFO.format(
+            tickets=tickets,
+            rank=rank['tickets'],
+            total=rank['total'],
+            total_referrals=total_referrals,
+            active_referrals=active_referrals,
+            link=link,
+        )
+        return Screen(text, BACK_BUTTON, card or self.tickets_photo)
+
+    def leaderboard(self, size: int, tickets_top: list[dict], referrals_top: list[dict], rank: dict) -> Screen:
+        """Top users by tickets and referrals with the user's own places."""
+        text = M.LEADERBOARD.format(
+            size=size,
+            tickets_top=_leaders(tickets_top, "tickets"),
+            referrals_top=_leaders(referrals_top, "referrals"),
+            tickets_rank=rank['tickets'],
+            referrals_rank=rank['referrals'],
+            total=rank['total'],
+        )
+        return Screen(text, BACK_BUTTON)
+
+    def subscription(self, sub_status: dict) -> Screen:
+        """Subscription requirements with per-chat status icons."""
+        return Screen(M.SUBSCRIPTION_REQUIRED, get_subscription_keyboard(sub_status))
+
+    def wish_exists(self, wish_text: str) -> Screen:
+        """Screen showing the wish a user has already left."""
+        return Screen(M.WISH_ALREADY_EXISTS.format(wish_text=wish_text), BACK_BUTTON)
+
+
+# Global registry instance, built once on import at startup
+screens = ScreenRegistry()
@@ -0,0 +1,188 @@
+"""Graceful shutdown coordinator.
+
+After polling stops, updates that were already accepted keep running as
+tasks. The coordinator tracks them through an outer middleware and, on
+shutdown:
+
+1. waits (up to a deadline) for in-flight handlers to finish;
+2. runs registered drain callbacks (background tasks, pending DB batches);
+3. saves the updates still being handled to the journal;
+4. confirms the received updates so a restarted instance doesn't receive
+   them from Telegram again;
+5. runs registered close callbacks and closes the bot session.
+
+aiogram's polling has usually confirmed an update before its handler
+finishes, so Telegram would not redeliver one that the deadline cut off.
+The journal (``UpdateJournalRepository``) hands those updates over
+instead: ``replay`` feeds them to the dispatcher of the next instance
+before it starts polling. Handling is at least once: a handler cut off
+half-way runs again from the start.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Any, Awaitable, Protocol
+
+from aiogram import Bot, BaseMiddleware, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[], Awaitable[Any]]
+
+# Time allowed for closing resources after the drain deadline
+CLOSE_TIMEOUT_SECONDS = 5
+
+
+class UpdateJournal(Protocol):
+    """Storage for unfinished updates, see ``UpdateJournalRepository``."""
+
+    async def save(self, updates: list[dict]) -> None: ...
+
+    async def take(self) -> list[dict]: ...
+
+
+class _InFlightMiddleware(BaseMiddleware):
+    """Count running update handlers for the coordinator."""
+
+    def __init__(self, coordinator: "ShutdownCoordinator"):
+        self.coordinator = coordinator
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        coordinator = self.coordinator
+        coordinator.in_flight += 1
+        coordinator._idle.clear()
+        if isinstance(event, Update):
+            coordinator._running[event.update_id] = event
+            coordinator.last_update_id = max(coordinator.last_update_id or 0, event.update_id)
+        try:
+            return await handler(event, data)
+        finally:
+            if isinstance(event, Update):
+                coordinator._running.pop(event.update_id, None)
+            coordinator.in_flight -= 1
+            if not coordinator.in_flight:
+                coordinator._idle.set()
+
+
+class ShutdownCoordinator:
+    """Drain in-flight work and release resources on shutdown.
+
+    Register ``coordinator.middleware`` as the first outer update
+    middleware so every update is tracked. Without a ``journal``, updates
+    still running at the deadline are lost.
+    """
+
+    def __init__(self, timeout: float, journal: UpdateJournal | None = None):
+        self.timeout = timeout
+        self.journal = journal
+        self.in_flight = 0
+        self.last_update_id: int | None = None
+        self.middleware = _InFlightMiddleware(self)
+        self._running: dict[int, Update] = {}
+        self._replayed: set[asyncio.Task] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._drain_callbacks: list[tuple[str, Callback]] = []
+        self._close_callbacks: list[tuple[str, Callback]] = []
+
+    def on_drain(self, name: str, callback: Callback) -> None:
+        """Register a callback that flushes pending work."""
+        self._drain_callbacks.append((name, callback))
+
+    def on_close(self, name: str, callback: Callback) -> None:
+        """Register a callback that releases a resource."""
+        self._close_callbacks.append((name, callback))
+
+    async def _run(self, stage: str, callbacks: list[tuple[str, Callback]], deadline: float) -> bool:
+        ok = True
+        for name, callback in callbacks:
+            remaining = max(deadline - time.monotonic(), 0.1)
+            try:
+                await asyncio.wait_for(callback(), timeout=remaining)
+            except asyncio.TimeoutError:
+                logger.warning("Shutdown %s step '%s' timed out", stage, name)
+                ok = False
+            except Exception as e:
+                logger.error("Shutdown %s step '%s' failed: %s", stage, name, e)
+                ok = False
+        return ok
+
+    async def replay(self, dispatcher: Dispatcher, bot: Bot) -> int:
+        """Handle the updates the last shutdown cut off. Returns how many there were.
+
+        Call before polling starts; the updates are handled in the background.
+        """
+        if self.journal is None:
+            return 0
+        updates = await self.journal.take()
+        for update in updates:
+            task = asyncio.create_task(self._replay_update(dispatcher, bot, update))
+            self._replayed.add(task)
+            task.add_done_callback(self._replayed.discard)
+        if updates:
+            logger.info("Replaying %d update(s) left unfinished by the last shutdown", len(updates))
+        return len(updates)
+
+    @staticmethod
+    async def _replay_update(dispatcher: Dispatcher, bot: Bot, update: dict) -> None:
+        try:
+            await dispatcher.feed_raw_update(bot, update)
+        except Exception as e:
+            logger.error("Replayed update %s failed: %s", update.get("update_id"), e)
+
+    async def _save_unfinished(self) -> bool:
+        """Journal the updates still being handled. Returns False if they would be lost."""
+        if not self._running:
+            return True
+        if self.journal is None:
+            logger.warning("%d unfinished update(s) may be lost: no update journal", len(self._running))
+            return False
+        updates = [
+            update.model_dump(mode="json", by_alias=True, exclude_none=True)
+            for update in self._running.values()
+        ]
+        try:
+            await asyncio.wait_for(self.journal.save(updates), timeout=CLOSE_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.error("Failed to journal %d unfinished update(s): %s", len(updates), e)
+            return False
+        logger.warning("Journaled %d unfinished update(s) for the next start", len(updates))
+        return True
+
+    async def _confirm_offset(self, bot: Bot) -> None:
+        """Acknowledge received updates to Telegram."""
+        if self.last_update_id is None:
+            return
+        try:
+            await bot.get_updates(offset=self.last_update_id + 1, limit=1, timeout=0)
+        except Exception as e:
+            logger.warning("Failed to confirm update offset: %s", e)
+
+    async def shutdown(self, bot: Bot) -> None:
+        """Wait for in-flight work, flush queues and close resources."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        # Let update tasks created just before polling stopped enter the middleware
+        await asyncio.sleep(0)
+        if self.in_flight:
+            logger.info("Waiting for %d in-flight handler(s)...", self.in_flight)
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Shutdown deadline reached with %d handler(s) still running", self.in_flight)
+
+        drained = await self._run("drain", self._drain_callbacks, deadline)
+        # If journaling fails, the updates Telegram hasn't confirmed yet are at least redelivered
+        if await self._save_unfinished() and drained:
+            await self._confirm_offset(bot)
+
+        await self._run("close", self._close_callbacks, time.monotonic() + CLOSE_TIMEOUT_SECONDS)
+        await bot.session.close()
+        logger.info("Shutdown completed in %.2fs", time.monotonic() - started)
@@ -4,6 +4,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.enums import ChatMemberStatus
 
 from config.config import REQUIRED_CHANNEL, REQUIRED_CHAT, CHAT_INVITE_LINK, CHANNEL_INVITE_LINK
+from utils.messages import M
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,7 @@ async def check_subscription(bot: Bot, user_id: int) -> dict:
             ChatMemberStatus.KICKED
         ]
     except Exception as e:
-        logger.warning(f"Ошибка проверки подписки на канал: {e}")
+        logger.warning("Ошибка проверки подписки на канал: %s", e)
         result["channel"] = False
     
     # Проверяем чат
@@ -36,52 +37,46 @@ async def check_subscription(bot: Bot, user_id: int) -> dict:
             ChatMemberStatus.KICKED
         ]
     except Exception as e:
-        logger.warning(f"Ошибка проверки подписки на чат: {e}")
+        logger.warning("Ошибка проверки подписки на чат: %s", e)
         result["chat"] = False
     
     result["all_ok"] = result["channel"] and result["chat"]
     return result
 
 
-def get_subscription_keyboard(sub_status: dict = None) -> InlineKeyboardMarkup:
-    """Клавиатура с кнопками для подписки с отображением статуса."""
-    from config.config import REQUIRED_CHANNEL, REQUIRED_CHAT, CHANNEL_INVITE_LINK, CHAT_INVITE_LINK
-    
-    # Определяем URL для канала
+def get_channel_url() -> str:
+    """URL канала: invite-ссылка, публичный @username или заглушка."""
     if CHANNEL_INVITE_LINK:
-        channel_url = CHANNEL_INVITE_LINK
-    elif REQUIRED_CHANNEL.startswith('@'):
-        channel_url = f"https://t.me/{REQUIRED_CHANNEL.lstrip('@')}"
-    else:
-        # Если это числовой ID без invite-ссылки, используем заглушку
-        channel_url = "https://t.me/"
-    
-    # Определяем URL для чата
+        return CHANNEL_INVITE_LINK
+    if REQUIRED_CHANNEL.startswith('@'):
+        return f"https://t.me/{REQUIRED_CHANNEL.lstrip('@')}"
+    # Если это числовой ID без invite-ссылки, используем заглушку
+    return "https://t.me/"
+
+
+def get_chat_url() -> str:
+    """URL чата: invite-ссылка, публичный @username или заглушка."""
     if CHAT_INVITE_LINK:
-        chat_url = CHAT_INVITE_LINK
-    elif REQUIRED_CHAT.startswith('@'):
-        chat_url = f"https://t.me/{REQUIRED_CHAT.lstrip('@')}"
-    else:
-        # Если это числовой ID без invite-ссылки, используем заглушку
-        chat_url = "https://t.me/"
-    
-    # Определяем статусы для кнопок
-    if sub_status:
-        chat_icon = "✅" if sub_status["chat"] else "❌"
-        channel_icon = "✅" if sub_status["channel"] else "❌"
-    else:
-        chat_icon = "❌"
-        channel_icon = "❌"
+        return CHAT_INVITE_LINK
+    if REQUIRED_CHAT.startswith('@'):
+        return f"https://t.me/{REQUIRED_CHAT.lstrip('@')}"
+    # Если это числовой ID без invite-ссылки, используем заглушку
+    return "https://t.me/"
+
+
+def _build_subscription_keyboard(chat_ok: bool, channel_ok: bool) -> InlineKeyboardMarkup:
+    chat_icon = "✅" if chat_ok else "❌"
+    channel_icon = "✅" if channel_ok else "❌"
     
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
                 text=f"{chat_icon} Чат", 
-                url=chat_url
+                url=get_chat_url()
             ),
             InlineKeyboardButton(
                 text=f"{channel_icon} Канал", 
-                url=channel_url
+                url=get_channel_url()
             )
         ],
         [InlineKeyboardButton(
@@ -91,6 +86,21 @@ def get_subscription_keyboard(sub_status: dict = None) -> InlineKeyboardMarkup:
     ])
 
 
+# Все четыре комбинации статусов собираются один раз
+_SUBSCRIPTION_KEYBOARDS = {
+    (chat_ok, channel_ok): _build_subscription_keyboard(chat_ok, channel_ok)
+    for chat_ok in (False, True)
+    for channel_ok in (False, True)
+}
+
+
+def get_subscription_keyboard(sub_status: dict = None) -> InlineKeyboardMarkup:
+    """Клавиатура с кнопками для подписки с отображением статуса."""
+    if sub_status:
+        return _SUBSCRIPTION_KEYBOARDS[(bool(sub_status["chat"]), bool(sub_status["channel"]))]
+    return _SUBSCRIPTION_KEYBOARDS[(False, False)]
+
+
 def get_subscription_text(sub_status: dict = None) -> str:
     """Текст с информацией о необходимых подписках."""
-    return "📋 <b>Для участия в розыгрыше нужно подписаться:</b>"
+    return M.SUBSCRIPTION_REQUIRED
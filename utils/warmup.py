@@ -0,0 +1,130 @@
+"""Startup warm-up before accepting updates.
+
+Runs between database initialization and polling so the first users
+after a restart don't pay cold costs:
+
+- ``bot.me()`` is resolved and cached (used for referral links);
+- screen images get Telegram ``file_id``s: persisted ids are validated
+  with ``getFile``, missing ones are uploaded once to the first admin's
+  chat and the message is deleted;
+- settings are loaded into the repository cache;
+- hot tables and indexes are read so their pages sit in the OS cache.
+
+Stages run in order within a total time budget; whatever doesn't fit is
+skipped and happens lazily on first use instead.
+"""
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from aiogram import Bot
+from aiogram.types import FSInputFile
+
+from config.config import ADMIN_IDS, MAIN_IMAGE, RULES_IMAGE, TICKETS_IMAGE, CONGRAT_IMAGE
+from data.database import db
+from utils.navigation import preload_photo
+
+logger = logging.getLogger(__name__)
+
+ASSETS = (MAIN_IMAGE, RULES_IMAGE, TICKETS_IMAGE, CONGRAT_IMAGE)
+
+# Queries reading the hot tables and indexes end to end
+TOUCH_QUERIES = (
+    "SELECT COUNT(*) FROM users",
+    "SELECT COUNT(*) FROM wishes",
+    "SELECT COUNT(*) FROM users WHERE referrer_id IS NOT NULL",
+)
+
+
+def _file_id_key(path: Path) -> str:
+    # Changing the image invalidates its file_id
+    stat = path.stat()
+    return f"file_id:{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+async def _warm_bot(bot: Bot) -> str:
+    me = await bot.me()
+    return f"@{me.username}"
+
+
+async def _warm_media(bot: Bot) -> str:
+    cached = uploaded = 0
+    upload_chat = next((admin_id for admin_id in ADMIN_IDS if admin_id), None)
+    for path in ASSETS:
+        if not path.exists():
+            continue
+        key = _file_id_key(path)
+        file_id = await db.get_setting(key)
+        if file_id:
+            try:
+                await bot.get_file(file_id)
+                preload_photo(path, file_id)
+                cached += 1
+                continue
+            except Exception:
+                logger.info("Stored file_id for %s is no longer valid", path.name)
+        if upload_chat is None:
+            continue
+        message = await bot.send_photo(upload_chat, FSInputFile(path), disable_notification=True)
+        file_id = message.photo[-1].file_id
+        preload_photo(path, file_id)
+        await db.set_setting(key, file_id)
+        uploaded += 1
+        try:
+            await message.delete()
+        except Exception:
+            pass
+    return f"{cached} cached, {uploaded} uploaded"
+
+
+async def _warm_settings(bot: Bot) -> str:
+    count = await db.settings.load_all()
+    return f"{count} rows"
+
+
+async def _warm_leaderboard(bot: Bot) -> str:
+    count = await db.leaderboard.load()
+    return f"{count} users"
+
+
+async def _warm_database(bot: Bot) -> str:
+    async with db.stats._read() as conn:
+        for query in TOUCH_QUERIES:
+            async with conn.execute(query) as cursor:
+                await cursor.fetchone()
+    return f"{len(TOUCH_QUERIES)} scans"
+
+
+STAGES = (
+    ("bot.me", _warm_bot),
+    ("settings", _warm_settings),
+    ("leaderboard", _warm_leaderboard),
+    ("media", _warm_media),
+    ("db pages", _warm_database),
+)
+
+
+async def warm_up(bot: Bot, budget: float) -> None:
+    """Run warm-up stages within ``budget`` seconds and log the breakdown."""
+    started = time.perf_counter()
+    deadline = started + budget
+    report = []
+    for name, stage in STAGES:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            report.append(f"{name} skipped")
+            continue
+        stage_started = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(stage(bot), timeout=remaining)
+        except asyncio.TimeoutError:
+            detail = "budget exceeded"
+        except Exception as e:
+            detail = f"failed: {e}"
+        report.append(f"{name} {(time.perf_counter() - stage_started) * 1000:.0f}ms ({detail})")
+    logger.info(
+        "Warm-up finished in %.0fms: %s",
+        (time.perf_counter() - started) * 1000,
+        "; ".join(report)
+    )